@@ -0,0 +1,216 @@
+# backend/app/admin_stream.py
+
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set
+
+# Frames a slow client may have queued before it is resynced
+ADMIN_STREAM_QUEUE_ENV = "NUTRIGUIDE_ADMIN_STREAM_QUEUE"
+# Seconds between keep-alive comments on an idle stream
+_KEEPALIVE_SECONDS = 15.0
+
+
+def sse_frame(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def _summary_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in current.items() if previous.get(k) != v}
+
+
+class _Subscriber:
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=maxsize)
+        self.needs_resync = False
+
+
+class AdminBroadcaster:
+    """
+    Single producer, many subscribers push channel for the admin dashboard.
+
+    Committed analytics records are handed over from any thread with
+    publish(). One producer task on the event loop coalesces whatever
+    arrived since it last ran, computes the summary once, diffs it against
+    the previous one and encodes a single "update" SSE frame, which is then
+    put on every subscriber's queue. Serialization cost is per update, not
+    per viewer.
+
+    Each subscriber has a bounded queue. A client that falls behind has its
+    backlog dropped and gets a fresh "snapshot" frame instead, so one slow
+    dashboard never holds up the producer or the other clients.
+    """
+
+    def __init__(
+        self,
+        get_summary: Callable[[], Dict[str, Any]],
+        get_recent: Callable[[int], List[Dict[str, Any]]],
+        recent_limit: int = 100,
+        queue_size: int = 64,
+    ):
+        self._get_summary = get_summary
+        self._get_recent = get_recent
+        self.recent_limit = recent_limit
+        self.queue_size = max(1, queue_size)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._producer: Optional[asyncio.Task] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_lock = threading.Lock()
+
+        self._subscribers: Set[_Subscriber] = set()
+        # State new subscribers start from; only touched on the loop
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=recent_limit)
+        self._summary: Dict[str, Any] = {}
+        self._seq = 0
+
+        self.updates = 0
+        self.frames_queued = 0
+        self.resyncs = 0
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> None:
+        """
+        Start the producer on the running event loop.
+        """
+        if self._producer is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        # Newest first, like /admin/recent-recommendations
+        self._recent.extend(reversed(self._get_recent(self.recent_limit)))
+        self._summary = self._get_summary()
+        self._producer = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._producer is None:
+            return
+        self._producer.cancel()
+        try:
+            await self._producer
+        except asyncio.CancelledError:
+            pass
+        self._producer = None
+        self._loop = None
+
+    # ---------- producer side ----------
+
+    def publish(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Thread-safe: called after records are committed to the store.
+        """
+        loop = self._loop
+        if loop is None or not records:
+            return
+        with self._pending_lock:
+            wake = not self._pending
+            self._pending.extend(records)
+        if wake:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            with self._pending_lock:
+                records, self._pending = self._pending, []
+            if records:
+                self._broadcast_update(records)
+
+    def _broadcast_update(self, records: List[Dict[str, Any]]) -> None:
+        self._seq += 1
+        self.updates += 1
+        newest_first = records[::-1]
+        self._recent.extendleft(records)  # extendleft reverses: newest ends up first
+
+        summary = self._get_summary()
+        delta = _summary_delta(self._summary, summary)
+        self._summary = summary
+
+        frame = sse_frame(
+            "update",
+            {"seq": self._seq, "items": newest_first[: self.recent_limit], "summary": delta},
+        )
+        for sub in self._subscribers:
+            self._offer(sub, frame)
+
+    def _offer(self, sub: _Subscriber, frame: bytes) -> None:
+        if sub.needs_resync:
+            return  # its next frame is a snapshot anyway
+        try:
+            sub.queue.put_nowait(frame)
+            self.frames_queued += 1
+        except asyncio.QueueFull:
+            # Backpressure: drop the backlog, resync with a snapshot
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.needs_resync = True
+            sub.queue.put_nowait(b"")  # wake the consumer
+            self.resyncs += 1
+
+    # ---------- subscriber side ----------
+
+    def _snapshot_frame(self) -> bytes:
+        return sse_frame(
+            "snapshot",
+            {"seq": self._seq, "items": list(self._recent), "summary": self._summary},
+        )
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        """
+        SSE byte stream for one client: a "snapshot" first, then "update"
+        frames ({"seq", "items": new records newest first, "summary":
+        changed summary keys}). A "snapshot" can arrive again after the
+        client fell behind; it replaces the client's state.
+        """
+        sub = _Subscriber(self.queue_size)
+        # Snapshot and registration happen in the same loop step, so the
+        # client sees every update after the snapshot exactly once
+        self._subscribers.add(sub)
+        first = self._snapshot_frame()
+        try:
+            yield first
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), _KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if sub.needs_resync:
+                    sub.needs_resync = False
+                    while not sub.queue.empty():
+                        sub.queue.get_nowait()
+                    yield self._snapshot_frame()
+                    continue
+                yield frame
+        finally:
+            self._subscribers.discard(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._producer is not None,
+            "subscribers": len(self._subscribers),
+            "seq": self._seq,
+            "updates": self.updates,
+            "frames_queued": self.frames_queued,
+            "resyncs": self.resyncs,
+            "queue_size": self.queue_size,
+        }
+
+
+def broadcaster_from_env(
+    get_summary: Callable[[], Dict[str, Any]],
+    get_recent: Callable[[int], List[Dict[str, Any]]],
+) -> AdminBroadcaster:
+    try:
+        queue_size = int(os.getenv(ADMIN_STREAM_QUEUE_ENV, "64"))
+    except ValueError:
+        queue_size = 64
+    return AdminBroadcaster(get_summary, get_recent, queue_size=queue_size)
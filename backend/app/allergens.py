@@ -0,0 +1,151 @@
+# backend/app/allergens.py
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from . import products_catalog
+
+
+class AllergenLexicon:
+    """
+    The allergen lexicon compiled into one case-insensitive regex.
+
+    Every lexicon entry (one contraindication) gets a bit. Free-text
+    allergies are parsed once per request into a bitmask of the entries
+    they mention, and products carry the mask of their contraindications,
+    so "is this product unsafe for these allergies" is a single AND.
+
+    Terms match whole words only ("nut" does not match "coconut"),
+    optionally pluralized ("-s", "-es", "-y" -> "-ies"). All terms go
+    into one alternation, longest first, with a named group per entry; a
+    match's lastgroup gives its bit.
+
+    An entry's "compound_terms" also match inside longer words
+    ("fish" in "catfish", "milk" in "buttermilk", "nut" in "chestnut"),
+    the way the old substring checks did, unless the whole word is one of
+    its "compound_exclusions" ("coconut", "nutmeg"). A second pattern
+    finds the words containing any compound term; those few are then
+    checked per entry.
+    """
+
+    # One bit per entry in a uint64 (the numpy backend stores masks so)
+    MAX_ENTRIES = 64
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        if len(entries) > self.MAX_ENTRIES:
+            raise ValueError(f"allergen lexicon supports at most {self.MAX_ENTRIES} entries")
+
+        self.entries = entries
+        self.contraindications: List[str] = [e["contraindication"] for e in entries]
+        self.labels: List[str] = [e.get("label") or e["contraindication"] for e in entries]
+        self._bits: Dict[str, int] = {c: 1 << i for i, c in enumerate(self.contraindications)}
+
+        alternatives = []
+        compound_terms: List[str] = []
+        # (bit index, compound terms, whole words excluded from them)
+        self._compounds: List[Tuple[int, List[str], Optional[Pattern[str]]]] = []
+        for i, entry in enumerate(entries):
+            terms = _clean_terms(entry["terms"])
+            if terms:
+                body = "|".join(_term_pattern(t) for t in terms)
+                alternatives.append(f"(?P<a{i}>{body})")
+            terms = _clean_terms(entry.get("compound_terms") or ())
+            if terms:
+                excluded = _clean_terms(entry.get("compound_exclusions") or ())
+                exclusion = (
+                    re.compile(
+                        "(?:" + "|".join(_term_pattern(t) for t in excluded) + r")(?:e?s)?",
+                        re.IGNORECASE,
+                    )
+                    if excluded
+                    else None
+                )
+                self._compounds.append((i, terms, exclusion))
+                compound_terms.extend(terms)
+        self._pattern = (
+            re.compile(r"\b(?:" + "|".join(alternatives) + r")(?:e?s)?\b", re.IGNORECASE)
+            if alternatives
+            else None
+        )
+        self._compound_pattern = (
+            re.compile(
+                r"\w*(?:" + "|".join(re.escape(t) for t in _clean_terms(compound_terms)) + r")\w*",
+                re.IGNORECASE,
+            )
+            if compound_terms
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def parse(self, text: Optional[str]) -> int:
+        """
+        Bitmask of the lexicon entries mentioned in a free-text answer.
+        """
+        if not text:
+            return 0
+        mask = 0
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                mask |= 1 << int(match.lastgroup[1:])
+        if self._compound_pattern is not None:
+            for match in self._compound_pattern.finditer(text):
+                word = match.group().lower()
+                for i, terms, exclusion in self._compounds:
+                    if any(t in word for t in terms) and not (
+                        exclusion is not None and exclusion.fullmatch(word)
+                    ):
+                        mask |= 1 << i
+        return mask
+
+    def mask_of(self, contraindications: Iterable[str]) -> int:
+        """
+        Bitmask of a product's contraindications; ones that are not in the
+        lexicon can never be triggered and are left out.
+        """
+        mask = 0
+        for contra in contraindications:
+            mask |= self._bits.get(contra, 0)
+        return mask
+
+    def names(self, mask: int) -> List[str]:
+        return [c for i, c in enumerate(self.contraindications) if mask >> i & 1]
+
+    def first_label(self, mask: int) -> Optional[str]:
+        """
+        Label of the lowest set bit, i.e. the first matching lexicon entry.
+        """
+        if not mask:
+            return None
+        return self.labels[(mask & -mask).bit_length() - 1]
+
+
+def _clean_terms(terms: Iterable[str]) -> List[str]:
+    return sorted({t.strip().lower() for t in terms if t.strip()}, key=len, reverse=True)
+
+
+def _term_pattern(term: str) -> str:
+    # "omega-3" also matches "omega 3" / "omega3", "fish oil" "fish-oil"
+    pattern = r"[\s\-]?".join(re.escape(part) for part in re.split(r"[\s\-]+", term))
+    if re.search(r"[^aeiouy\W]y$", term):
+        # "anchovy" -> "anchovie" + the "s" suffix, i.e. "anchovies"
+        pattern = pattern[:-1] + "(?:y|ie)"
+    return pattern
+
+
+_LEXICON: Optional[AllergenLexicon] = None
+_LEXICON_SOURCE: Optional[List[Dict[str, Any]]] = None
+
+
+def get_allergen_lexicon() -> AllergenLexicon:
+    """
+    The compiled products_catalog.ALLERGEN_LEXICON, recompiled if the list
+    is replaced (same convention as get_catalog_index).
+    """
+    global _LEXICON, _LEXICON_SOURCE
+    source = products_catalog.ALLERGEN_LEXICON
+    if _LEXICON is None or source is not _LEXICON_SOURCE:
+        _LEXICON = AllergenLexicon(source)
+        _LEXICON_SOURCE = source
+    return _LEXICON
@@ -0,0 +1,1170 @@
+# backend/app/analytics_backends.py
+
+import copy
+import itertools
+import json
+import math
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .quiz_schema import get_quiz_questions
+
+
+# "memory" (default, last N records) or "sqlite" (durable history)
+ANALYTICS_BACKEND_ENV = "NUTRIGUIDE_ANALYTICS_BACKEND"
+ANALYTICS_MEMORY_CAPACITY_ENV = "NUTRIGUIDE_ANALYTICS_MEMORY_CAPACITY"
+ANALYTICS_DB_ENV = "NUTRIGUIDE_ANALYTICS_DB"
+ANALYTICS_RETENTION_DAYS_ENV = "NUTRIGUIDE_ANALYTICS_RETENTION_DAYS"
+ANALYTICS_MAX_ROWS_ENV = "NUTRIGUIDE_ANALYTICS_MAX_ROWS"
+
+_DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "analytics.sqlite3",
+)
+
+
+def empty_aggregates() -> Dict[str, Any]:
+    """
+    Raw sums / counts behind get_segments_summary. Backends produce these;
+    analytics_store turns them into averages and shares.
+    """
+    return {
+        "total": 0,
+        "by_profile_type": Counter(),
+        "by_age_group": Counter(),
+        "product_counts": Counter(),
+        "risk_counts": Counter(),
+        "bundle_price_sum": 0.0,
+        "bundle_price_n": 0,
+        "sub_price_sum": 0.0,
+        "sub_price_n": 0,
+        "num_products_sum": 0,
+    }
+
+
+# Record fields that hold lists of strings
+_LIST_COLUMNS = ("goals", "lifestyle", "diet", "products", "upsell")
+
+# Column order of iter_column_batches (columnar exports)
+EXPORT_COLUMNS = (
+    "timestamp",
+    "profile_type",
+    "age_group",
+    "goals",
+    "lifestyle",
+    "diet",
+    "allergies",
+    "products",
+    "upsell",
+    "bundle_price",
+    "bundle_price_subscription",
+    "risk_score",
+    "risk_label",
+)
+
+# Categorical fields counted in the aggregates: record field -> aggregate key
+_COUNTED_FIELDS = (
+    ("profile_type", "by_profile_type"),
+    ("age_group", "by_age_group"),
+    ("risk_label", "risk_counts"),
+)
+
+
+def _price_micros(value: Any) -> Optional[int]:
+    if isinstance(value, (int, float)) and value == value:
+        return round(value * 1_000_000)
+    return None
+
+
+class RunningAggregates:
+    """
+    The aggregates of a changing set of records, kept up to date as records
+    are added and evicted so reading them never rescans the history.
+
+    Price sums are kept in integer millionths, so adding and later removing
+    the same record leaves them exactly where they were (float sums would
+    drift over millions of updates). Counts that drop to zero are removed,
+    so a snapshot matches a full recompute key for key.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.counters = {key: Counter() for _, key in _COUNTED_FIELDS}
+        self.product_counts: Counter = Counter()
+        self.num_products_sum = 0
+        self.bundle_price_micros = 0
+        self.bundle_price_n = 0
+        self.sub_price_micros = 0
+        self.sub_price_n = 0
+
+    def update(self, rec: Dict[str, Any], sign: int = 1) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) one record.
+        """
+        self.total += sign
+        for field, key in _COUNTED_FIELDS:
+            value = rec.get(field)
+            if value:
+                self._bump(self.counters[key], value, sign)
+
+        products = rec.get("products") or []
+        self.num_products_sum += sign * len(products)
+        for product in products:
+            self._bump(self.product_counts, product, sign)
+
+        bundle = _price_micros(rec.get("bundle_price"))
+        if bundle is not None:
+            self.bundle_price_micros += sign * bundle
+            self.bundle_price_n += sign
+        sub = _price_micros(rec.get("bundle_price_subscription"))
+        if sub is not None:
+            self.sub_price_micros += sign * sub
+            self.sub_price_n += sign
+
+    def relabel(self, field: str, old: Any, new: Any) -> None:
+        """
+        Move one record's count from `old` to `new` in the counter of a
+        counted field (e.g. risk_label after re-scoring).
+        """
+        counter = self.counters[dict(_COUNTED_FIELDS)[field]]
+        if old:
+            self._bump(counter, old, -1)
+        if new:
+            self._bump(counter, new, 1)
+
+    @staticmethod
+    def _bump(counter: Counter, key: Any, sign: int) -> None:
+        n = counter[key] + sign
+        if n:
+            counter[key] = n
+        else:
+            del counter[key]
+
+    def merge(self, other: "RunningAggregates") -> None:
+        """
+        Add another set of aggregates into this one (e.g. rollup buckets).
+        """
+        self.total += other.total
+        for _, key in _COUNTED_FIELDS:
+            self.counters[key].update(other.counters[key])
+        self.product_counts.update(other.product_counts)
+        self.num_products_sum += other.num_products_sum
+        self.bundle_price_micros += other.bundle_price_micros
+        self.bundle_price_n += other.bundle_price_n
+        self.sub_price_micros += other.sub_price_micros
+        self.sub_price_n += other.sub_price_n
+
+    @classmethod
+    def from_aggregates(cls, agg: Dict[str, Any]) -> "RunningAggregates":
+        """
+        Seed from an existing aggregates dict (e.g. one SQL scan at startup).
+        """
+        running = cls()
+        running.total = agg["total"]
+        for _, key in _COUNTED_FIELDS:
+            running.counters[key] = Counter({k: n for k, n in agg[key].items() if n})
+        running.product_counts = Counter({k: n for k, n in agg["product_counts"].items() if n})
+        running.num_products_sum = agg["num_products_sum"]
+        running.bundle_price_micros = round(agg["bundle_price_sum"] * 1_000_000)
+        running.bundle_price_n = agg["bundle_price_n"]
+        running.sub_price_micros = round(agg["sub_price_sum"] * 1_000_000)
+        running.sub_price_n = agg["sub_price_n"]
+        return running
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copy in the empty_aggregates() shape. Cost depends on the number of
+        distinct categories / products, not on the number of records.
+        """
+        agg = empty_aggregates()
+        agg["total"] = self.total
+        for _, key in _COUNTED_FIELDS:
+            agg[key] = Counter(self.counters[key])
+        agg["product_counts"] = Counter(self.product_counts)
+        agg["num_products_sum"] = self.num_products_sum
+        agg["bundle_price_sum"] = self.bundle_price_micros / 1_000_000
+        agg["bundle_price_n"] = self.bundle_price_n
+        agg["sub_price_sum"] = self.sub_price_micros / 1_000_000
+        agg["sub_price_n"] = self.sub_price_n
+        return agg
+
+
+def aggregate_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Full recompute of the aggregates by scanning a list of records.
+    Reference for checking the running aggregates; not used per request.
+    Prices are summed with math.fsum (correctly rounded), which is what the
+    integer running sums reproduce.
+    """
+    agg = empty_aggregates()
+    bundle_prices: List[float] = []
+    sub_prices: List[float] = []
+    for rec in records:
+        agg["total"] += 1
+        for field, key in _COUNTED_FIELDS:
+            if rec.get(field):
+                agg[key][rec[field]] += 1
+        products = rec.get("products") or []
+        agg["num_products_sum"] += len(products)
+        agg["product_counts"].update(products)
+        if _price_micros(rec.get("bundle_price")) is not None:
+            bundle_prices.append(rec["bundle_price"])
+        if _price_micros(rec.get("bundle_price_subscription")) is not None:
+            sub_prices.append(rec["bundle_price_subscription"])
+
+    agg["bundle_price_sum"] = math.fsum(bundle_prices)
+    agg["bundle_price_n"] = len(bundle_prices)
+    agg["sub_price_sum"] = math.fsum(sub_prices)
+    agg["sub_price_n"] = len(sub_prices)
+    return agg
+
+
+# score(column batch) -> (risk scores, risk labels), see rescore_risk
+RiskScorer = Callable[[Dict[str, List[Any]]], Tuple[List[int], List[str]]]
+# (timestamp, old risk_label, new risk_label)
+RiskRelabel = Tuple[str, Optional[str], str]
+
+
+class AnalyticsBackend(ABC):
+    """
+    Storage interface behind analytics_store. A backend missing any
+    abstract method fails when it is constructed, not later in the
+    writer or re-scoring thread.
+    """
+
+    @abstractmethod
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        ...
+
+    @abstractmethod
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Most recent `limit` records, newest first.
+        """
+
+    @abstractmethod
+    def records_since(self, timestamp: str) -> Iterable[Dict[str, Any]]:
+        """
+        Stored records with timestamp >= `timestamp` (ISO), oldest first.
+        Used to seed the time-bucketed rollups at startup.
+        """
+
+    @abstractmethod
+    def iter_batches(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        profile_types: Optional[List[str]] = None,
+        risk_labels: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Matching records, newest first, in lists of up to batch_size (for
+        exports). since is inclusive, until exclusive (ISO timestamps).
+        """
+
+    @abstractmethod
+    def iter_column_batches(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        profile_types: Optional[List[str]] = None,
+        risk_labels: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 10_000,
+    ) -> Iterator[Dict[str, List[Any]]]:
+        """
+        Same records as iter_batches, but each batch is column name ->
+        list of values (EXPORT_COLUMNS order), for columnar exports.
+        """
+
+    @abstractmethod
+    def aggregates(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def top_segments(self, limit: int) -> List[Tuple[Tuple[Any, ...], int]]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def risk_model_version(self) -> Optional[str]:
+        """
+        Version of the churn model that last re-scored every record
+        (rescore_risk), or None.
+        """
+
+    @abstractmethod
+    def rescore_risk(
+        self,
+        score: RiskScorer,
+        version: str,
+        on_relabel: Optional[Callable[[List[RiskRelabel]], None]] = None,
+        batch_size: int = 10_000,
+    ) -> int:
+        """
+        Recompute risk_score / risk_label of every stored record, one
+        column batch (EXPORT_COLUMNS) at a time: score(batch) returns
+        (scores, labels) for the whole batch as plain int / str lists.
+        The running risk counts follow, and on_relabel gets the
+        (timestamp, old, new) label changes of each batch. Records the
+        version afterwards; returns the number of records scored.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class Interner:
+    """
+    Maps hashable values to small ints and back. Append-only.
+    """
+
+    def __init__(self):
+        self._ids: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    def id(self, value: Any) -> int:
+        i = self._ids.get(value)
+        if i is None:
+            i = len(self.values)
+            self._ids[value] = i
+            self.values.append(value)
+        return i
+
+    def find(self, value: Any) -> Optional[int]:
+        """
+        Id of an already interned value, without interning it.
+        """
+        return self._ids.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+_NAN = float("nan")
+
+# RingBufferBackend: quiz columns that only intern option ids, and the
+# id marking a value kept as is in `raw`
+_QUIZ_COLUMNS = ("profile_type", "age_group", "goals", "lifestyle", "diet")
+_RAW = -1
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+def _iso_to_epoch(timestamp: Optional[str]) -> float:
+    if not timestamp:
+        return _NAN
+    return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _epoch_to_iso(ts: float) -> Optional[str]:
+    if ts != ts:  # NaN
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat(
+        timespec="seconds"
+    )
+
+
+class RingBufferBackend(AnalyticsBackend):
+    """
+    Fixed-capacity, columnar in-memory store of the most recent records.
+
+    Every field lives in a preallocated column:
+    - categories (profile_type, age_group, risk_label) are interned to
+      int ids
+    - list fields (goals, lifestyle, diet, products, upsell) are interned
+      as whole tuples, so one int per record (bundles repeat a lot)
+    - prices are float columns (NaN = missing), risk_score a short
+      column (-1 = missing), timestamps epoch seconds
+    - the free-text allergies answer is kept as is in a plain list, so
+      it is freed when its slot is overwritten
+
+    Append and eviction are O(1): the oldest slot is simply overwritten,
+    and its fields are subtracted from the running aggregates, so
+    aggregates() is O(1) in the number of records too.
+
+    Interners only grow, so only values with a bounded number of
+    distinct forms go through them: quiz option ids (lists of them
+    without repeats), product names and risk labels. The quiz fields
+    are client input, so anything else sent there is kept as is in
+    `raw`, keyed by (column, slot), and dropped when the slot is
+    overwritten.
+    """
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = max(1, capacity)
+        self._lock = threading.Lock()
+        self._start = 0  # slot of the oldest record
+        self._size = 0
+
+        self.strings = Interner()  # None is id 0
+        self.strings.id(None)
+        self.tuples = Interner()  # () is id 0
+        self.tuples.id(())
+        # Quiz column -> option ids it may intern
+        self.options: Dict[str, frozenset] = {
+            q.id: frozenset(o.id for o in q.options)
+            for q in get_quiz_questions()
+            if q.id in _QUIZ_COLUMNS and q.options
+        }
+        # (column, slot) -> value stored as is (id _RAW in the column)
+        self.raw: Dict[Tuple[str, int], Any] = {}
+
+        n = self.capacity
+        self.ts = array("d", [_NAN]) * n
+        self.profile_type = array("i", [0]) * n
+        self.age_group = array("i", [0]) * n
+        self.allergies: List[Optional[str]] = [None] * n
+        self.risk_label = array("i", [0]) * n
+        self.risk_score = array("h", [-1]) * n
+        self.bundle_price = array("d", [_NAN]) * n
+        self.sub_price = array("d", [_NAN]) * n
+        self.lists = {col: array("i", [0]) * n for col in _LIST_COLUMNS}
+        self._running = RunningAggregates()
+        self._risk_model_version: Optional[str] = None
+
+    def _intern_tuple(self, values) -> int:
+        return self.tuples.id(tuple(self.strings.id(v) for v in values or ()))
+
+    def _store_category(self, col: str, column: array, slot: int, value: Any) -> None:
+        options = self.options.get(col)
+        if options is None or value is None or value in options:
+            column[slot] = self.strings.id(value)
+            self.raw.pop((col, slot), None)
+        else:
+            column[slot] = _RAW
+            self.raw[(col, slot)] = value
+
+    def _store_list(self, col: str, slot: int, values: Any) -> None:
+        options = self.options.get(col)
+        values = values or ()
+        if options is None or (
+            len(set(values)) == len(values) and all(v in options for v in values)
+        ):
+            self.lists[col][slot] = self._intern_tuple(values)
+            self.raw.pop((col, slot), None)
+        else:
+            self.lists[col][slot] = _RAW
+            self.raw[(col, slot)] = tuple(values)
+
+    def _category(self, col: str, slot: int) -> Any:
+        i = getattr(self, col)[slot]
+        return self.raw[(col, slot)] if i == _RAW else self.strings.values[i]
+
+    def _list(self, col: str, slot: int) -> List[Any]:
+        i = self.lists[col][slot]
+        return list(self.raw[(col, slot)]) if i == _RAW else self._decode_list(i)
+
+    def _segment_part(self, col: str, i: int, slot: int) -> Any:
+        # Counter key for top_segments: the id, or the raw value itself
+        return (self.raw[(col, slot)],) if i == _RAW else i
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        strings = self.strings
+        with self._lock:
+            for rec in records:
+                if self._size < self.capacity:
+                    slot = (self._start + self._size) % self.capacity
+                    self._size += 1
+                else:
+                    # Full: overwrite the oldest slot
+                    slot = self._start
+                    self._start = (self._start + 1) % self.capacity
+                    self._running.update(self._aggregate_fields(slot), -1)
+                self._running.update(rec)
+
+                self.ts[slot] = _iso_to_epoch(rec.get("timestamp"))
+                self._store_category("profile_type", self.profile_type, slot, rec.get("profile_type"))
+                self._store_category("age_group", self.age_group, slot, rec.get("age_group"))
+                self.allergies[slot] = rec.get("allergies")
+                self.risk_label[slot] = strings.id(rec.get("risk_label"))
+                score = rec.get("risk_score")
+                self.risk_score[slot] = score if isinstance(score, int) else -1
+                bp = rec.get("bundle_price")
+                bsp = rec.get("bundle_price_subscription")
+                self.bundle_price[slot] = float(bp) if isinstance(bp, (int, float)) else _NAN
+                self.sub_price[slot] = float(bsp) if isinstance(bsp, (int, float)) else _NAN
+                for col in _LIST_COLUMNS:
+                    self._store_list(col, slot, rec.get(col))
+
+    def _slots(self) -> List[int]:
+        """
+        Occupied slots, oldest first (call with the lock held).
+        """
+        return [(self._start + i) % self.capacity for i in range(self._size)]
+
+    def _decode_list(self, tuple_id: int) -> List[Any]:
+        values = self.strings.values
+        return [values[i] for i in self.tuples.values[tuple_id]]
+
+    def _aggregate_fields(self, slot: int) -> Dict[str, Any]:
+        """
+        The fields RunningAggregates reads, for the record in `slot`.
+        """
+        values = self.strings.values
+        return {
+            "profile_type": self._category("profile_type", slot),
+            "age_group": self._category("age_group", slot),
+            "risk_label": values[self.risk_label[slot]],
+            "products": self._list("products", slot),
+            "bundle_price": self.bundle_price[slot],
+            "bundle_price_subscription": self.sub_price[slot],
+        }
+
+    def _decode(self, slot: int) -> Dict[str, Any]:
+        values = self.strings.values
+        bp = self.bundle_price[slot]
+        bsp = self.sub_price[slot]
+        score = self.risk_score[slot]
+        return {
+            "timestamp": _epoch_to_iso(self.ts[slot]),
+            "profile_type": self._category("profile_type", slot),
+            "age_group": self._category("age_group", slot),
+            "goals": self._list("goals", slot),
+            "lifestyle": self._list("lifestyle", slot),
+            "diet": self._list("diet", slot),
+            "allergies": self.allergies[slot],
+            "products": self._list("products", slot),
+            "upsell": self._list("upsell", slot),
+            "bundle_price": None if bp != bp else bp,
+            "bundle_price_subscription": None if bsp != bsp else bsp,
+            "risk_score": None if score < 0 else score,
+            "risk_label": values[self.risk_label[slot]],
+        }
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            slots = self._slots()[-limit:] if limit > 0 else []
+            return [self._decode(slot) for slot in reversed(slots)]
+
+    def records_since(self, timestamp: str) -> Iterable[Dict[str, Any]]:
+        cutoff = _iso_to_epoch(timestamp)
+        with self._lock:
+            return [self._decode(slot) for slot in self._slots() if self.ts[slot] >= cutoff]
+
+    def _frozen_copy(self) -> "RingBufferBackend":
+        """
+        Copy of the columns (call with the lock held) that can be decoded
+        without the lock while new records keep overwriting slots. The
+        interners are shared: they only grow, so ids stay valid.
+        """
+        view = copy.copy(self)
+        for name in ("ts", "profile_type", "age_group", "allergies", "risk_label",
+                     "risk_score", "bundle_price", "sub_price"):
+            setattr(view, name, getattr(self, name)[:])
+        view.lists = {col: column[:] for col, column in self.lists.items()}
+        view.raw = dict(self.raw)
+        return view
+
+    def _matching_slots(
+        self,
+        since: Optional[str],
+        until: Optional[str],
+        profile_types: Optional[List[str]],
+        risk_labels: Optional[List[str]],
+        limit: Optional[int],
+    ) -> Iterator[int]:
+        """
+        Slots (newest first) passing the export filters. Meant to be called
+        on a _frozen_copy().
+        """
+        lo = _iso_to_epoch(since) if since else None
+        hi = _iso_to_epoch(until) if until else None
+        profile_ids = {self.strings.find(p) for p in profile_types} if profile_types else None
+        risk_ids = {self.strings.find(r) for r in risk_labels} if risk_labels else None
+        raw = self.raw
+
+        matched = 0
+        for slot in reversed(self._slots()):
+            if limit is not None and matched >= limit:
+                return
+            ts = self.ts[slot]
+            if (lo is not None and not ts >= lo) or (hi is not None and not ts < hi):
+                continue
+            if profile_ids is not None and self.profile_type[slot] not in profile_ids and (
+                self.profile_type[slot] != _RAW or raw[("profile_type", slot)] not in profile_types
+            ):
+                continue
+            if risk_ids is not None and self.risk_label[slot] not in risk_ids:
+                continue
+            matched += 1
+            yield slot
+
+    def iter_batches(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        profile_types: Optional[List[str]] = None,
+        risk_labels: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        with self._lock:
+            view = self._frozen_copy()
+
+        batch: List[Dict[str, Any]] = []
+        for slot in view._matching_slots(since, until, profile_types, risk_labels, limit):
+            batch.append(view._decode(slot))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_column_batches(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        profile_types: Optional[List[str]] = None,
+        risk_labels: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 10_000,
+    ) -> Iterator[Dict[str, List[Any]]]:
+        with self._lock:
+            view = self._frozen_copy()
+
+        values = view.strings.values
+        slots = view._matching_slots(since, until, profile_types, risk_labels, limit)
+        while True:
+            chunk = list(itertools.islice(slots, batch_size))
+            if not chunk:
+                return
+            batch: Dict[str, List[Any]] = {
+                "timestamp": [_epoch_to_iso(view.ts[s]) for s in chunk],
+                "profile_type": [view._category("profile_type", s) for s in chunk],
+                "age_group": [view._category("age_group", s) for s in chunk],
+                "allergies": [view.allergies[s] for s in chunk],
+                "bundle_price": [_nan_to_none(view.bundle_price[s]) for s in chunk],
+                "bundle_price_subscription": [_nan_to_none(view.sub_price[s]) for s in chunk],
+                "risk_score": [
+                    view.risk_score[s] if view.risk_score[s] >= 0 else None for s in chunk
+                ],
+                "risk_label": [values[view.risk_label[s]] for s in chunk],
+            }
+            for col in view.lists:
+                batch[col] = [view._list(col, s) for s in chunk]
+            yield {col: batch[col] for col in EXPORT_COLUMNS}
+
+    def aggregates(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._running.snapshot()
+
+    def top_segments(self, limit: int) -> List[Tuple[Tuple[Any, ...], int]]:
+        lists = self.lists
+        part = self._segment_part
+        with self._lock:
+            counts = Counter(
+                (
+                    part("profile_type", self.profile_type[s], s),
+                    part("age_group", self.age_group[s], s),
+                    part("goals", lists["goals"][s], s),
+                    part("lifestyle", lists["lifestyle"][s], s),
+                    part("diet", lists["diet"][s], s),
+                    self.allergies[s],
+                )
+                for s in self._slots()
+            )
+
+        values = self.strings.values
+
+        def category(key):
+            return key[0] if isinstance(key, tuple) else values[key]
+
+        def items(key):
+            return key[0] if isinstance(key, tuple) else tuple(self._decode_list(key))
+
+        return [
+            (
+                (
+                    category(profile),
+                    category(age),
+                    items(goals),
+                    items(lifestyle),
+                    items(diet),
+                    allergies,
+                ),
+                n,
+            )
+            for (profile, age, goals, lifestyle, diet, allergies), n
+            in counts.most_common(limit)
+        ]
+
+    def count(self) -> int:
+        return self._size
+
+    def risk_model_version(self) -> Optional[str]:
+        return self._risk_model_version
+
+    def rescore_risk(
+        self,
+        score: RiskScorer,
+        version: str,
+        on_relabel: Optional[Callable[[List[RiskRelabel]], None]] = None,
+        batch_size: int = 10_000,
+    ) -> int:
+        # Under the lock, a batch at a time: scoring is vectorized, so the
+        # lock is only held for a few ms per batch. Slots overwritten since
+        # the start hold records scored by the new model already; skip them.
+        strings = self.strings
+        values = strings.values
+        with self._lock:
+            slots = self._slots()
+            stamps = [self.ts[s] for s in slots]
+
+        scored = 0
+        for start in range(0, len(slots), batch_size):
+            with self._lock:
+                chunk = [
+                    slot
+                    for slot, ts in zip(slots[start : start + batch_size], stamps[start : start + batch_size])
+                    if self.ts[slot] == ts
+                ]
+                if not chunk:
+                    continue
+                batch = {
+                    "timestamp": [_epoch_to_iso(self.ts[s]) for s in chunk],
+                    "profile_type": [self._category("profile_type", s) for s in chunk],
+                    "age_group": [self._category("age_group", s) for s in chunk],
+                    "allergies": [self.allergies[s] for s in chunk],
+                    "bundle_price": [_nan_to_none(self.bundle_price[s]) for s in chunk],
+                    "bundle_price_subscription": [_nan_to_none(self.sub_price[s]) for s in chunk],
+                }
+                for col in self.lists:
+                    batch[col] = [self._list(col, s) for s in chunk]
+                scores, labels = score(batch)
+
+                relabeled: List[RiskRelabel] = []
+                for slot, ts, new_score, new_label in zip(chunk, batch["timestamp"], scores, labels):
+                    old_label = values[self.risk_label[slot]]
+                    self.risk_score[slot] = new_score
+                    self.risk_label[slot] = strings.id(new_label)
+                    if old_label != new_label:
+                        self._running.relabel("risk_label", old_label, new_label)
+                        relabeled.append((ts, old_label, new_label))
+            if on_relabel is not None and relabeled:
+                on_relabel(relabeled)
+            scored += len(chunk)
+        self._risk_model_version = version
+        return scored
+
+
+# SQLite table columns (same order as the columnar exports)
+_COLUMNS = EXPORT_COLUMNS
+_INSERT_SQL = (
+    f"INSERT INTO recommendations ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+)
+_SELECT_SQL = f"SELECT {', '.join(_COLUMNS)} FROM recommendations"
+# Keyset-paginated scan for rescore_risk
+_RESCORE_SQL = (
+    f"SELECT id, {', '.join(_COLUMNS)} FROM recommendations WHERE id > ? ORDER BY id LIMIT ?"
+)
+# Columns RunningAggregates reads, in _delete_where's RETURNING order
+_AGGREGATE_COLUMNS = (
+    "profile_type",
+    "age_group",
+    "risk_label",
+    "products",
+    "bundle_price",
+    "bundle_price_subscription",
+)
+
+
+class SQLiteBackend(AnalyticsBackend):
+    """
+    Durable history in a SQLite file (WAL mode).
+
+    - Batches are written with one executemany() in one transaction
+    - One long-lived writer connection; readers get a per-thread
+      connection, so WAL lets them run alongside the writer
+    - Fixed SQL strings, so sqlite3's statement cache reuses the
+      prepared statements
+    - Retention: rows older than retention_days and/or beyond max_rows
+      are deleted after each batch
+    - aggregates() reads running totals: one SQL scan when the file is
+      opened, then updated for every inserted and every retention-deleted
+      row. They only see writes made through this backend, so point one
+      process at a given file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention_days: Optional[float] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.path = path
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = self._connect()
+
+        self._writer.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS recommendations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                profile_type TEXT,
+                age_group TEXT,
+                goals TEXT,
+                lifestyle TEXT,
+                diet TEXT,
+                allergies TEXT,
+                products TEXT,
+                upsell TEXT,
+                bundle_price REAL,
+                bundle_price_subscription REAL,
+                risk_score INTEGER,
+                risk_label TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_rec_timestamp ON recommendations(timestamp);
+            CREATE INDEX IF NOT EXISTS idx_rec_profile_type ON recommendations(profile_type);
+            CREATE INDEX IF NOT EXISTS idx_rec_age_group ON recommendations(age_group);
+            CREATE INDEX IF NOT EXISTS idx_rec_risk_label ON recommendations(risk_label);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        self._running = RunningAggregates.from_aggregates(self._scan_aggregates(self._writer))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        if self.path == ":memory:":
+            # A second connection would see a different in-memory database
+            return self._writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_row(rec: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(
+            json.dumps(rec.get(col) or []) if col in _LIST_COLUMNS else rec.get(col)
+            for col in _COLUMNS
+        )
+
+    @staticmethod
+    def _from_row(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        rec = dict(zip(_COLUMNS, row))
+        for col in _LIST_COLUMNS:
+            rec[col] = json.loads(rec[col]) if rec[col] else []
+        return rec
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        rows = [self._to_row(rec) for rec in records]
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_INSERT_SQL, rows)
+                evicted = self._apply_retention(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            # Only touch the running totals once the transaction is durable
+            for rec in records:
+                self._running.update(rec)
+            for rec in evicted:
+                self._running.update(rec, -1)
+
+    def _apply_retention(self, conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+        """
+        Delete expired / excess rows and return their aggregate fields.
+        """
+        evicted: List[Dict[str, Any]] = []
+        if self.retention_days:
+            cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+                days=self.retention_days
+            )
+            evicted += self._delete_where(
+                conn, "timestamp < ?", (cutoff.isoformat(timespec="seconds"),)
+            )
+        if self.max_rows:
+            evicted += self._delete_where(
+                conn, "id <= (SELECT MAX(id) FROM recommendations) - ?", (self.max_rows,)
+            )
+        return evicted
+
+    @staticmethod
+    def _delete_where(
+        conn: sqlite3.Connection, where: str, params: Tuple[Any, ...]
+    ) -> List[Dict[str, Any]]:
+        rows = conn.execute(
+            f"DELETE FROM recommendations WHERE {where} RETURNING {', '.join(_AGGREGATE_COLUMNS)}",
+            params,
+        ).fetchall()
+        evicted = [dict(zip(_AGGREGATE_COLUMNS, row)) for row in rows]
+        for rec in evicted:
+            rec["products"] = json.loads(rec["products"]) if rec["products"] else []
+        return evicted
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        rows = self._reader().execute(
+            f"{_SELECT_SQL} ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def records_since(self, timestamp: str) -> Iterable[Dict[str, Any]]:
+        cursor = self._reader().execute(
+            f"{_SELECT_SQL} WHERE timestamp >= ? ORDER BY id", (timestamp,)
+        )
+        return (self._from_row(row) for row in cursor)
+
+    @staticmethod
+    def _export_query(
+        since: Optional[str],
+        until: Optional[str],
+        profile_types: Optional[List[str]],
+        risk_labels: Optional[List[str]],
+        limit: Optional[int],
+    ) -> Tuple[str, List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        if since:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            where.append("timestamp < ?")
+            params.append(until)
+        for column, values in (("profile_type", profile_types), ("risk_label", risk_labels)):
+            if values:
+                where.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+
+        sql = _SELECT_SQL
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def _iter_rows(self, sql: str, params: List[Any], batch_size: int) -> Iterator[List[tuple]]:
+        # A connection of its own: the export may be consumed from several
+        # threadpool threads and outlive any single request's reader
+        conn = self._writer if self.path == ":memory:" else self._connect()
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            if conn is not self._writer:
+                conn.close()
+
+    def iter_batches(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        profile_types: Optional[List[str]] = None,
+        risk_labels: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        sql, params = self._export_query(since, until, profile_types, risk_labels, limit)
+        for rows in self._iter_rows(sql, params, batch_size):
+            yield [self._from_row(row) for row in rows]
+
+    def iter_column_batches(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        profile_types: Optional[List[str]] = None,
+        risk_labels: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 10_000,
+    ) -> Iterator[Dict[str, List[Any]]]:
+        sql, params = self._export_query(since, until, profile_types, risk_labels, limit)
+        loads = json.loads
+        for rows in self._iter_rows(sql, params, batch_size):
+            columns = dict(zip(_COLUMNS, map(list, zip(*rows))))
+            for col in _LIST_COLUMNS:
+                columns[col] = [loads(v) if v else [] for v in columns[col]]
+            yield {col: columns[col] for col in EXPORT_COLUMNS}
+
+    def aggregates(self) -> Dict[str, Any]:
+        with self._write_lock:
+            return self._running.snapshot()
+
+    @staticmethod
+    def _scan_aggregates(conn: sqlite3.Connection) -> Dict[str, Any]:
+        agg = empty_aggregates()
+
+        (
+            agg["total"],
+            bundle_sum,
+            agg["bundle_price_n"],
+            sub_sum,
+            agg["sub_price_n"],
+            num_products_sum,
+        ) = conn.execute(
+            "SELECT COUNT(*), SUM(bundle_price), COUNT(bundle_price), "
+            "SUM(bundle_price_subscription), COUNT(bundle_price_subscription), "
+            "SUM(json_array_length(products)) FROM recommendations"
+        ).fetchone()
+        agg["bundle_price_sum"] = bundle_sum or 0.0
+        agg["sub_price_sum"] = sub_sum or 0.0
+        agg["num_products_sum"] = num_products_sum or 0
+
+        for column, key in (
+            ("profile_type", "by_profile_type"),
+            ("age_group", "by_age_group"),
+            ("risk_label", "risk_counts"),
+        ):
+            for value, n in conn.execute(
+                f"SELECT {column}, COUNT(*) FROM recommendations "
+                f"WHERE {column} IS NOT NULL AND {column} != '' GROUP BY {column}"
+            ):
+                agg[key][value] = n
+
+        for product, n in conn.execute(
+            "SELECT j.value, COUNT(*) FROM recommendations, json_each(recommendations.products) AS j "
+            "GROUP BY j.value"
+        ):
+            agg["product_counts"][product] = n
+        return agg
+
+    def top_segments(self, limit: int) -> List[Tuple[Tuple[Any, ...], int]]:
+        rows = self._reader().execute(
+            "SELECT profile_type, age_group, goals, lifestyle, diet, allergies, COUNT(*) AS n "
+            "FROM recommendations "
+            "GROUP BY profile_type, age_group, goals, lifestyle, diet, allergies "
+            "ORDER BY n DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            (
+                (
+                    profile_type,
+                    age_group,
+                    tuple(json.loads(goals or "[]")),
+                    tuple(json.loads(lifestyle or "[]")),
+                    tuple(json.loads(diet or "[]")),
+                    allergies,
+                ),
+                n,
+            )
+            for profile_type, age_group, goals, lifestyle, diet, allergies, n in rows
+        ]
+
+    def count(self) -> int:
+        return self._running.total
+
+    def risk_model_version(self) -> Optional[str]:
+        row = self._reader().execute(
+            "SELECT value FROM meta WHERE key = 'risk_model_version'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def rescore_risk(
+        self,
+        score: RiskScorer,
+        version: str,
+        on_relabel: Optional[Callable[[List[RiskRelabel]], None]] = None,
+        batch_size: int = 10_000,
+    ) -> int:
+        # Keyset pagination by id; each batch is read, scored and updated
+        # in one write transaction, so retention can't delete rows between
+        # the read and the running-count update
+        loads = json.loads
+        last_id = 0
+        scored = 0
+        while True:
+            with self._write_lock:
+                conn = self._writer
+                conn.execute("BEGIN")
+                try:
+                    rows = conn.execute(_RESCORE_SQL, (last_id, batch_size)).fetchall()
+                    if not rows:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO meta (key, value) VALUES ('risk_model_version', ?)",
+                            (version,),
+                        )
+                        conn.execute("COMMIT")
+                        return scored
+                    ids, *values = map(list, zip(*rows))
+                    batch = dict(zip(_COLUMNS, values))
+                    for col in _LIST_COLUMNS:
+                        batch[col] = [loads(v) if v else [] for v in batch[col]]
+                    scores, labels = score(batch)
+                    conn.executemany(
+                        "UPDATE recommendations SET risk_score = ?, risk_label = ? WHERE id = ?",
+                        zip(scores, labels, ids),
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+                relabeled: List[RiskRelabel] = [
+                    (ts, old, new)
+                    for ts, old, new in zip(batch["timestamp"], batch["risk_label"], labels)
+                    if old != new
+                ]
+                for _, old, new in relabeled:
+                    self._running.relabel("risk_label", old, new)
+            if on_relabel is not None and relabeled:
+                on_relabel(relabeled)
+            last_id = ids[-1]
+            scored += len(ids)
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._writer.close()
+
+
+def _env_optional_number(name: str) -> Optional[float]:
+    raw = os.getenv(name)
+    try:
+        return float(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def backend_from_env(max_recent: int) -> AnalyticsBackend:
+    """
+    Pick the storage backend from NUTRIGUIDE_ANALYTICS_BACKEND.
+    """
+    kind = os.getenv(ANALYTICS_BACKEND_ENV, "memory").strip().lower()
+    if kind == "sqlite":
+        max_rows = _env_optional_number(ANALYTICS_MAX_ROWS_ENV)
+        return SQLiteBackend(
+            os.getenv(ANALYTICS_DB_ENV) or _DEFAULT_DB_PATH,
+            retention_days=_env_optional_number(ANALYTICS_RETENTION_DAYS_ENV),
+            max_rows=int(max_rows) if max_rows else None,
+        )
+    capacity = _env_optional_number(ANALYTICS_MEMORY_CAPACITY_ENV)
+    return RingBufferBackend(capacity=int(capacity) if capacity else max_recent)
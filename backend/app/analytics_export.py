@@ -0,0 +1,331 @@
+# backend/app/analytics_export.py
+
+import argparse
+import csv
+import io
+import os
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar exports are optional
+    pa = None
+    pq = None
+
+
+# The first eight columns are the original /admin/export-recent layout;
+# the rest were added at the end so existing sheets keep working
+CSV_COLUMNS = [
+    "timestamp",
+    "profile_type",
+    "age_group",
+    "goals",
+    "products",
+    "upsell",
+    "bundle_price",
+    "bundle_price_subscription",
+    "lifestyle",
+    "diet",
+    "allergies",
+    "risk_score",
+    "risk_label",
+]
+
+
+def normalize_range(
+    since: Optional[str], until: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Turn user-supplied dates / datetimes into the stored timestamp format
+    (naive UTC ISO, seconds). A bare date for `until` means "through the
+    end of that day". Raises ValueError on unparseable input.
+    """
+    def _parse(value: str, end_of_day: bool) -> str:
+        try:
+            parsed = datetime.fromisoformat(value.strip())
+        except ValueError:
+            raise ValueError(f"invalid date {value!r}; use YYYY-MM-DD or an ISO datetime")
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        if end_of_day and len(value.strip()) == 10:
+            parsed += timedelta(days=1)
+        return parsed.isoformat(timespec="seconds")
+
+    return (
+        _parse(since, False) if since else None,
+        _parse(until, True) if until else None,
+    )
+
+
+def _csv_row(rec: Dict[str, Any]) -> List[Any]:
+    row = []
+    for col in CSV_COLUMNS:
+        value = rec.get(col)
+        if isinstance(value, list):
+            value = ";".join(str(x) for x in value)
+        row.append("" if value is None else value)
+    return row
+
+
+def iter_csv(
+    batches: Iterable[List[Dict[str, Any]]], compress: bool = False
+) -> Iterator[bytes]:
+    """
+    Encode record batches as CSV, one chunk per batch (header first, so
+    the response starts immediately). With compress=True the chunks form
+    one gzip stream. Memory use is one batch, whatever the export size.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    gzipper = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def _drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return gzipper.compress(data) if gzipper is not None else data
+
+    writer.writerow(CSV_COLUMNS)
+    yield _drain()
+    for batch in batches:
+        writer.writerows(_csv_row(rec) for rec in batch)
+        chunk = _drain()
+        if chunk:
+            yield chunk
+    if gzipper is not None:
+        yield gzipper.flush()
+
+
+# ---------- columnar (Arrow IPC / Parquet) ----------
+
+COLUMNAR_FORMATS = {
+    # format -> (media type, file extension)
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+_CATEGORY_COLUMNS = ("profile_type", "age_group", "allergies", "risk_label")
+
+
+def columnar_available() -> bool:
+    return pa is not None
+
+
+def arrow_schema() -> "pa.Schema":
+    category = pa.dictionary(pa.int32(), pa.string())
+    strings = pa.list_(pa.string())
+    return pa.schema(
+        [
+            ("timestamp", pa.timestamp("s", tz="UTC")),
+            ("profile_type", category),
+            ("age_group", category),
+            ("goals", strings),
+            ("lifestyle", strings),
+            ("diet", strings),
+            ("allergies", category),
+            ("products", strings),
+            ("upsell", strings),
+            ("bundle_price", pa.float64()),
+            ("bundle_price_subscription", pa.float64()),
+            ("risk_score", pa.int16()),
+            ("risk_label", category),
+        ]
+    )
+
+
+class _CategoryEncoder:
+    """
+    Dictionary-encodes one column across batches. The dictionary only ever
+    grows, so each batch's dictionary extends the previous one and the IPC
+    writer can send just the new values (dictionary deltas).
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def encode(self, values: List[Optional[str]]) -> "pa.DictionaryArray":
+        ids = self._ids
+        indices = []
+        for v in values:
+            if v is None:
+                indices.append(None)
+                continue
+            i = ids.get(v)
+            if i is None:
+                i = ids[v] = len(self._values)
+                self._values.append(v)
+            indices.append(i)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, pa.int32()), pa.array(self._values, pa.string())
+        )
+
+
+def _iter_record_batches(
+    column_batches: Iterable[Dict[str, List[Any]]], schema: "pa.Schema"
+) -> Iterator["pa.RecordBatch"]:
+    encoders = {col: _CategoryEncoder() for col in _CATEGORY_COLUMNS}
+    timestamp_type = schema.field("timestamp").type
+    for columns in column_batches:
+        arrays = []
+        for field in schema:
+            values = columns[field.name]
+            if field.name in encoders:
+                arrays.append(encoders[field.name].encode(values))
+            elif field.name == "timestamp":
+                # Stored as naive-UTC ISO strings; let Arrow parse them
+                naive = pa.array(values, pa.string()).cast(pa.timestamp("s"))
+                arrays.append(naive.cast(timestamp_type))
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that hands out what has been written so far,
+    so a writer's output can be streamed as it is produced.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _open_writer(fmt: str, sink, schema: "pa.Schema"):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    options = pa.ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+    return pa.ipc.new_file(sink, schema, options=options)
+
+
+def iter_columnar(column_batches: Iterable[Dict[str, List[Any]]], fmt: str) -> Iterator[bytes]:
+    """
+    Encode column batches as an Arrow IPC file or a Parquet file, yielding
+    bytes as each record batch is written (one Parquet row group per batch).
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"format must be one of {tuple(COLUMNAR_FORMATS)}")
+
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    writer = _open_writer(fmt, sink, schema)
+    try:
+        for batch in _iter_record_batches(column_batches, schema):
+            writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def write_columnar(
+    column_batches: Iterable[Dict[str, List[Any]]], fmt: str, path: str
+) -> int:
+    """
+    Write column batches to `path`. Returns the number of rows written.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    schema = arrow_schema()
+    rows = 0
+    with pa.OSFile(path, "wb") as sink:
+        writer = _open_writer(fmt, sink, schema)
+        try:
+            for batch in _iter_record_batches(column_batches, schema):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            writer.close()
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line export of a SQLite analytics store, e.g.
+
+        python -m app.analytics_export --db data/analytics.sqlite3 --format parquet \
+            --out history.parquet --since 2024-01-01 --profile-type teen
+
+    Without --db the configured store is used, which must be the SQLite
+    one: the in-memory ring buffer is empty in a new process.
+    """
+    from .analytics_backends import SQLiteBackend, backend_from_env
+
+    parser = argparse.ArgumentParser(description="Export recommendation history.")
+    parser.add_argument("--format", choices=["csv", *COLUMNAR_FORMATS], default="parquet")
+    parser.add_argument("--out", required=True, help="output file path")
+    parser.add_argument("--db", help="SQLite analytics file (default: configured store)")
+    parser.add_argument("--since", help="date or ISO datetime (UTC), inclusive")
+    parser.add_argument("--until", help="date (inclusive) or ISO datetime (UTC, exclusive)")
+    parser.add_argument("--profile-type", action="append", dest="profile_types")
+    parser.add_argument("--risk-label", action="append", dest="risk_labels")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--gzip", action="store_true", help="gzip the CSV output")
+    args = parser.parse_args(argv)
+
+    since, until = normalize_range(args.since, args.until)
+    filters = dict(
+        since=since,
+        until=until,
+        profile_types=args.profile_types,
+        risk_labels=args.risk_labels,
+        limit=args.limit,
+        batch_size=args.batch_size,
+    )
+    if args.format != "csv" and pa is None:
+        sys.exit("pyarrow is not installed; pip install pyarrow (or use --format csv)")
+    if args.db:
+        if not os.path.exists(args.db):
+            sys.exit(f"No analytics database at {args.db}")
+        backend = SQLiteBackend(args.db)
+    else:
+        backend = backend_from_env(max_recent=1)
+        if not isinstance(backend, SQLiteBackend):
+            sys.exit(
+                "The configured analytics store is in memory and has no history in a new "
+                "process; pass --db or set NUTRIGUIDE_ANALYTICS_BACKEND=sqlite"
+            )
+
+    try:
+        if args.format == "csv":
+            with open(args.out, "wb") as f:
+                for chunk in iter_csv(backend.iter_batches(**filters), compress=args.gzip):
+                    f.write(chunk)
+            print(f"Wrote {args.out}")
+            return
+
+        rows = write_columnar(backend.iter_column_batches(**filters), args.format, args.out)
+        print(f"Wrote {rows} rows to {args.out}")
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# backend/app/analytics_pipeline.py
+
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+BACKPRESSURE_MODES = ("drop", "block")
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AnalyticsPipeline:
+    """
+    Bounded queue + background consumer thread.
+
+    Producers call submit() (cheap: one queue put). The consumer drains up
+    to batch_size items at a time, waiting at most flush_interval seconds
+    for a batch to fill, and hands each batch to process_batch.
+
+    Backpressure when the queue is full:
+    - "drop":  the item is discarded and counted in `dropped`
+    - "block": the producer waits up to block_timeout seconds, then drops
+
+    Coroutines use submit_async(), which does that wait on a worker
+    thread; submit() never blocks an event loop thread (it drops instead).
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], None],
+        maxsize: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        backpressure: str = "drop",
+        block_timeout: float = 1.0,
+    ):
+        if backpressure not in BACKPRESSURE_MODES:
+            raise ValueError(f"backpressure must be one of {BACKPRESSURE_MODES}")
+
+        self._process_batch = process_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=maxsize)
+        self.maxsize = maxsize
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.backpressure = backpressure
+        self.block_timeout = block_timeout
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.committed = 0
+        self.batches = 0
+        self.errors = 0
+        self.failed = 0
+        self.last_lag_ms: Optional[float] = None
+        self.max_lag_ms = 0.0
+        self._lag_total_ms = 0.0
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="analytics-pipeline", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the consumer after draining what is already queued.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    # ---------- producer side ----------
+
+    def submit(self, item: Any) -> bool:
+        """
+        Enqueue one item. Returns False if it was dropped.
+        """
+        entry = (time.monotonic(), item)
+        try:
+            if self.backpressure == "block" and not _on_event_loop():
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def submit_async(self, item: Any) -> bool:
+        """
+        submit() for coroutines. In "block" mode a full queue is waited on
+        from a worker thread, so it delays this request, not the loop.
+        """
+        entry = (time.monotonic(), item)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.backpressure != "block":
+                self.dropped += 1
+                return False
+            try:
+                await asyncio.to_thread(self._queue.put, entry, True, self.block_timeout)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        self.enqueued += 1
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until everything submitted so far has been processed.
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    # ---------- consumer side ----------
+
+    def _next_batch(self) -> List[tuple]:
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if self._stop.is_set():
+                    return
+                continue
+
+            try:
+                self._process_batch([item for _, item in batch])
+                self.committed += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.errors += 1
+                self.failed += len(batch)
+                print("Analytics pipeline error:", e)
+            finally:
+                now = time.monotonic()
+                lag_ms = (now - batch[0][0]) * 1e3  # oldest item in the batch
+                self.last_lag_ms = round(lag_ms, 3)
+                self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+                self._lag_total_ms += sum((now - t) * 1e3 for t, _ in batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    # ---------- metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        processed = self.committed + self.failed
+        return {
+            "running": self.running,
+            "backpressure": self.backpressure,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "committed": self.committed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "failed": self.failed,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "avg_lag_ms": round(self._lag_total_ms / processed, 3) if processed else None,
+        }
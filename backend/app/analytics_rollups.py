@@ -0,0 +1,226 @@
+# backend/app/analytics_rollups.py
+
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .analytics_backends import _COUNTED_FIELDS, RunningAggregates, _iso_to_epoch
+
+
+# Bucket width in seconds, finest first
+GRANULARITIES = {"minute": 60, "hour": 3600, "day": 86400}
+
+# How long buckets of each granularity are kept. Older minute buckets are
+# folded into their hour bucket, older hour buckets into their day bucket,
+# and day buckets past their retention are dropped.
+DEFAULT_RETENTION = {"minute": 3 * 3600, "hour": 8 * 86400, "day": 90 * 86400}
+
+_WINDOW_RE = re.compile(r"^\s*(\d+)\s*([mhdw])\s*$")
+_WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _counter_key(field: str) -> str:
+    return dict(_COUNTED_FIELDS)[field]
+
+
+def parse_window(window: str) -> int:
+    """
+    "15m", "1h", "24h", "7d", "2w" -> seconds. Raises ValueError.
+    """
+    match = _WINDOW_RE.match(window or "")
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"invalid window {window!r}; use e.g. 15m, 1h, 24h, 7d")
+    return int(match.group(1)) * _WINDOW_UNITS[match.group(2)]
+
+
+def format_window(seconds: float) -> str:
+    for unit, width in (("d", 86400), ("h", 3600)):
+        if seconds >= width and seconds % width == 0:
+            return f"{int(seconds // width)}{unit}"
+    return f"{int(seconds // 60)}m"
+
+
+class RollupStore:
+    """
+    Time-bucketed aggregates of analytics records.
+
+    Each record is counted in the bucket of the finest granularity whose
+    retention still covers it. Every minute, expired buckets are compacted
+    into the next coarser level, so memory stays bounded by
+    retention / width buckets per level (~180 + 192 + 90 by default)
+    however much traffic there is.
+
+    Windowed queries only merge buckets; raw records are never scanned.
+    Windows are rounded out to whole buckets of the granularity used.
+    """
+
+    def __init__(
+        self,
+        retention: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._levels: Dict[str, Dict[int, RunningAggregates]] = {g: {} for g in GRANULARITIES}
+        self._compacted_minute: Optional[int] = None
+        self.dropped = 0  # records older than any retained bucket
+
+    # ---------- writes ----------
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        now = self._clock()
+        with self._lock:
+            self._maybe_compact_locked(now)
+            for rec in records:
+                ts = _iso_to_epoch(rec.get("timestamp"))
+                bucket = self._bucket_locked(ts, now) if ts == ts else None
+                if bucket is None:
+                    self.dropped += 1
+                    continue
+                bucket.update(rec)
+
+    def relabel(self, field: str, changes: Iterable[Tuple[str, Any, Any]]) -> None:
+        """
+        Apply (timestamp, old, new) value changes of a counted field (e.g.
+        risk_label after re-scoring) to the buckets holding those records.
+        A record sits in the finest bucket covering its timestamp that
+        still counts the old value.
+        """
+        with self._lock:
+            for timestamp, old, new in changes:
+                ts = _iso_to_epoch(timestamp)
+                if ts != ts:
+                    continue
+                for granularity, width in GRANULARITIES.items():
+                    bucket = self._levels[granularity].get(int(ts // width) * width)
+                    if bucket is not None and (
+                        not old or bucket.counters[_counter_key(field)].get(old)
+                    ):
+                        bucket.relabel(field, old, new)
+                        break
+
+    def _bucket_locked(self, ts: float, now: float) -> Optional[RunningAggregates]:
+        age = now - ts
+        for granularity, width in GRANULARITIES.items():
+            if age < self.retention[granularity]:
+                start = int(ts // width) * width
+                level = self._levels[granularity]
+                bucket = level.get(start)
+                if bucket is None:
+                    bucket = level[start] = RunningAggregates()
+                return bucket
+        return None
+
+    def _maybe_compact_locked(self, now: float) -> None:
+        minute = int(now // 60)
+        if minute != self._compacted_minute:
+            self._compacted_minute = minute
+            self._compact_locked(now)
+
+    def _compact_locked(self, now: float) -> None:
+        names = list(GRANULARITIES)
+        for i, granularity in enumerate(names):
+            width = GRANULARITIES[granularity]
+            level = self._levels[granularity]
+            cutoff = now - self.retention[granularity]
+            expired = [start for start in level if start + width <= cutoff]
+            if not expired:
+                continue
+
+            coarser = names[i + 1] if i + 1 < len(names) else None
+            for start in expired:
+                bucket = level.pop(start)
+                if coarser is None:
+                    self.dropped += bucket.total
+                    continue
+                coarse_width = GRANULARITIES[coarser]
+                coarse_start = start // coarse_width * coarse_width
+                target = self._levels[coarser].get(coarse_start)
+                if target is None:
+                    self._levels[coarser][coarse_start] = bucket
+                else:
+                    target.merge(bucket)
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact_locked(self._clock())
+
+    # ---------- reads ----------
+
+    def max_window(self, granularity: str) -> int:
+        """
+        Longest window that can be answered at this granularity.
+        """
+        return int(self.retention[granularity] - GRANULARITIES[granularity])
+
+    def granularity_for(self, window_seconds: int) -> str:
+        """
+        Finest granularity whose buckets cover the whole window (rounded
+        out to a whole bucket).
+        """
+        for granularity in GRANULARITIES:
+            if window_seconds <= self.max_window(granularity):
+                return granularity
+        raise ValueError(
+            f"window exceeds the retained history ({format_window(self.max_window('day'))})"
+        )
+
+    def query(
+        self, window_seconds: int, granularity: Optional[str] = None
+    ) -> Tuple[RunningAggregates, List[Tuple[int, RunningAggregates]], str, int, float]:
+        """
+        Merge the buckets of the last `window_seconds`.
+
+        Returns (total, series, granularity, window_start, now). `series` is
+        one (bucket_start, aggregates) per granularity step, oldest first,
+        with empty steps included. Raises ValueError when the granularity
+        is unknown or finer than what is retained for the whole window.
+        """
+        finest = self.granularity_for(window_seconds)
+        if granularity is None:
+            granularity = finest
+        elif granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {tuple(GRANULARITIES)}")
+        elif GRANULARITIES[granularity] < GRANULARITIES[finest]:
+            raise ValueError(
+                f"{granularity} buckets only cover the last "
+                f"{format_window(self.max_window(granularity))}; "
+                f"use granularity={finest} or a shorter window"
+            )
+
+        width = GRANULARITIES[granularity]
+        now = self._clock()
+        window_start = int((now - window_seconds) // width) * width
+
+        steps: Dict[int, RunningAggregates] = {}
+        total = RunningAggregates()
+        with self._lock:
+            for level_name, level_width in GRANULARITIES.items():
+                if level_width > width:
+                    break  # coarser levels only hold records older than the window
+                for start, bucket in self._levels[level_name].items():
+                    if start + level_width <= window_start:
+                        continue
+                    step = start // width * width
+                    if step not in steps:
+                        steps[step] = RunningAggregates()
+                    steps[step].merge(bucket)
+        for agg in steps.values():
+            total.merge(agg)
+
+        last_step = int(now // width) * width
+        series = [
+            (step, steps.get(step) or RunningAggregates())
+            for step in range(window_start, last_step + 1, width)
+        ]
+        return total, series, granularity, window_start, now
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "buckets": {g: len(level) for g, level in self._levels.items()},
+                "retention_seconds": dict(self.retention),
+                "dropped": self.dropped,
+            }
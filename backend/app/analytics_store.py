@@ -1,17 +1,44 @@
 # backend/app/analytics_store.py
 
-from typing import Dict, Any, List
-from datetime import datetime
-from collections import Counter
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+from datetime import datetime, timezone
 
-# In-memory store (for demo)
-_RECENT_RECOMMENDATIONS: List[Dict[str, Any]] = []
-_MAX_RECENT = 200  # keep last N records
+from .analytics_pipeline import AnalyticsPipeline
+from .analytics_backends import AnalyticsBackend, _epoch_to_iso, backend_from_env
+from .analytics_rollups import GRANULARITIES, RollupStore, parse_window
+from .churn_model import get_churn_model
+from .metrics import RECOMMEND_STAGE_SECONDS
+
+# Storage backend: in-memory last-N list by default (for demo),
+# or SQLite via NUTRIGUIDE_ANALYTICS_BACKEND=sqlite
+_MAX_RECENT = 200  # keep last N records (memory backend)
+_BACKEND: Optional[AnalyticsBackend] = None
+_BACKEND_LOCK = threading.Lock()
+
+# Per-minute / per-hour / per-day buckets for windowed summaries; seeded
+# from the backend together with it, then fed on every commit
+_ROLLUPS: Optional[RollupStore] = None
+
+# Background writer; None → log_recommendation writes inline
+_PIPELINE: Optional[AnalyticsPipeline] = None
+# Time log_recommendation adds to a request (enqueue, or the inline write)
+_ANALYTICS_LOG_TIMER = RECOMMEND_STAGE_SECONDS.labels("analytics_log")
+
+# Called with each committed batch of records (e.g. the admin push stream)
+_COMMIT_LISTENERS: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+# Background re-scoring of stored records after a churn model change
+_RESCORE_THREAD: Optional[threading.Thread] = None
+_RESCORE_STATS: Dict[str, Any] = {"state": "idle"}
 
 
 def _compute_risk(quiz, result: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Very simple churn / subscription risk heuristic.
+    Very simple churn / subscription risk heuristic; the fallback when no
+    trained churn model is available (see churn_model).
 
     Idea:
     - Higher price + low subscription savings => higher risk
@@ -72,16 +99,20 @@ def _compute_risk(quiz, result: Dict[str, Any]) -> Dict[str, Any]:
     return {"risk_score": score, "risk_label": label}
 
 
-def log_recommendation(quiz, result: Dict[str, Any]) -> None:
+def _build_record(quiz, result: Dict[str, Any], logged_at: float) -> Dict[str, Any]:
     """
-    Store a compact record of the quiz + recommendation
-    for use in the admin dashboard & CSV export.
+    Compact record of the quiz + recommendation, including the risk score.
     """
     record: Dict[str, Any] = {
-        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "timestamp": datetime.fromtimestamp(logged_at, timezone.utc)
+        .replace(tzinfo=None)
+        .isoformat(timespec="seconds"),
         "profile_type": getattr(quiz, "profile_type", None),
         "age_group": getattr(quiz, "age_group", None),
         "goals": getattr(quiz, "goals", []) or [],
+        "lifestyle": getattr(quiz, "lifestyle", []) or [],
+        "diet": getattr(quiz, "diet", []) or [],
+        "allergies": getattr(quiz, "allergies", None),
         "products": result.get("products", []) or [],
         "upsell": result.get("upsell", []) or [],
     }
@@ -91,16 +122,211 @@ def log_recommendation(quiz, result: Dict[str, Any]) -> None:
     record["bundle_price"] = pricing.get("bundle_price")
     record["bundle_price_subscription"] = pricing.get("bundle_price_subscription")
 
-    # Risk / churn heuristic
+    # Risk / churn heuristic; replaced batch-wise by _score_records when
+    # the churn model is loaded
     risk_info = _compute_risk(quiz, result)
     record["risk_score"] = risk_info["risk_score"]
     record["risk_label"] = risk_info["risk_label"]
 
-    _RECENT_RECOMMENDATIONS.append(record)
+    return record
+
+
+def _seed_rollups(backend: AnalyticsBackend) -> RollupStore:
+    rollups = RollupStore()
+    oldest = time.time() - max(rollups.retention.values())
+    rollups.add(backend.records_since(_epoch_to_iso(oldest)))
+    return rollups
+
+
+def get_backend() -> AnalyticsBackend:
+    global _BACKEND, _ROLLUPS
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                backend = backend_from_env(_MAX_RECENT)
+                _ROLLUPS = _seed_rollups(backend)
+                _BACKEND = backend
+    return _BACKEND
+
+
+def get_rollups() -> RollupStore:
+    get_backend()
+    return _ROLLUPS
+
+
+def set_backend(backend: AnalyticsBackend) -> None:
+    """
+    Swap the storage backend (e.g. a SQLite file for scripts/benchmarks).
+    The rollups are rebuilt from the new backend's records.
+    """
+    global _BACKEND, _ROLLUPS
+    with _BACKEND_LOCK:
+        _ROLLUPS = _seed_rollups(backend)
+        _BACKEND = backend
+
+
+def add_commit_listener(listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+    """
+    Register a callback for every committed batch of records. It runs on
+    the committing thread (usually the analytics pipeline), so it must be
+    quick and thread-safe.
+    """
+    if listener not in _COMMIT_LISTENERS:
+        _COMMIT_LISTENERS.append(listener)
+
+
+def remove_commit_listener(listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+    if listener in _COMMIT_LISTENERS:
+        _COMMIT_LISTENERS.remove(listener)
+
+
+def _commit_records(records: List[Dict[str, Any]]) -> None:
+    get_backend().append(records)
+    get_rollups().add(records)
+    for listener in _COMMIT_LISTENERS:
+        try:
+            listener(records)
+        except Exception as e:
+            print("Analytics commit listener error:", e)
+
+
+def _score_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Overwrite the heuristic risk of freshly built records with the churn
+    model's, one vectorized call for the whole batch.
+    """
+    model = get_churn_model()
+    if model is not None and records:
+        model.score_records(records)
+    return records
+
+
+def _process_batch(items: List[tuple]) -> None:
+    _commit_records(_score_records([_build_record(quiz, result, ts) for quiz, result, ts in items]))
+
+
+def log_recommendation(quiz, result: Dict[str, Any]) -> None:
+    """
+    Store a compact record of the quiz + recommendation
+    for use in the admin dashboard & CSV export.
+
+    When the analytics pipeline is running this only enqueues; the record
+    (risk score included) is built and committed by the background writer.
+    """
+    start = time.perf_counter()
+    logged_at = time.time()
+    if _PIPELINE is not None and _PIPELINE.running:
+        _PIPELINE.submit((quiz, result, logged_at))
+    else:
+        _commit_records(_score_records([_build_record(quiz, result, logged_at)]))
+    _ANALYTICS_LOG_TIMER.observe(time.perf_counter() - start)
+
+
+async def log_recommendation_async(quiz, result: Dict[str, Any]) -> None:
+    """
+    log_recommendation for async handlers: with backpressure="block" a
+    full queue is waited on from a worker thread instead of the event loop.
+    """
+    start = time.perf_counter()
+    logged_at = time.time()
+    if _PIPELINE is not None and _PIPELINE.running:
+        await _PIPELINE.submit_async((quiz, result, logged_at))
+    else:
+        _commit_records(_score_records([_build_record(quiz, result, logged_at)]))
+    _ANALYTICS_LOG_TIMER.observe(time.perf_counter() - start)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def start_analytics_pipeline() -> AnalyticsPipeline:
+    """
+    Start the background writer. Configured with
+    NUTRIGUIDE_ANALYTICS_QUEUE_SIZE, _BATCH_SIZE, _FLUSH_INTERVAL,
+    _BACKPRESSURE ("drop" or "block") and _BLOCK_TIMEOUT.
+    """
+    global _PIPELINE
+    if _PIPELINE is None:
+        _PIPELINE = AnalyticsPipeline(
+            _process_batch,
+            maxsize=int(_env_number("NUTRIGUIDE_ANALYTICS_QUEUE_SIZE", 10_000)),
+            batch_size=int(_env_number("NUTRIGUIDE_ANALYTICS_BATCH_SIZE", 256)),
+            flush_interval=_env_number("NUTRIGUIDE_ANALYTICS_FLUSH_INTERVAL", 0.05),
+            backpressure=os.getenv("NUTRIGUIDE_ANALYTICS_BACKPRESSURE", "drop"),
+            block_timeout=_env_number("NUTRIGUIDE_ANALYTICS_BLOCK_TIMEOUT", 1.0),
+        )
+    _PIPELINE.start()
+    return _PIPELINE
+
+
+def stop_analytics_pipeline() -> None:
+    """
+    Drain the queue and stop the background writer.
+    """
+    global _PIPELINE
+    if _PIPELINE is not None:
+        _PIPELINE.stop()
+        _PIPELINE = None
+
+
+def flush_analytics(timeout: float = 5.0) -> bool:
+    """
+    Wait until every queued record has been committed.
+    """
+    if _PIPELINE is None:
+        return True
+    return _PIPELINE.flush(timeout)
 
-    # Trim to last _MAX_RECENT items
-    if len(_RECENT_RECOMMENDATIONS) > _MAX_RECENT:
-        del _RECENT_RECOMMENDATIONS[0]
+
+def get_analytics_pipeline_stats() -> Optional[Dict[str, Any]]:
+    return _PIPELINE.stats() if _PIPELINE is not None else None
+
+
+def _run_rescore(model) -> None:
+    backend = get_backend()
+    _RESCORE_STATS.update(state="running", model_version=model.version, scored=0, error=None)
+    start = time.perf_counter()
+    try:
+        scored = backend.rescore_risk(
+            model.score_columns,
+            model.version,
+            on_relabel=lambda changes: get_rollups().relabel("risk_label", changes),
+        )
+        _RESCORE_STATS.update(state="done", scored=scored)
+    except Exception as e:
+        print("Churn re-scoring error:", e)
+        _RESCORE_STATS.update(state="failed", error=str(e))
+    _RESCORE_STATS["seconds"] = round(time.perf_counter() - start, 3)
+
+
+def start_churn_rescore(force: bool = False) -> Optional[threading.Thread]:
+    """
+    Re-score every stored record in a background thread when the loaded
+    churn model differs from the one that scored the store (or always,
+    with force). New records are scored by the new model meanwhile.
+    """
+    global _RESCORE_THREAD
+    model = get_churn_model()
+    if model is None:
+        return None
+    if _RESCORE_THREAD is not None and _RESCORE_THREAD.is_alive():
+        return _RESCORE_THREAD
+    if not force and get_backend().risk_model_version() == model.version:
+        _RESCORE_STATS.update(state="up_to_date", model_version=model.version)
+        return None
+    _RESCORE_THREAD = threading.Thread(
+        target=_run_rescore, args=(model,), name="churn-rescore", daemon=True
+    )
+    _RESCORE_THREAD.start()
+    return _RESCORE_THREAD
+
+
+def get_churn_rescore_stats() -> Dict[str, Any]:
+    return dict(_RESCORE_STATS)
 
 
 def get_recent_recommendations(limit: int = 100) -> List[Dict[str, Any]]:
@@ -108,67 +334,39 @@ def get_recent_recommendations(limit: int = 100) -> List[Dict[str, Any]]:
     Return most recent N recommendations (default 100),
     newest first.
     """
-    items = _RECENT_RECOMMENDATIONS[-limit:]
-    return list(reversed(items))
+    return get_backend().recent(limit)
 
 
-def get_segments_summary() -> Dict[str, Any]:
+def get_top_segments(limit: int = 20) -> List[Dict[str, Any]]:
     """
-    Aggregate stats for the admin overview:
-    - total_recommendations
-    - by_profile_type
-    - by_age_group
-    - product_counts
-    - avg_bundle_price
-    - avg_sub_price
-    - avg_discount_pct
-    - avg_products_per_bundle
-    - by_risk_label
-    - high_risk_share (% of total)
+    Most common full quiz answer combinations among stored records,
+    most frequent first. Each item has the quiz fields plus "count".
     """
-    total = len(_RECENT_RECOMMENDATIONS)
-    by_profile_type = Counter()
-    by_age_group = Counter()
-    product_counts = Counter()
-    risk_counts = Counter()
-
-    bundle_prices: List[float] = []
-    sub_prices: List[float] = []
-    num_products_list: List[int] = []
-
-    for rec in _RECENT_RECOMMENDATIONS:
-        # profile & age
-        if rec.get("profile_type"):
-            by_profile_type[rec["profile_type"]] += 1
-        if rec.get("age_group"):
-            by_age_group[rec["age_group"]] += 1
-
-        # products
-        prods = rec.get("products", []) or []
-        for p in prods:
-            product_counts[p] += 1
-
-        # pricing metrics
-        bp = rec.get("bundle_price")
-        bsp = rec.get("bundle_price_subscription")
-        if isinstance(bp, (int, float)):
-            bundle_prices.append(float(bp))
-        if isinstance(bsp, (int, float)):
-            sub_prices.append(float(bsp))
-
-        num_products_list.append(len(prods))
-
-        # risk label
-        label = rec.get("risk_label")
-        if label:
-            risk_counts[label] += 1
-
-    def _avg(values: List[float]):
-        return round(sum(values) / len(values), 2) if values else None
-
-    avg_bundle_price = _avg(bundle_prices)
-    avg_sub_price = _avg(sub_prices)
-    avg_products_per_bundle = _avg(num_products_list)
+    return [
+        {
+            "profile_type": profile_type,
+            "age_group": age_group,
+            "goals": list(goals),
+            "lifestyle": list(lifestyle),
+            "diet": list(diet),
+            "allergies": allergies,
+            "count": count,
+        }
+        for (profile_type, age_group, goals, lifestyle, diet, allergies), count
+        in get_backend().top_segments(limit)
+    ]
+
+
+def _summary_from_aggregates(agg: Dict[str, Any]) -> Dict[str, Any]:
+    total = agg["total"]
+    risk_counts = agg["risk_counts"]
+
+    def _avg(value_sum: float, n: int):
+        return round(value_sum / n, 2) if n else None
+
+    avg_bundle_price = _avg(agg["bundle_price_sum"], agg["bundle_price_n"])
+    avg_sub_price = _avg(agg["sub_price_sum"], agg["sub_price_n"])
+    avg_products_per_bundle = _avg(agg["num_products_sum"], total)
 
     avg_discount_pct = None
     if avg_bundle_price and avg_sub_price and avg_bundle_price > 0:
@@ -184,9 +382,9 @@ def get_segments_summary() -> Dict[str, Any]:
 
     return {
         "total_recommendations": total,
-        "by_profile_type": dict(by_profile_type),
-        "by_age_group": dict(by_age_group),
-        "product_counts": dict(product_counts),
+        "by_profile_type": dict(agg["by_profile_type"]),
+        "by_age_group": dict(agg["by_age_group"]),
+        "product_counts": dict(agg["product_counts"]),
         "avg_bundle_price": avg_bundle_price,
         "avg_sub_price": avg_sub_price,
         "avg_discount_pct": avg_discount_pct,
@@ -194,3 +392,61 @@ def get_segments_summary() -> Dict[str, Any]:
         "by_risk_label": dict(risk_counts),
         "high_risk_share": high_risk_share,
     }
+
+
+def get_segments_summary() -> Dict[str, Any]:
+    """
+    Aggregate stats for the admin overview:
+    - total_recommendations
+    - by_profile_type
+    - by_age_group
+    - product_counts
+    - avg_bundle_price
+    - avg_sub_price
+    - avg_discount_pct
+    - avg_products_per_bundle
+    - by_risk_label
+    - high_risk_share (% of total)
+
+    Backends keep the underlying counts and sums up to date as records are
+    added and evicted, so this doesn't depend on how much history is kept.
+    """
+    return _summary_from_aggregates(get_backend().aggregates())
+
+
+def get_windowed_summary(
+    window: Optional[str] = None, granularity: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Same stats as get_segments_summary, for the last `window`
+    ("15m", "1h", "24h", "7d", ...), merged from the time-bucketed rollups.
+
+    - window defaults to the longest one `granularity` can answer
+    - granularity ("minute", "hour", "day") defaults to the finest one kept
+      for the whole window; when given, a per-bucket "series" is included
+
+    Raises ValueError for an invalid window / granularity combination.
+    """
+    rollups = get_rollups()
+    if window is None:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {tuple(GRANULARITIES)}")
+        window_seconds = rollups.max_window(granularity)
+    else:
+        window_seconds = parse_window(window)
+
+    total, series, used, window_start, now = rollups.query(window_seconds, granularity)
+
+    summary = _summary_from_aggregates(total.snapshot())
+    summary["window"] = {
+        "seconds": window_seconds,
+        "granularity": used,
+        "start": _epoch_to_iso(window_start),
+        "end": _epoch_to_iso(now),
+    }
+    if granularity is not None:
+        summary["series"] = [
+            {"start": _epoch_to_iso(start), **_summary_from_aggregates(agg.snapshot())}
+            for start, agg in series
+        ]
+    return summary
@@ -0,0 +1,103 @@
+# backend/app/batch_recommend.py
+
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, AsyncIterator, Deque, Optional
+
+from .recommendation import QuizResponse
+from .recommend_products import get_recommendation
+from .analytics_store import log_recommendation_async
+
+
+# Worker processes for batch scoring (0 → score in a thread instead)
+BATCH_WORKERS_ENV = "NUTRIGUIDE_BATCH_WORKERS"
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+
+
+def _score_chunk(
+    quizzes: List[QuizResponse], include_explanation: bool
+) -> List[Dict[str, Any]]:
+    """
+    Score one chunk of quizzes. Top-level so it can run in a worker process.
+    """
+    return [
+        get_recommendation(q, include_llm_explanation=include_explanation)
+        for q in quizzes
+    ]
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _POOL, _POOL_WORKERS
+    if _POOL is None:
+        try:
+            workers = int(os.getenv(BATCH_WORKERS_ENV, "0"))
+        except ValueError:
+            workers = 0
+        if workers > 0:
+            _POOL = ProcessPoolExecutor(max_workers=workers)
+            _POOL_WORKERS = workers
+    return _POOL
+
+
+def shutdown_pool() -> None:
+    """
+    Stop the worker processes (called on app shutdown).
+    """
+    global _POOL, _POOL_WORKERS
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+        _POOL_WORKERS = 0
+
+
+async def stream_batch_recommendations(
+    quizzes: List[QuizResponse],
+    chunk_size: int = 100,
+    include_explanation: bool = False,
+    log_analytics: bool = False,
+    use_process_pool: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Score quizzes chunk by chunk and yield NDJSON lines
+    ({"index": i, "result": {...}}) as soon as each chunk is done.
+
+    Chunks run on the process pool when requested and configured,
+    otherwise on a worker thread, so the event loop stays free.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_pool() if use_process_pool else None
+    chunk_size = max(1, chunk_size)
+
+    # Keep a few chunks in flight so pool workers stay busy, but yield in
+    # input order and don't score far ahead of a slow client.
+    max_in_flight = 2 * (_POOL_WORKERS if pool else 1)
+    chunks = [quizzes[i:i + chunk_size] for i in range(0, len(quizzes), chunk_size)]
+    in_flight: Deque[asyncio.Future] = deque()
+    next_chunk = 0
+
+    offset = 0
+    try:
+        for chunk in chunks:
+            while next_chunk < len(chunks) and len(in_flight) < max_in_flight:
+                in_flight.append(
+                    loop.run_in_executor(pool, _score_chunk, chunks[next_chunk], include_explanation)
+                )
+                next_chunk += 1
+
+            results = await in_flight.popleft()
+            lines = []
+            for i, (quiz, result) in enumerate(zip(chunk, results)):
+                if log_analytics:
+                    await log_recommendation_async(quiz, result)
+                lines.append(json.dumps({"index": offset + i, "result": result}))
+            offset += len(chunk)
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+    finally:
+        # Client went away → don't keep scoring chunks nobody will read
+        for future in in_flight:
+            future.cancel()
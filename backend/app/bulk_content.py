@@ -0,0 +1,166 @@
+# backend/app/bulk_content.py
+
+import argparse
+import json
+import sys
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
+from .content_assistant import email_copy
+from .recommend_products import get_recommendation
+from .recommendation import QuizResponse
+
+
+# Rows per NDJSON chunk written / handed to a worker thread
+CHUNK_SIZE = 1000
+
+# Largest request body the HTTP endpoint buffers; bigger campaigns go
+# through the CLI (python -m app.bulk_content)
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+_QUIZ_FIELDS = tuple(QuizResponse.model_fields)
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _quiz_model(quiz: Dict[str, Any]) -> QuizResponse:
+    # Unanswered questions may be left out of the input rows
+    return QuizResponse(**{**dict.fromkeys(_QUIZ_FIELDS), **quiz})
+
+
+def bulk_email_row(index: int, item: Any, recommend: bool = False) -> Dict[str, Any]:
+    """
+    One output row for one input item {"quiz": {...}, "recommendation":
+    {...}, "id": optional}. Without a recommendation (or with recommend)
+    the quiz is scored first. Every quiz is validated against
+    QuizResponse; bad rows become {"index", "error"} rows instead of
+    failing the whole job.
+    """
+    row: Dict[str, Any] = {"index": index}
+    try:
+        if not isinstance(item, dict) or not isinstance(item.get("quiz"), dict):
+            raise ValueError('each item needs a "quiz" object')
+        if "id" in item:
+            row["id"] = item["id"]
+        quiz = _quiz_model(item["quiz"])
+        recommendation = item.get("recommendation")
+        if recommend or not isinstance(recommendation, dict):
+            recommendation = get_recommendation(quiz, include_llm_explanation=False)
+        row["email"] = email_copy(
+            quiz.profile_type, quiz.age_group, quiz.goals, quiz.lifestyle, recommendation
+        )
+    except ValidationError as e:
+        err = e.errors()[0]
+        field = ".".join(str(part) for part in err["loc"])
+        row["error"] = f"quiz.{field}: {err['msg']}"
+    except (ValueError, TypeError, KeyError) as e:
+        row["error"] = str(e).splitlines()[0]
+    return row
+
+
+def iter_bulk_emails(
+    items: Iterable[Any], recommend: bool = False, start: int = 0
+) -> Iterator[Dict[str, Any]]:
+    for i, item in enumerate(items, start):
+        yield bulk_email_row(i, item, recommend)
+
+
+def iter_ndjson_items(lines: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Parsed NDJSON input lines; blank lines are skipped, unparsable ones
+    come through as None (and turn into error rows).
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield _loads(line)
+        except ValueError:
+            yield None
+
+
+def _encode_chunk(rows: List[Dict[str, Any]]) -> bytes:
+    return b"\n".join(_dumps(row) for row in rows) + b"\n"
+
+
+def _email_chunk(items: List[Any], recommend: bool, start: int) -> bytes:
+    return _encode_chunk(list(iter_bulk_emails(items, recommend, start)))
+
+
+async def stream_bulk_emails(
+    body: bytes, recommend: bool = False, chunk_size: int = CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON request body -> NDJSON emails, chunk_size rows at a time, each
+    chunk rendered on a worker thread and sent as soon as it is done.
+
+    The body is read before the response starts: Starlette's
+    StreamingResponse consumes the request's receive channel while it
+    streams, so the endpoint caps it at MAX_BODY_BYTES. Larger campaigns
+    go through the CLI instead.
+    """
+    chunk_size = max(1, chunk_size)
+    lines = body.split(b"\n")
+    offset = 0
+    for start in range(0, len(lines), chunk_size):
+        items = list(iter_ndjson_items(lines[start : start + chunk_size]))
+        if items:
+            yield await run_in_threadpool(_email_chunk, items, recommend, offset)
+            offset += len(items)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Render welcome emails for an NDJSON file of {"quiz", "recommendation"}
+    rows, e.g.
+
+        python -m app.bulk_content --in campaign.ndjson --out emails.ndjson
+        python -m app.bulk_content --recommend < quizzes.ndjson > emails.ndjson
+    """
+    parser = argparse.ArgumentParser(description="Bulk welcome-email generation (NDJSON).")
+    parser.add_argument("--in", dest="input", default="-", help="input NDJSON file (default: stdin)")
+    parser.add_argument("--out", default="-", help="output NDJSON file (default: stdout)")
+    parser.add_argument(
+        "--recommend", action="store_true", help="re-run recommendations instead of using the input's"
+    )
+    args = parser.parse_args(argv)
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    sink = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    count = errors = 0
+    try:
+        chunk: List[Dict[str, Any]] = []
+        for row in iter_bulk_emails(iter_ndjson_items(source), args.recommend):
+            count += 1
+            errors += "error" in row
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                sink.write(_encode_chunk(chunk))
+                chunk = []
+        if chunk:
+            sink.write(_encode_chunk(chunk))
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+    print(f"Rendered {count - errors} emails ({errors} errors)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
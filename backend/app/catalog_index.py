@@ -0,0 +1,192 @@
+# backend/app/catalog_index.py
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, Any, List, Iterable, Optional, Set, Tuple
+
+from . import products_catalog
+from .allergens import AllergenLexicon, get_allergen_lexicon
+
+
+class CatalogIndex:
+    """
+    Inverted index over a product catalog, compiled once and reused
+    for every request.
+
+    Maps each tag (profile_type, age_group, goal, lifestyle, diet tag,
+    contraindication) to a posting list of catalog positions, so the
+    recommender only touches products that can score above zero or
+    that can fail a safety rule.
+
+    contra_masks[pos] is the product's contraindications as an allergen
+    lexicon bitmask (see allergens.AllergenLexicon).
+    """
+
+    def __init__(
+        self,
+        products: List[Dict[str, Any]],
+        version: int = 0,
+        lexicon: Optional[AllergenLexicon] = None,
+    ):
+        self.products = products
+        self.version = version
+        self.lexicon = lexicon or get_allergen_lexicon()
+        self.contra_masks: List[int] = [
+            self.lexicon.mask_of(p.get("contraindications", [])) for p in products
+        ]
+
+        self.by_profile_type: Dict[str, List[int]] = defaultdict(list)
+        self.by_age_group: Dict[str, List[int]] = defaultdict(list)
+        self.by_goal: Dict[str, List[int]] = defaultdict(list)
+        self.by_lifestyle: Dict[str, List[int]] = defaultdict(list)
+        self.by_contraindication: Dict[str, List[int]] = defaultdict(list)
+
+        # Products that always score (non-zero base priority) or that get
+        # the vegetarian/vegan bonus.
+        self.always_scored: List[int] = []
+        self.veg_friendly: List[int] = []
+
+        # Age limits, sorted by value, for range lookups with bisect
+        min_ages: List[Tuple[float, int]] = []
+        max_ages: List[Tuple[float, int]] = []
+
+        for pos, p in enumerate(products):
+            for profile in p.get("profile_types", []):
+                self.by_profile_type[profile].append(pos)
+            for age in p.get("age_groups", []):
+                self.by_age_group[age].append(pos)
+            for goal in set(p.get("goals", [])):
+                self.by_goal[goal].append(pos)
+            for style in set(p.get("lifestyle", [])):
+                self.by_lifestyle[style].append(pos)
+            for contra in set(p.get("contraindications", [])):
+                self.by_contraindication[contra].append(pos)
+
+            if p.get("base_priority", 0):
+                self.always_scored.append(pos)
+            if any("vegan" in t or "vegetarian" in t for t in p.get("diet_tags", [])):
+                self.veg_friendly.append(pos)
+
+            min_age = p.get("min_age")
+            max_age = p.get("max_age")
+            if isinstance(min_age, (int, float)):
+                min_ages.append((min_age, pos))
+            if isinstance(max_age, (int, float)):
+                max_ages.append((max_age, pos))
+
+        min_ages.sort()
+        max_ages.sort()
+        self._min_age_values = [a for a, _ in min_ages]
+        self._min_age_positions = [pos for _, pos in min_ages]
+        self._max_age_values = [a for a, _ in max_ages]
+        self._max_age_positions = [pos for _, pos in max_ages]
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def safety_candidates(
+        self, user_age_lower: int, contraindications: Iterable[str]
+    ) -> List[int]:
+        """
+        Positions (in catalog order) of products that may fail a safety
+        check for this user: age limits outside the user's range, or a
+        contraindication triggered by the reported allergies (names, e.g.
+        lexicon.names(allergy_mask)).
+        """
+        hits: Set[int] = set()
+
+        if user_age_lower:
+            # min_age > user_age_lower
+            start = bisect_right(self._min_age_values, user_age_lower)
+            hits.update(self._min_age_positions[start:])
+            # max_age < user_age_lower
+            end = bisect_left(self._max_age_values, user_age_lower)
+            hits.update(self._max_age_positions[:end])
+
+        for contra in contraindications:
+            hits.update(self.by_contraindication.get(contra, ()))
+
+        return sorted(hits)
+
+    def score_candidates(self, quiz, exclude: Optional[Set[int]] = None) -> List[int]:
+        """
+        Positions (in catalog order) of products that can get a non-zero
+        score for this quiz. Every other product scores exactly 0.
+        """
+        hits: Set[int] = set(self.always_scored)
+
+        if quiz.profile_type:
+            hits.update(self.by_profile_type.get(quiz.profile_type, ()))
+        if quiz.age_group:
+            hits.update(self.by_age_group.get(quiz.age_group, ()))
+        for goal in quiz.goals or []:
+            hits.update(self.by_goal.get(goal, ()))
+        for style in quiz.lifestyle or []:
+            hits.update(self.by_lifestyle.get(style, ()))
+
+        diet = quiz.diet or []
+        if "vegan" in diet or "vegetarian" in diet:
+            hits.update(self.veg_friendly)
+
+        if exclude:
+            hits.difference_update(exclude)
+        return sorted(hits)
+
+
+_INDEX: Optional[CatalogIndex] = None
+_INDEX_SOURCE: Optional[List[Dict[str, Any]]] = None
+_INDEX_SIZE = -1
+_INDEX_VERSION = 0
+
+
+def refresh_catalog_index() -> CatalogIndex:
+    """
+    (Re)compile the index from products_catalog.PRODUCT_CATALOG.
+    Call this after editing the catalog in place.
+    """
+    global _INDEX, _INDEX_SOURCE, _INDEX_SIZE, _INDEX_VERSION
+
+    catalog = products_catalog.PRODUCT_CATALOG
+    _INDEX_VERSION += 1
+    _INDEX = CatalogIndex(catalog, version=_INDEX_VERSION, lexicon=get_allergen_lexicon())
+    _INDEX_SOURCE = catalog
+    _INDEX_SIZE = len(catalog)
+    return _INDEX
+
+
+def get_catalog_index() -> CatalogIndex:
+    """
+    Return the compiled index, rebuilding it if the catalog list (or the
+    allergen lexicon) was replaced or resized since the last build.
+    Edits to products in place are not detected (hashing the catalog on
+    every request would cost more than scoring it): call
+    refresh_catalog_index() after them, which also drops the cached
+    recommendation results.
+    """
+    catalog = products_catalog.PRODUCT_CATALOG
+    if (
+        _INDEX is None
+        or catalog is not _INDEX_SOURCE
+        or len(catalog) != _INDEX_SIZE
+        or _INDEX.lexicon is not get_allergen_lexicon()
+    ):
+        return refresh_catalog_index()
+    return _INDEX
+
+
+# Catalog fields that only matter to the scoring code
+_INTERNAL_FIELDS = ("base_priority",)
+
+
+def catalog_metadata(index: CatalogIndex) -> Dict[str, Any]:
+    """
+    Public product metadata for the storefront (everything but the
+    internal scoring fields), tagged with the index version.
+    """
+    return {
+        "version": index.version,
+        "products": [
+            {k: v for k, v in product.items() if k not in _INTERNAL_FIELDS}
+            for product in index.products
+        ],
+    }
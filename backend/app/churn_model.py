@@ -0,0 +1,463 @@
+# backend/app/churn_model.py
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # if library not installed
+
+from .quiz_schema import get_quiz_questions
+
+
+# Path of the model artifact (JSON); NUTRIGUIDE_CHURN_MODEL overrides it
+CHURN_MODEL_ENV = "NUTRIGUIDE_CHURN_MODEL"
+_DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "churn_model.json"
+)
+
+# Same cut-offs as the old heuristic's 0-100 risk_score
+RISK_THRESHOLDS = {"high": 70, "medium": 45}
+
+# score_records batches up to this size are scored row by row in plain
+# Python: building the feature matrix costs more than it saves there
+_SMALL_BATCH = 8
+
+# Record fields the features are computed from (a subset of EXPORT_COLUMNS)
+_CATEGORY_FIELDS = ("profile_type", "age_group")
+_LIST_FIELDS = ("goals", "lifestyle", "diet")
+_NUMERIC_FEATURES = (
+    "bundle_price",
+    "subscription_savings",
+    "price_missing",
+    "num_products",
+    "num_upsell",
+    "has_allergies",
+)
+# Record fields behind the indicator / numeric features
+_INDICATOR_FIELDS = (*_CATEGORY_FIELDS, *_LIST_FIELDS)
+_NUMERIC_SOURCE_FIELDS = ("bundle_price", "bundle_price_subscription", "products", "upsell", "allergies")
+
+
+def default_feature_names() -> List[str]:
+    """
+    "field=value" indicators for every quiz option, then the numeric
+    features. Saved with the model, so a model keeps working (unknown
+    options are ignored) when the quiz schema changes.
+    """
+    options = {q.id: [o.id for o in q.options] for q in get_quiz_questions() if q.options}
+    names = [
+        f"{field}={value}"
+        for field in (*_CATEGORY_FIELDS, *_LIST_FIELDS)
+        for value in options.get(field, [])
+    ]
+    return names + list(_NUMERIC_FEATURES)
+
+
+def _has_allergies(text: Optional[str]) -> bool:
+    text = (text or "").strip().lower()
+    return bool(text) and text not in ("none", "no", "n/a")
+
+
+def _as_price(value: Any) -> float:
+    # None and NaN both mean "no price"
+    return math.nan if value is None else float(value)
+
+
+def _indicator_columns(values: Tuple[Any, ...], col_of: Dict[str, int]) -> Set[int]:
+    """
+    Feature columns set to 1 for one row; `values` are the row's
+    _INDICATOR_FIELDS. Unknown options are ignored, repeats count once.
+    """
+    cols = set()
+    for field, value in zip(_INDICATOR_FIELDS, values):
+        for v in (value or ()) if field in _LIST_FIELDS else (value,):
+            j = col_of.get(f"{field}={v}")
+            if j is not None:
+                cols.add(j)
+    return cols
+
+
+def _numeric_features(
+    price: Any, sub: Any, products: Any, upsell: Any, allergies: Any
+) -> Tuple[float, ...]:
+    """
+    _NUMERIC_FEATURES of one row (the _NUMERIC_SOURCE_FIELDS values).
+    A missing price scores as 0 with price_missing set; savings are 0
+    unless both prices are known.
+    """
+    price = _as_price(price)
+    sub = _as_price(sub)
+    missing = math.isnan(price)
+    savings = 1.0 - sub / price if not missing and price > 0 else 0.0
+    if not math.isfinite(savings):
+        savings = 0.0
+    return (
+        0.0 if missing else price / 100.0,
+        savings,
+        float(missing),
+        float(len(products or ())),
+        float(len(upsell or ())),
+        float(_has_allergies(allergies)),
+    )
+
+
+def featurize(columns: Dict[str, List[Any]], feature_names: List[str]) -> "np.ndarray":
+    """
+    (rows x features) float matrix from a column batch (the
+    iter_column_batches shape, or records_to_columns()). Built row by
+    row with the same helpers ChurnModel uses for single records, so a
+    record scores the same whatever batch it arrives in.
+    """
+    n = len(columns["profile_type"])
+    col_of = {name: j for j, name in enumerate(feature_names)}
+    X = np.zeros((n, len(feature_names)), dtype=np.float64)
+
+    rows, cols = [], []
+    for i, values in enumerate(zip(*(columns[f] for f in _INDICATOR_FIELDS))):
+        for j in _indicator_columns(values, col_of):
+            rows.append(i)
+            cols.append(j)
+    X[rows, cols] = 1.0
+
+    numeric = np.array(
+        [_numeric_features(*values) for values in zip(*(columns[f] for f in _NUMERIC_SOURCE_FIELDS))],
+        dtype=np.float64,
+    ).reshape(n, len(_NUMERIC_FEATURES))
+    for k, name in enumerate(_NUMERIC_FEATURES):
+        if name in col_of:
+            X[:, col_of[name]] = numeric[:, k]
+    return X
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    fields = (*_INDICATOR_FIELDS, *_NUMERIC_SOURCE_FIELDS)
+    return {field: [rec.get(field) for rec in records] for field in fields}
+
+
+def _sigmoid(z: "np.ndarray") -> "np.ndarray":
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+class ChurnModel:
+    """
+    Logistic regression over the record features. Standardization is
+    folded into the weights at load, so scoring a batch is one
+    matrix-vector product plus a sigmoid.
+    """
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+        self.version: str = params["version"]
+        self.feature_names: List[str] = params["features"]
+        self.thresholds = params.get("thresholds", RISK_THRESHOLDS)
+
+        scale = np.asarray(params["scale"], dtype=np.float64)
+        weights = np.asarray(params["weights"], dtype=np.float64) / scale
+        self._weights = weights
+        self._bias = float(params["bias"]) - float(np.asarray(params["mean"]) @ weights)
+        # Plain-Python copies for _risk_of_record
+        self._col_of: Dict[str, int] = {name: j for j, name in enumerate(self.feature_names)}
+        self._weight_list: List[float] = weights.tolist()
+        self._numeric_cols = [self._col_of.get(name) for name in _NUMERIC_FEATURES]
+
+    def predict_proba(self, columns: Dict[str, List[Any]]) -> "np.ndarray":
+        if not columns["profile_type"]:
+            return np.zeros(0)
+        return _sigmoid(featurize(columns, self.feature_names) @ self._weights + self._bias)
+
+    def score_columns(self, columns: Dict[str, List[Any]]) -> Tuple[List[int], List[str]]:
+        """
+        (risk_score 0-100, risk_label) for every row of a column batch;
+        the analytics backends' RiskScorer.
+        """
+        return self.risk_from_proba(self.predict_proba(columns))
+
+    def risk_from_proba(self, proba: "np.ndarray") -> Tuple[List[int], List[str]]:
+        scores = np.rint(proba * 100).astype(np.int64)
+        labels = np.where(
+            scores >= self.thresholds["high"],
+            "high",
+            np.where(scores >= self.thresholds["medium"], "medium", "low"),
+        )
+        return scores.tolist(), labels.tolist()
+
+    def _risk_of_record(self, rec: Dict[str, Any]) -> Tuple[int, str]:
+        """
+        score_columns for a single record: the features come from the
+        same per-row helpers featurize() uses, only the dot product is
+        done in plain Python.
+        """
+        w = self._weight_list
+        z = self._bias
+        for j in _indicator_columns(tuple(rec.get(f) for f in _INDICATOR_FIELDS), self._col_of):
+            z += w[j]
+        numeric = _numeric_features(*(rec.get(f) for f in _NUMERIC_SOURCE_FIELDS))
+        for j, x in zip(self._numeric_cols, numeric):
+            if j is not None:
+                z += w[j] * x
+
+        score = round(100.0 / (1.0 + math.exp(-min(max(z, -35.0), 35.0))))
+        if score >= self.thresholds["high"]:
+            return score, "high"
+        if score >= self.thresholds["medium"]:
+            return score, "medium"
+        return score, "low"
+
+    def score_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Set risk_score / risk_label on analytics records in place.
+        """
+        if len(records) <= _SMALL_BATCH:
+            for rec in records:
+                rec["risk_score"], rec["risk_label"] = self._risk_of_record(rec)
+            return
+        scores, labels = self.score_columns(records_to_columns(records))
+        for rec, score, label in zip(records, scores, labels):
+            rec["risk_score"] = score
+            rec["risk_label"] = label
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            key: self.params.get(key)
+            for key in ("version", "trained_at", "rows", "labels", "metrics")
+        }
+
+
+# ---------- training ----------
+
+
+def synthetic_churn_labels(columns: Dict[str, List[Any]], seed: int = 0) -> "np.ndarray":
+    """
+    Simulated churn outcomes (0/1) until real cancellations are recorded:
+    the signals the old heuristic used (price, subscription savings,
+    intent goals, profile) drive a latent churn probability, plus noise.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(columns["profile_type"])
+    price = np.nan_to_num(np.array(columns["bundle_price"], dtype=np.float64), nan=50.0)
+    sub = np.nan_to_num(np.array(columns["bundle_price_subscription"], dtype=np.float64), nan=50.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        savings = np.nan_to_num(np.where(price > 0, 1.0 - sub / price, 0.0))
+    intent = np.fromiter(
+        (bool({"immunity", "brain", "gut", "energy"} & set(g or ())) for g in columns["goals"]),
+        np.float64,
+        n,
+    )
+    busy = np.fromiter(("busy_parent" in (s or ()) for s in columns["lifestyle"]), np.float64, n)
+    profile = np.fromiter(
+        ({"teen": 0.5, "adult_man": 0.2, "child": -0.3}.get(p, 0.0) for p in columns["profile_type"]),
+        np.float64,
+        n,
+    )
+    logit = (
+        -0.4
+        + 0.05 * (price - 60.0)
+        - 8.0 * (savings - 0.12)
+        - 0.7 * intent
+        + 0.4 * busy
+        + profile
+        + rng.normal(0.0, 0.6, n)
+    )
+    return (rng.random(n) < _sigmoid(logit)).astype(np.float64)
+
+
+def _fit_logistic(
+    X: "np.ndarray", y: "np.ndarray", l2: float, iterations: int
+) -> Tuple["np.ndarray", float]:
+    """
+    L2-regularized logistic regression by Newton's method (IRLS) on
+    standardized features; a few dozen features, so each step is one
+    small linear solve.
+    """
+    n, d = X.shape
+    A = np.hstack([X, np.ones((n, 1))])
+    w = np.zeros(d + 1)
+    reg = np.full(d + 1, l2)
+    reg[-1] = 0.0  # no penalty on the intercept
+    for _ in range(iterations):
+        p = _sigmoid(A @ w)
+        grad = A.T @ (p - y) + reg * w
+        hess = (A * (p * (1 - p))[:, None]).T @ A + np.diag(reg) + 1e-9 * np.eye(d + 1)
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.max(np.abs(step)) < 1e-8:
+            break
+    return w[:-1], float(w[-1])
+
+
+def _auc(y: "np.ndarray", p: "np.ndarray") -> Optional[float]:
+    pos = y == 1
+    n_pos, n_neg = int(pos.sum()), int((~pos).sum())
+    if not n_pos or not n_neg:
+        return None
+    ranks = np.empty(len(p))
+    order = np.argsort(p, kind="stable")
+    ranks[order] = np.arange(1, len(p) + 1)
+    # Average ranks of tied scores
+    _, inverse, counts = np.unique(p[order], return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=ranks[order])
+    ranks[order] = (sums / counts)[inverse]
+    return float((ranks[pos].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def train_churn_model(
+    columns: Dict[str, List[Any]],
+    labels: "np.ndarray",
+    l2: float = 1.0,
+    iterations: int = 50,
+    holdout: float = 0.2,
+    seed: int = 0,
+    label_source: str = "synthetic",
+) -> ChurnModel:
+    """
+    Fit on all rows; metrics (AUC, log loss) come from a fit on the
+    other rows, evaluated on a random `holdout` share.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required to train the churn model")
+    feature_names = default_feature_names()
+    X = featurize(columns, feature_names)
+    y = np.asarray(labels, dtype=np.float64)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = (X - mean) / scale
+
+    rng = np.random.default_rng(seed)
+    test = rng.random(len(y)) < holdout
+    w, b = _fit_logistic(Z[~test], y[~test], l2, iterations)
+    p = np.clip(_sigmoid(Z[test] @ w + b), 1e-12, 1 - 1e-12)
+    metrics = {
+        "holdout_rows": int(test.sum()),
+        "auc": _auc(y[test], p),
+        "log_loss": float(-np.mean(y[test] * np.log(p) + (1 - y[test]) * np.log(1 - p)))
+        if test.any()
+        else None,
+        "base_rate": float(y.mean()) if len(y) else None,
+    }
+
+    w, b = _fit_logistic(Z, y, l2, iterations)
+    params = {
+        "features": feature_names,
+        "mean": [round(float(v), 8) for v in mean],
+        "scale": [round(float(v), 8) for v in scale],
+        "weights": [round(float(v), 8) for v in w],
+        "bias": round(b, 8),
+        "thresholds": dict(RISK_THRESHOLDS),
+    }
+    params["version"] = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:12]
+    params.update(
+        trained_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        rows=len(y),
+        labels=label_source,
+        metrics=metrics,
+    )
+    return ChurnModel(params)
+
+
+def save_churn_model(model: ChurnModel, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model.params, f, indent=1)
+
+
+def load_churn_model(path: str) -> ChurnModel:
+    with open(path, encoding="utf-8") as f:
+        return ChurnModel(json.load(f))
+
+
+_MODEL: Optional[ChurnModel] = None
+_MODEL_LOADED = False
+_MODEL_LOCK = threading.Lock()
+
+
+def get_churn_model() -> Optional[ChurnModel]:
+    """
+    The model artifact, loaded once. None when there is no artifact (or
+    no numpy); risk scores then come from the heuristic in analytics_store.
+    """
+    global _MODEL, _MODEL_LOADED
+    if not _MODEL_LOADED:
+        with _MODEL_LOCK:
+            if not _MODEL_LOADED:
+                _MODEL = None
+                path = os.getenv(CHURN_MODEL_ENV) or _DEFAULT_MODEL_PATH
+                if np is not None and os.path.exists(path):
+                    try:
+                        _MODEL = load_churn_model(path)
+                    except (OSError, ValueError, KeyError) as e:
+                        print("Churn model load error:", e)
+                _MODEL_LOADED = True
+    return _MODEL
+
+
+def reload_churn_model() -> Optional[ChurnModel]:
+    global _MODEL_LOADED
+    with _MODEL_LOCK:
+        _MODEL_LOADED = False
+    return get_churn_model()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Train on the analytics history and write the artifact, e.g.
+
+        python -m app.churn_model
+        python -m app.churn_model --db data/analytics.sqlite3 --out models/churn_model.json
+        python -m app.churn_model --synthetic 50000   # from backend/, no history needed
+
+    Labels are simulated (synthetic_churn_labels) until real churn
+    outcomes are recorded.
+    """
+    parser = argparse.ArgumentParser(description="Train the churn model.")
+    parser.add_argument("--db", help="SQLite analytics file (default: configured store)")
+    parser.add_argument("--synthetic", type=int, help="train on N synthetic records instead")
+    parser.add_argument("--out", default=os.getenv(CHURN_MODEL_ENV) or _DEFAULT_MODEL_PATH)
+    parser.add_argument("--l2", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if np is None:
+        sys.exit("numpy is not installed; pip install numpy")
+
+    if args.synthetic:
+        # Dev-only: the synthetic generator lives with the benchmarks
+        from benchmarks.synthetic import make_records
+
+        columns = records_to_columns(make_records(args.synthetic, seed=args.seed))
+    else:
+        if args.db:
+            from .analytics_backends import SQLiteBackend
+
+            backend = SQLiteBackend(args.db)
+        else:
+            from .analytics_store import get_backend
+
+            backend = get_backend()
+        columns: Dict[str, List[Any]] = {}
+        for batch in backend.iter_column_batches(batch_size=50_000):
+            for col, values in batch.items():
+                columns.setdefault(col, []).extend(values)
+        if len(columns.get("profile_type", [])) < 100:
+            sys.exit("Fewer than 100 analytics records to train on; use --synthetic N")
+
+    labels = synthetic_churn_labels(columns, seed=args.seed)
+    model = train_churn_model(columns, labels, l2=args.l2, seed=args.seed)
+    save_churn_model(model, args.out)
+    print(f"Wrote churn model {model.version} ({model.params['rows']} rows) to {args.out}")
+    print(json.dumps(model.params["metrics"]))
+
+
+if __name__ == "__main__":
+    main()
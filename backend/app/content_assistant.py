@@ -1,9 +1,44 @@
 # backend/app/content_assistant.py
 
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from .recommendation import QuizResponse
 
 
+# Human-readable goals
+GOAL_LABELS = {
+    "immunity": "immunity",
+    "brain_health": "focus and brain health",
+    "gut_health": "gut health",
+    "energy": "steady energy",
+    "sleep": "better sleep",
+}
+
+# Subject line based on profile
+SUBJECTS = {
+    "busy_parent": "A simple vitamin routine for your family",
+    "working_adult": "Your daily nutrient plan, simplified",
+    "student": "Focus, energy, and daily nutrients – tailored for you",
+}
+DEFAULT_SUBJECT = "Your personalized vitamin bundle from NutriGuide"
+
+# Fixed parts of the body (plain text – easy to reuse in email, SMS, in-app)
+_BODY_INTRO = (
+    "Hi there,\n"
+    "\n"
+    "Thanks for taking the NutriGuide quiz. Based on your answers, here’s a simple starting plan:\n"
+    "\n"
+)
+_BODY_OUTRO = (
+    "\n"
+    "\n"
+    "You can always adjust this bundle over time – swap products in or out as your needs change.\n"
+    "\n"
+    "Best,\n"
+    "NutriGuide Assistant"
+)
+
+
 def _nice_list(items: List[str]) -> str:
     items = [x for x in items if x]
     if not items:
@@ -13,6 +48,45 @@ def _nice_list(items: List[str]) -> str:
     return ", ".join(items[:-1]) + " and " + items[-1]
 
 
+# Quiz answers come from a few dozen options, so the sentences built from
+# them are cached instead of re-rendered for every email
+
+
+@lru_cache(maxsize=4096)
+def _goals_phrase(goals: Tuple[str, ...]) -> str:
+    return _nice_list([GOAL_LABELS.get(g, g.replace("_", " ")) for g in goals])
+
+
+@lru_cache(maxsize=4096)
+def _lifestyle_sentence(lifestyle: Tuple[str, ...]) -> str:
+    lifestyle_str = _nice_list(list(lifestyle))
+    if not lifestyle_str:
+        return ""
+    return f"We also considered your lifestyle ({lifestyle_str}) so this feels realistic to stick with."
+
+
+@lru_cache(maxsize=256)
+def _age_sentence(age_group: str) -> str:
+    if not age_group:
+        return ""
+    return f"This bundle is tuned for the {age_group.replace('_', ' ')} age range."
+
+
+def _price_line(pricing: Dict[str, Any]) -> str:
+    bundle_price = pricing.get("bundle_price")
+    sub_price = pricing.get("bundle_price_subscription")
+    savings_pct = pricing.get("subscription_savings_pct")
+
+    if isinstance(bundle_price, (int, float)):
+        line = f"Your bundle comes to around ${bundle_price:.2f} per month"
+        if isinstance(sub_price, (int, float)) and savings_pct is not None:
+            return line + f", or ${sub_price:.2f} with subscription ({savings_pct}% off)."
+        return line + "."
+    if isinstance(sub_price, (int, float)):
+        return f"On subscription, your bundle is around ${sub_price:.2f} per month."
+    return ""
+
+
 def generate_email_copy(quiz: QuizResponse, recommendation: Dict[str, Any]) -> Dict[str, Any]:
     """
     Generate simple, template-based engagement content
@@ -20,42 +94,30 @@ def generate_email_copy(quiz: QuizResponse, recommendation: Dict[str, Any]) -> D
 
     No LLM required – safe even when your OpenAI quota is out.
     """
-
-    profile = quiz.profile_type or "family"
-    age_group = quiz.age_group or ""
-    goals = quiz.goals or []
-    lifestyle = quiz.lifestyle or []
-
+    return email_copy(
+        quiz.profile_type, quiz.age_group, quiz.goals, quiz.lifestyle, recommendation
+    )
+
+
+def email_copy(
+    profile_type: Optional[str],
+    age_group: Optional[str],
+    goals: Optional[List[str]],
+    lifestyle: Optional[List[str]],
+    recommendation: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    generate_email_copy on plain quiz fields (validated by the caller).
+    """
     products = recommendation.get("products") or []
     product_details = recommendation.get("product_details") or []
-    pricing = recommendation.get("pricing") or {}
 
     # Pick 1–2 headline products
     main_products = products[:2] if products else [p["name"] for p in product_details[:2]]
     main_products_str = _nice_list(main_products)
+    goals_str = _goals_phrase(tuple(goals or ()))
 
-    # Human-readable goals sentence
-    goal_labels_map = {
-        "immunity": "immunity",
-        "brain_health": "focus and brain health",
-        "gut_health": "gut health",
-        "energy": "steady energy",
-        "sleep": "better sleep",
-    }
-    goal_labels = [goal_labels_map.get(g, g.replace("_", " ")) for g in goals]
-    goals_str = _nice_list(goal_labels)
-
-    lifestyle_str = _nice_list(lifestyle)
-
-    # Subject line based on profile
-    if profile == "busy_parent":
-        subject = "A simple vitamin routine for your family"
-    elif profile == "working_adult":
-        subject = "Your daily nutrient plan, simplified"
-    elif profile == "student":
-        subject = "Focus, energy, and daily nutrients – tailored for you"
-    else:
-        subject = "Your personalized vitamin bundle from NutriGuide"
+    subject = SUBJECTS.get(profile_type or "family", DEFAULT_SUBJECT)
 
     # Preview line
     if goals_str:
@@ -63,81 +125,34 @@ def generate_email_copy(quiz: QuizResponse, recommendation: Dict[str, Any]) -> D
     else:
         preview_line = f"We picked {main_products_str} based on your quiz answers."
 
-    # Price snippet if available
-    bundle_price = pricing.get("bundle_price")
-    sub_price = pricing.get("bundle_price_subscription")
-    savings_pct = pricing.get("subscription_savings_pct")
-
-    price_line = ""
-    if isinstance(bundle_price, (int, float)):
-        price_line = f"Your bundle comes to around ${bundle_price:.2f} per month"
-        if isinstance(sub_price, (int, float)) and savings_pct is not None:
-            price_line += f", or ${sub_price:.2f} with subscription ({savings_pct}% off)."
-        else:
-            price_line += "."
-    elif isinstance(sub_price, (int, float)):
-        price_line = f"On subscription, your bundle is around ${sub_price:.2f} per month."
-
-    # Build bullet list of products with 1–2 reasons each
+    # Bullet list of products with 1–2 reasons each
     bullets = []
     for p in product_details:
-        reasons = p.get("reasons") or []
-        short_reasons = reasons[:2]
-        reason_text = " ".join(short_reasons)
+        reason_text = " ".join((p.get("reasons") or [])[:2])
         if reason_text:
             bullets.append(f"- {p['name']}: {reason_text}")
         else:
             bullets.append(f"- {p['name']}")
-
     if not bullets and products:
         bullets = [f"- {name}" for name in products]
 
-    bullets_text = "\n".join(bullets)
-
-    # Lifestyle sentence
-    lifestyle_sentence = ""
-    if lifestyle_str:
-        lifestyle_sentence = f"We also considered your lifestyle ({lifestyle_str}) so this feels realistic to stick with."
-
-    # Age sentence
-    age_sentence = ""
-    if age_group:
-        age_sentence = f"This bundle is tuned for the {age_group.replace('_', ' ')} age range."
-
-    # Final body text (plain text – easy to reuse in email, SMS, in-app)
-    body_parts = [
-        "Hi there,",
-        "",
-        "Thanks for taking the NutriGuide quiz. Based on your answers, here’s a simple starting plan:",
-        "",
-        bullets_text,
-    ]
-
-    if age_sentence:
-        body_parts.extend(["", age_sentence])
-    if lifestyle_sentence:
-        body_parts.extend(["", lifestyle_sentence])
-    if price_line:
-        body_parts.extend(["", price_line])
-
+    body = [_BODY_INTRO, "\n".join(bullets)]
+    for sentence in (
+        _age_sentence(age_group or ""),
+        _lifestyle_sentence(tuple(lifestyle or ())),
+        _price_line(recommendation.get("pricing") or {}),
+    ):
+        if sentence:
+            body.append("\n\n")
+            body.append(sentence)
     if goals_str:
-        body_parts.extend([
-            "",
-            f"The goal is to support {goals_str} in a way that fits your day-to-day, without adding more overwhelm.",
-        ])
-
-    body_parts.extend([
-        "",
-        "You can always adjust this bundle over time – swap products in or out as your needs change.",
-        "",
-        "Best,",
-        "NutriGuide Assistant",
-    ])
-
-    body_text = "\n".join(body_parts)
+        body.append(
+            f"\n\nThe goal is to support {goals_str} in a way that fits your day-to-day, without adding more overwhelm."
+        )
+    body.append(_BODY_OUTRO)
 
     return {
         "subject": subject,
         "preview_line": preview_line,
-        "body_text": body_text,
+        "body_text": "".join(body),
     }
@@ -0,0 +1,135 @@
+# backend/app/explanation_store.py
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+# Path of the on-disk explanation cache; set to "" to disable it
+EXPLANATION_DB_ENV = "NUTRIGUIDE_EXPLANATION_DB"
+EXPLANATION_DB_MAX_ENV = "NUTRIGUIDE_EXPLANATION_DB_MAX"
+
+_DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "explanations.sqlite3",
+)
+
+
+class ExplanationStore:
+    """
+    Content-addressed, size-bounded explanation cache in a local SQLite file.
+
+    Keys are explanation ids (hash of model + normalized prompt), values are
+    the generated texts. When the table grows past max_entries, the least
+    recently used ~10% are deleted in one statement.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50_000):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS explanations (
+                    id TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_explanations_last_used "
+                "ON explanations(last_used_at)"
+            )
+            self._size = self._conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, explanation_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM explanations WHERE id = ?", (explanation_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE explanations SET last_used_at = ?, hits = hits + 1 WHERE id = ?",
+                (time.time(), explanation_id),
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, explanation_id: str, text: str) -> None:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO explanations (id, text, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (explanation_id, text, now, now),
+            )
+            self._size += cur.rowcount
+            if self._size > self.max_entries:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        # Drop down to ~90% of capacity so eviction doesn't run on every insert
+        excess = self._size - int(self.max_entries * 0.9)
+        cur = self._conn.execute(
+            "DELETE FROM explanations WHERE id IN "
+            "(SELECT id FROM explanations ORDER BY last_used_at LIMIT ?)",
+            (excess,),
+        )
+        self._size -= cur.rowcount
+        self.evictions += cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "size": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_explanation_store() -> Optional[ExplanationStore]:
+    """
+    Open the store configured by NUTRIGUIDE_EXPLANATION_DB
+    (default backend/data/explanations.sqlite3), or None if disabled
+    or the file can't be opened.
+    """
+    path = os.getenv(EXPLANATION_DB_ENV, _DEFAULT_DB_PATH)
+    if not path:
+        return None
+    try:
+        max_entries = int(os.getenv(EXPLANATION_DB_MAX_ENV, "50000"))
+    except ValueError:
+        max_entries = 50_000
+    try:
+        return ExplanationStore(path, max_entries=max_entries)
+    except (sqlite3.Error, OSError) as e:
+        print("Explanation store disabled:", e)
+        return None
@@ -1,10 +1,126 @@
+import asyncio
+import hashlib
 import os
-from typing import List, Optional, Dict, Any
+import weakref
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
+
+from .result_cache import cache_from_env
+from .explanation_store import ExplanationStore, open_explanation_store
+from .metrics import LLM_EXPLANATIONS, LLM_FALLBACKS
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
 except ImportError:
     OpenAI = None  # if library not installed
+    AsyncOpenAI = None
+
+
+LLM_MODEL = "gpt-4o-mini"
+
+# Async path: how long the endpoint waits for a completion before it
+# answers with the fallback text, and how many completions run at once.
+LLM_DEADLINE_ENV = "NUTRIGUIDE_LLM_DEADLINE_SECONDS"
+LLM_CONCURRENCY_ENV = "NUTRIGUIDE_LLM_MAX_CONCURRENCY"
+
+# Real LLM explanations, keyed on explanation_id (a hash of the prompt).
+# Kept apart from the scoring cache so explanations can stay per-user.
+# In-process LRU in front of the persistent on-disk store.
+_EXPLANATION_CACHE = cache_from_env("NUTRIGUIDE_EXPLANATION_CACHE", maxsize=2048, ttl=3600)
+_STORE: Optional[ExplanationStore] = None
+_STORE_OPENED = False
+
+# explanation_id -> completion still running in the background
+_PENDING: Dict[str, "asyncio.Task"] = {}
+
+# explanation_id -> (prompt, fallback text) for explanations that the
+# client will stream via SSE
+_STREAM_HANDLES = cache_from_env("NUTRIGUIDE_EXPLANATION_STREAM", maxsize=4096, ttl=600)
+
+_ASYNC_CLIENT = None
+# Event loop -> concurrency limit; asyncio primitives are bound to the
+# loop that first uses them
+_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Fallback text served because no LLM is configured, the completion
+# failed, or the async deadline passed (the completion keeps running)
+_FALLBACK_UNAVAILABLE = LLM_FALLBACKS.labels("unavailable")
+_FALLBACK_ERROR = LLM_FALLBACKS.labels("error")
+_FALLBACK_TIMEOUT = LLM_FALLBACKS.labels("timeout")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _get_store() -> Optional[ExplanationStore]:
+    global _STORE, _STORE_OPENED
+    if not _STORE_OPENED:
+        _STORE = open_explanation_store()
+        _STORE_OPENED = True
+    return _STORE
+
+
+def _store_get(explanation_id: str) -> Optional[str]:
+    store = _get_store()
+    if store is None:
+        return None
+    text = store.get(explanation_id)
+    if text is not None:
+        _EXPLANATION_CACHE.set(explanation_id, text)
+    return text
+
+
+def _store_set(explanation_id: str, text: str) -> None:
+    store = _get_store()
+    if store is not None:
+        store.set(explanation_id, text)
+
+
+def _store_disabled() -> bool:
+    return _STORE_OPENED and _STORE is None
+
+
+def _cache_get(explanation_id: str) -> Optional[str]:
+    text = _EXPLANATION_CACHE.get(explanation_id)
+    if text is None:
+        text = _store_get(explanation_id)
+    return text
+
+
+def _cache_set(explanation_id: str, text: str) -> None:
+    _EXPLANATION_CACHE.set(explanation_id, text)
+    _store_set(explanation_id, text)
+
+
+# The async paths only touch the in-memory LRU on the event loop; the
+# SQLite store (opening it included) is read and written in a worker
+# thread so a slow disk doesn't stall other requests.
+
+
+async def _cache_get_async(explanation_id: str) -> Optional[str]:
+    text = _EXPLANATION_CACHE.get(explanation_id)
+    if text is None and not _store_disabled():
+        text = await asyncio.to_thread(_store_get, explanation_id)
+    return text
+
+
+async def _cache_set_async(explanation_id: str, text: str) -> None:
+    _EXPLANATION_CACHE.set(explanation_id, text)
+    if not _store_disabled():
+        await asyncio.to_thread(_store_set, explanation_id, text)
+
+
+def get_explanation_cache_stats() -> Dict[str, Any]:
+    stats = _EXPLANATION_CACHE.stats()
+    stats["pending"] = len(_PENDING)
+    store = _get_store()
+    stats["disk"] = store.stats() if store is not None else None
+    return stats
 
 
 def _fallback_explanation(quiz, product_details: List[Dict[str, Any]]) -> str:
@@ -34,22 +150,11 @@ def _fallback_explanation(quiz, product_details: List[Dict[str, Any]]) -> str:
     return text
 
 
-def generate_llm_explanation(
-    quiz,
-    product_details: List[Dict[str, Any]],
-) -> str:
+def _build_prompt(quiz, product_details: List[Dict[str, Any]]) -> str:
     """
-    Uses OpenAI if available; otherwise falls back to a rule-based explanation.
-    This function ALWAYS returns a string (never None), so the API response
-    will always include 'llm_explanation'.
+    User prompt for the explanation: profile bits + selected products
+    with their top reasons.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or OpenAI is None:
-        # No key or library → fallback only
-        return _fallback_explanation(quiz, product_details)
-
-    client = OpenAI(api_key=api_key)
-
     # Build compact profile text
     profile_bits = []
     if quiz.profile_type:
@@ -91,22 +196,354 @@ Write a short, friendly explanation (120–180 words) in simple language that:
 
 Tone: warm, reassuring, and easy to understand. Do NOT mention scores.
 """
+    return user_prompt
+
+
+def _completion_kwargs(user_prompt: str) -> Dict[str, Any]:
+    return dict(
+        model=LLM_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a careful, safety-conscious nutrition assistant.",
+            },
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.7,
+        max_tokens=220,
+    )
+
+
+def explanation_id_for_prompt(user_prompt: str) -> str:
+    """
+    Content address of an explanation: hash of the model and the prompt
+    with whitespace normalized, so the same prompt always maps to the
+    same id (across processes and restarts).
+    """
+    normalized = " ".join(user_prompt.split())
+    return hashlib.sha256(f"{LLM_MODEL}\n{normalized}".encode("utf-8")).hexdigest()[:32]
+
+
+def llm_available() -> bool:
+    """
+    True if the async path can call the API (key set, and the library
+    installed or a stub client injected).
+    """
+    return bool(os.getenv("OPENAI_API_KEY")) and (
+        AsyncOpenAI is not None or _ASYNC_CLIENT is not None
+    )
+
+
+def generate_llm_explanation(
+    quiz,
+    product_details: List[Dict[str, Any]],
+) -> str:
+    """
+    Uses OpenAI if available; otherwise falls back to a rule-based explanation.
+    This function ALWAYS returns a string (never None), so the API response
+    will always include 'llm_explanation'.
+
+    Blocking; async endpoints should use generate_llm_explanation_async.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key or OpenAI is None:
+        # No key or library → fallback only
+        LLM_EXPLANATIONS.labels("sync", "unavailable").inc()
+        _FALLBACK_UNAVAILABLE.inc()
+        return _fallback_explanation(quiz, product_details)
+
+    user_prompt = _build_prompt(quiz, product_details)
+    explanation_id = explanation_id_for_prompt(user_prompt)
+    cached = _cache_get(explanation_id)
+    if cached is not None:
+        LLM_EXPLANATIONS.labels("sync", "cached").inc()
+        return cached
+
+    client = OpenAI(api_key=api_key)
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a careful, safety-conscious nutrition assistant.",
-                },
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.7,
-            max_tokens=220,
-        )
-        return completion.choices[0].message.content.strip()
+        completion = client.chat.completions.create(**_completion_kwargs(user_prompt))
+        text = completion.choices[0].message.content.strip()
+        _cache_set(explanation_id, text)
+        LLM_EXPLANATIONS.labels("sync", "generated").inc()
+        return text
     except Exception as e:
         # If quota/any error → log and fall back
         print("LLM explanation error:", e)
+        LLM_EXPLANATIONS.labels("sync", "error").inc()
+        _FALLBACK_ERROR.inc()
         return _fallback_explanation(quiz, product_details)
+
+
+def set_async_client(client) -> None:
+    """
+    Override the async OpenAI client (e.g. with a local stub).
+    Pass None to go back to the default client.
+    """
+    global _ASYNC_CLIENT
+    _ASYNC_CLIENT = client
+
+
+def _get_async_client():
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None and AsyncOpenAI is not None:
+        # One client per process so HTTP connections get reused
+        _ASYNC_CLIENT = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _ASYNC_CLIENT
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """
+    Concurrency limit of the running event loop, created on first use
+    so a second loop (a new TestClient, asyncio.run) never waits on one
+    bound to a loop that is gone.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, int(_env_float(LLM_CONCURRENCY_ENV, 8))))
+        _SEMAPHORES[loop] = semaphore
+    return semaphore
+
+
+async def _complete_async(explanation_id: str, user_prompt: str) -> Optional[str]:
+    """
+    Run one completion under the concurrency limit and cache the text.
+    Returns None on any error.
+    """
+    try:
+        async with _get_semaphore():
+            completion = await _get_async_client().chat.completions.create(
+                **_completion_kwargs(user_prompt)
+            )
+        text = completion.choices[0].message.content.strip()
+        await _cache_set_async(explanation_id, text)
+        return text
+    except Exception as e:
+        print("LLM explanation error:", e)
+        return None
+
+
+def _start_completion(explanation_id: str, user_prompt: str) -> "asyncio.Task":
+    """
+    Start (or join) the background completion for this explanation_id.
+    """
+    task = _PENDING.get(explanation_id)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(
+            _complete_async(explanation_id, user_prompt)
+        )
+        _PENDING[explanation_id] = task
+        task.add_done_callback(lambda _: _PENDING.pop(explanation_id, None))
+    return task
+
+
+async def generate_llm_explanation_async(
+    quiz,
+    product_details: List[Dict[str, Any]],
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Non-blocking explanation with a latency budget.
+
+    Returns {"llm_explanation", "llm_explanation_id", "llm_explanation_status"}:
+    - "complete": LLM text (fresh or cached)
+    - "pending":  deadline passed; fallback text now, the completion keeps
+                  running and can be fetched later with get_explanation()
+    - "fallback": no key / library, or the completion failed
+    """
+    if not llm_available():
+        LLM_EXPLANATIONS.labels("async", "unavailable").inc()
+        _FALLBACK_UNAVAILABLE.inc()
+        return {
+            "llm_explanation": _fallback_explanation(quiz, product_details),
+            "llm_explanation_id": None,
+            "llm_explanation_status": "fallback",
+        }
+
+    user_prompt = _build_prompt(quiz, product_details)
+    explanation_id = explanation_id_for_prompt(user_prompt)
+
+    cached = await _cache_get_async(explanation_id)
+    if cached is not None:
+        LLM_EXPLANATIONS.labels("async", "cached").inc()
+        return {
+            "llm_explanation": cached,
+            "llm_explanation_id": explanation_id,
+            "llm_explanation_status": "complete",
+        }
+
+    if deadline is None:
+        deadline = _env_float(LLM_DEADLINE_ENV, 3.0)
+
+    task = _start_completion(explanation_id, user_prompt)
+    try:
+        # shield: a timeout must not cancel the shared background completion
+        text = await asyncio.wait_for(asyncio.shield(task), timeout=deadline)
+        status = "complete" if text else "fallback"
+    except asyncio.TimeoutError:
+        text = None
+        status = "pending"
+
+    if status == "complete":
+        LLM_EXPLANATIONS.labels("async", "generated").inc()
+    elif status == "pending":
+        LLM_EXPLANATIONS.labels("async", "timeout").inc()
+        _FALLBACK_TIMEOUT.inc()
+    else:
+        LLM_EXPLANATIONS.labels("async", "error").inc()
+        _FALLBACK_ERROR.inc()
+
+    return {
+        "llm_explanation": text or _fallback_explanation(quiz, product_details),
+        "llm_explanation_id": explanation_id,
+        "llm_explanation_status": status,
+    }
+
+
+async def get_explanation(explanation_id: str) -> Dict[str, Any]:
+    """
+    Look up an explanation started by generate_llm_explanation_async.
+    Status is "complete", "pending" or "unknown" (never started, failed
+    or expired).
+    """
+    text = await _cache_get_async(explanation_id)
+    if text is not None:
+        return {"status": "complete", "llm_explanation": text}
+    if explanation_id in _PENDING:
+        return {"status": "pending", "llm_explanation": None}
+    return {"status": "unknown", "llm_explanation": None}
+
+
+async def warm_explanation(quiz, product_details: List[Dict[str, Any]]) -> str:
+    """
+    Make sure the explanation for this quiz + bundle is cached, waiting
+    for the completion if needed. Returns "cached", "generated",
+    "failed" or "unavailable" (no key / library).
+    """
+    if not llm_available():
+        return "unavailable"
+
+    user_prompt = _build_prompt(quiz, product_details)
+    explanation_id = explanation_id_for_prompt(user_prompt)
+    if await _cache_get_async(explanation_id) is not None:
+        return "cached"
+
+    text = await _start_completion(explanation_id, user_prompt)
+    return "generated" if text else "failed"
+
+
+async def register_explanation_stream(
+    quiz, product_details: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Don't call the LLM now; hand back a handle the client can stream from
+    (stream_explanation). Cached explanations are returned directly.
+
+    Status is "complete" (cached text), "streaming" (fallback text for
+    now, stream the real one) or "fallback" (no LLM available).
+    """
+    fallback = _fallback_explanation(quiz, product_details)
+    if not llm_available():
+        LLM_EXPLANATIONS.labels("stream", "unavailable").inc()
+        _FALLBACK_UNAVAILABLE.inc()
+        return {
+            "llm_explanation": fallback,
+            "llm_explanation_id": None,
+            "llm_explanation_status": "fallback",
+        }
+
+    user_prompt = _build_prompt(quiz, product_details)
+    explanation_id = explanation_id_for_prompt(user_prompt)
+
+    cached = await _cache_get_async(explanation_id)
+    if cached is not None:
+        LLM_EXPLANATIONS.labels("stream", "cached").inc()
+        return {
+            "llm_explanation": cached,
+            "llm_explanation_id": explanation_id,
+            "llm_explanation_status": "complete",
+        }
+
+    LLM_EXPLANATIONS.labels("stream", "streaming").inc()
+    _STREAM_HANDLES.set(explanation_id, (user_prompt, fallback))
+    return {
+        "llm_explanation": fallback,
+        "llm_explanation_id": explanation_id,
+        "llm_explanation_status": "streaming",
+    }
+
+
+async def stream_explanation(explanation_id: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Async iterator of (event, text) pairs for an explanation id:
+    - ("token", piece)  text as it is generated (or the cached text at once)
+    - ("fallback", text) the stream failed; replace anything shown so far
+    - ("done", "")       end of stream
+
+    Raises KeyError for ids that were never registered or have expired.
+    """
+    handle = _STREAM_HANDLES.get(explanation_id)
+    if (
+        handle is None
+        and explanation_id not in _PENDING
+        and await _cache_get_async(explanation_id) is None
+    ):
+        raise KeyError(explanation_id)
+    return _stream_events(explanation_id, handle)
+
+
+async def _stream_events(
+    explanation_id: str, handle: Optional[Tuple[str, str]]
+) -> AsyncIterator[Tuple[str, str]]:
+    cached = await _cache_get_async(explanation_id)
+    if cached is not None:
+        yield "token", cached
+        yield "done", ""
+        return
+
+    task = _PENDING.get(explanation_id)
+    if task is not None or handle is None:
+        # A non-streaming completion is already running → wait for it
+        text = await asyncio.shield(task) if task is not None else None
+        if text:
+            yield "token", text
+        elif handle is not None:
+            _FALLBACK_ERROR.inc()
+            yield "fallback", handle[1]
+        yield "done", ""
+        return
+
+    user_prompt, fallback = handle
+    if not llm_available():
+        _FALLBACK_UNAVAILABLE.inc()
+        yield "fallback", fallback
+        yield "done", ""
+        return
+
+    parts: List[str] = []
+    try:
+        async with _get_semaphore():
+            stream = await _get_async_client().chat.completions.create(
+                **_completion_kwargs(user_prompt), stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield "token", delta
+    except Exception as e:
+        # Quota / network error partway → the client swaps in the fallback
+        print("LLM explanation stream error:", e)
+        _FALLBACK_ERROR.inc()
+        yield "fallback", fallback
+        yield "done", ""
+        return
+
+    text = "".join(parts).strip()
+    if text:
+        await _cache_set_async(explanation_id, text)
+    else:
+        _FALLBACK_ERROR.inc()
+        yield "fallback", fallback
+    yield "done", ""
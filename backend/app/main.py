@@ -1,31 +1,111 @@
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import Response, StreamingResponse
 
 from dotenv import load_dotenv
 
 from .quiz_schema import Question, get_quiz_questions
 from .recommendation import QuizResponse as QuizAnswers  # request model alias
-from .recommend_products import get_recommendation
+from .recommendation import RecommendationResult
+from .json_response import FastJSONResponse
+from .recommend_products import (
+    get_recommendation_async,
+    get_recommendation_cache_stats,
+    prewarm_llm_explanations,
+)
+from .llm_explainer import (
+    get_explanation,
+    get_explanation_cache_stats,
+    stream_explanation as stream_llm_explanation,
+)
+from .catalog_index import catalog_metadata, get_catalog_index
+from .static_payloads import StaticPayload, get_static_payload_stats, static_payload
+from .batch_recommend import stream_batch_recommendations, shutdown_pool
 from .analytics_store import (
-    log_recommendation,
+    log_recommendation_async,
     get_recent_recommendations,
     get_segments_summary,
+    get_windowed_summary,
+    get_top_segments,
+    start_analytics_pipeline,
+    stop_analytics_pipeline,
+    get_analytics_pipeline_stats,
+    get_rollups,
+    get_backend,
+    add_commit_listener,
+    remove_commit_listener,
+    start_churn_rescore,
+    get_churn_rescore_stats,
+)
+from .churn_model import get_churn_model, records_to_columns
+from .retention_flows import get_retention_engine
+from .traffic_capture import (
+    capture_request,
+    get_traffic_capture_stats,
+    start_traffic_capture,
+    stop_traffic_capture,
 )
-from pydantic import BaseModel
+from .admin_stream import broadcaster_from_env, sse_frame
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, REGISTRY, render_metrics
+from .analytics_export import (
+    COLUMNAR_FORMATS,
+    columnar_available,
+    iter_columnar,
+    iter_csv,
+    normalize_range,
+)
+from pydantic import BaseModel, Field
 from .content_assistant import generate_email_copy
+from .bulk_content import MAX_BODY_BYTES as BULK_MAX_BODY_BYTES, stream_bulk_emails
 
 
 # Load environment variables (for OpenAI key etc.)
 load_dotenv()
 
 
+admin_broadcaster = broadcaster_from_env(get_segments_summary, get_recent_recommendations)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the catalog index and the static JSON payloads once,
+    # before the first request
+    get_catalog_index()
+    _quiz_questions_payload()
+    _catalog_payload()
+    # Analytics records are written by a background batch writer
+    start_analytics_pipeline()
+    # ...and pushed to admin dashboards subscribed to /admin/stream
+    admin_broadcaster.start()
+    add_commit_listener(admin_broadcaster.publish)
+    # Load the churn model; stored records scored by another model version
+    # are re-scored in the background
+    get_churn_model()
+    start_churn_rescore()
+    # Retention flows react to committed records (risk label, profile, products)
+    retention = get_retention_engine()
+    retention.start()
+    add_commit_listener(retention.on_records)
+    # Optional capture of /quiz/recommend traffic (NUTRIGUIDE_TRAFFIC_CAPTURE)
+    start_traffic_capture()
+    yield
+    stop_traffic_capture()
+    stop_analytics_pipeline()
+    remove_commit_listener(admin_broadcaster.publish)
+    remove_commit_listener(retention.on_records)
+    retention.stop()
+    await admin_broadcaster.stop()
+    shutdown_pool()
+
+
 app = FastAPI(
     title="NutriGuide AI Backend",
     version="0.1.0",
     description="Quiz + recommendation + admin analytics backend for NutriGuide AI.",
+    lifespan=lifespan,
 )
 
 # CORS: allow your Vite dev server
@@ -42,36 +122,223 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histogram (nutriguide_http_request_duration_seconds)
+app.add_middleware(MetricsMiddleware)
+
 
-@app.get("/health")
+@app.get("/health", response_class=FastJSONResponse)
 def health_check():
     return {"status": "ok", "message": "NutriGuide backend is running"}
 
 
+def _collect_app_metrics():
+    """
+    Cache counters and queue depths, read from the owning modules' stats
+    at scrape time.
+    """
+    caches = {
+        "recommendations": get_recommendation_cache_stats(),
+        "llm_explanations": get_explanation_cache_stats(),
+    }
+    for field in ("hits", "misses", "evictions"):
+        yield (
+            f"nutriguide_cache_{field}_total",
+            "counter",
+            f"Result cache {field} by cache.",
+            [({"cache": name}, stats[field]) for name, stats in caches.items()],
+        )
+    yield (
+        "nutriguide_cache_entries",
+        "gauge",
+        "Entries held by each result cache.",
+        [({"cache": name}, stats["size"]) for name, stats in caches.items()],
+    )
+
+    pipeline = get_analytics_pipeline_stats() or {}
+    capture = get_traffic_capture_stats() or {}
+    stream = admin_broadcaster.stats()
+    yield (
+        "nutriguide_queue_depth",
+        "gauge",
+        "Items waiting in each background queue.",
+        [
+            ({"queue": "analytics"}, pipeline.get("queue_depth")),
+            ({"queue": "traffic_capture"}, capture.get("queue_depth")),
+            ({"queue": "retention_pending"}, get_retention_engine().pending()),
+            ({"queue": "llm_pending"}, caches["llm_explanations"]["pending"]),
+        ],
+    )
+    yield (
+        "nutriguide_queue_dropped_total",
+        "counter",
+        "Items dropped because a background queue was full.",
+        [
+            ({"queue": "analytics"}, pipeline.get("dropped")),
+            ({"queue": "traffic_capture"}, capture.get("dropped")),
+            ({"queue": "retention_pending"}, get_retention_engine().dropped),
+        ],
+    )
+    yield (
+        "nutriguide_analytics_committed_total",
+        "counter",
+        "Analytics records committed by the background writer.",
+        [({}, pipeline.get("committed"))],
+    )
+    yield (
+        "nutriguide_analytics_commit_lag_seconds",
+        "gauge",
+        "Enqueue-to-commit lag of the last analytics batch.",
+        [({}, pipeline["last_lag_ms"] / 1e3 if pipeline.get("last_lag_ms") is not None else None)],
+    )
+    yield (
+        "nutriguide_admin_stream_subscribers",
+        "gauge",
+        "Connected /admin/stream clients.",
+        [({}, stream["subscribers"])],
+    )
+
+
+REGISTRY.register_collector(_collect_app_metrics)
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus text format: per-stage recommendation latency, per-route
+    request latency, LLM explanation outcomes and fallbacks, cache hit /
+    miss counters and background queue depths.
+    """
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+def _quiz_questions_payload() -> StaticPayload:
+    return static_payload(
+        "quiz_questions",
+        lambda: [q.model_dump(mode="json") for q in get_quiz_questions()],
+    )
+
+
+def _catalog_payload() -> StaticPayload:
+    index = get_catalog_index()
+    return static_payload(
+        "catalog_products",
+        lambda: catalog_metadata(index),
+        version=index.version,
+        cache_control="public, max-age=300",
+    )
+
+
 @app.get("/quiz/questions", response_model=List[Question])
-def get_questions():
+async def get_questions(request: Request):
     """
     Return the list of quiz questions (schema defined in quiz_schema.py).
+
+    Served from JSON encoded once at startup, with a strong ETag
+    (If-None-Match -> 304), Cache-Control and a gzip / brotli variant.
+    """
+    return _quiz_questions_payload().response(request)
+
+
+@app.get("/catalog/products")
+async def get_catalog_products(request: Request):
+    """
+    Product metadata (names, prices, age / goal / diet tags, allergy
+    contraindications). Pre-encoded and ETag-cached like /quiz/questions;
+    re-encoded only when the catalog is reloaded.
     """
-    return get_quiz_questions()
+    return _catalog_payload().response(request)
 
 
-@app.post("/quiz/recommend")
-async def recommend_products_endpoint(quiz: QuizAnswers):
+@app.post("/quiz/recommend", response_model=RecommendationResult, response_model_exclude_none=True)
+async def recommend_products_endpoint(quiz: QuizAnswers, stream_explanation: bool = False):
     """
     Main recommendation endpoint:
     - Accepts quiz answers (QuizAnswers model)
     - Calls scoring engine to pick products + pricing
     - Logs the result for admin analytics
     - Returns bundle + pricing + safety + explanation
+
+    The LLM explanation has a latency budget; when it runs out the fallback
+    text is returned and the real one can be polled at
+    /quiz/explanation/{llm_explanation_id}.
+
+    With ?stream_explanation=true the bundle is returned immediately and the
+    explanation is streamed from
+    /quiz/recommend/{llm_explanation_id}/explanation/stream.
     """
-    result = get_recommendation(quiz)
+    capture_request("/quiz/recommend", quiz, {"stream_explanation": True} if stream_explanation else None)
+    result = await get_recommendation_async(quiz, stream_explanation=stream_explanation)
     # log for admin / analytics dashboard
-    log_recommendation(quiz, result)
+    await log_recommendation_async(quiz, result)
     return result
 
 
-@app.get("/admin/recent-recommendations")
+@app.get("/quiz/explanation/{explanation_id}", response_class=FastJSONResponse)
+async def get_explanation_endpoint(explanation_id: str):
+    """
+    Fetch an LLM explanation that was still pending when
+    /quiz/recommend answered.
+    """
+    explanation = await get_explanation(explanation_id)
+    if explanation["status"] == "unknown":
+        raise HTTPException(status_code=404, detail="Unknown or expired explanation id")
+    return explanation
+
+
+@app.get("/quiz/recommend/{explanation_id}/explanation/stream")
+async def stream_explanation_endpoint(explanation_id: str):
+    """
+    Server-Sent Events stream of an LLM explanation:
+    - event "token":    {"text": "..."} pieces to append
+    - event "fallback": {"text": "..."} streaming failed, show this instead
+    - event "done":     end of stream
+    """
+    try:
+        events = await stream_llm_explanation(explanation_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or expired explanation id")
+
+    async def _body():
+        async for event, text in events:
+            yield sse_frame(event, {"text": text} if event != "done" else {})
+
+    return StreamingResponse(
+        _body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class BatchRecommendRequest(BaseModel):
+    quizzes: List[QuizAnswers]
+    chunk_size: int = 100
+    include_explanation: bool = False  # skip generate_llm_explanation by default
+    log_analytics: bool = False  # keep bulk jobs out of the admin dashboard
+    use_process_pool: bool = False  # needs NUTRIGUIDE_BATCH_WORKERS > 0
+
+
+@app.post("/quiz/recommend/batch")
+async def recommend_products_batch_endpoint(payload: BatchRecommendRequest):
+    """
+    Bulk recommendation endpoint for campaign re-scoring:
+    - Accepts many quiz answers in one request
+    - Scores them in chunks (optionally on a process pool)
+    - Streams results back as NDJSON, one {"index", "result"} per line,
+      as each chunk finishes
+    """
+    return StreamingResponse(
+        stream_batch_recommendations(
+            payload.quizzes,
+            chunk_size=payload.chunk_size,
+            include_explanation=payload.include_explanation,
+            log_analytics=payload.log_analytics,
+            use_process_pool=payload.use_process_pool,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/admin/recent-recommendations", response_class=FastJSONResponse)
 async def admin_recent_recommendations():
     """
     Return the most recent quiz + recommendation records
@@ -80,71 +347,193 @@ async def admin_recent_recommendations():
     return {"items": get_recent_recommendations()}
 
 
-@app.get("/admin/segments-summary")
-async def admin_segments_summary():
+@app.get("/admin/segments-summary", response_class=FastJSONResponse)
+async def admin_segments_summary(
+    window: Optional[str] = None,
+    granularity: Optional[str] = None,
+):
     """
     Aggregate basic stats (by profile type, age group, product frequency,
     average bundle price, subscription price, etc.).
+
+    Without parameters: over all stored records.
+    With ?window=1h|24h|7d (and optionally ?granularity=minute|hour|day for
+    a per-bucket series): merged from the time-bucketed rollups.
     """
-    return get_segments_summary()
+    if window is None and granularity is None:
+        return get_segments_summary()
+    try:
+        return get_windowed_summary(window, granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/admin/export-recent")
-async def admin_export_recent():
+@app.get("/admin/stream")
+async def admin_stream():
+    """
+    Server-Sent Events push channel for the admin dashboard:
+    - event "snapshot": {"seq", "items", "summary"} on connect, and again
+      if this client fell too far behind (replace local state)
+    - event "update":   {"seq", "items": new records newest first,
+      "summary": only the summary keys that changed}
+    """
+    return StreamingResponse(
+        admin_broadcaster.subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/admin/analytics-pipeline", response_class=FastJSONResponse)
+async def admin_analytics_pipeline():
+    """
+    Queue depth, drops and commit lag of the background analytics writer,
+    bucket counts of the time-bucketed rollups and admin stream fan-out,
+    churn re-scoring progress and traffic capture counters.
+    """
+    return {
+        "pipeline": get_analytics_pipeline_stats(),
+        "rollups": get_rollups().stats(),
+        "stream": admin_broadcaster.stats(),
+        "churn_rescore": get_churn_rescore_stats(),
+        "traffic_capture": get_traffic_capture_stats(),
+    }
+
+
+@app.get("/admin/retention", response_class=FastJSONResponse)
+async def admin_retention(limit: int = Query(50, ge=1, le=1000)):
     """
-    Export recent recommendations as CSV (for quick analysis in Excel/Sheets).
+    Retention flow engine: pending / executed steps per flow and the most
+    recently executed actions.
     """
-    items = get_recent_recommendations()
+    engine = get_retention_engine()
+    return {**engine.stats(), "recent_actions": engine.outbox.recent(limit)}
 
-    # CSV header
-    lines = [
-        "timestamp,profile_type,age_group,goals,products,upsell,bundle_price,bundle_price_subscription"
+
+@app.get("/admin/cache-stats", response_class=FastJSONResponse)
+async def admin_cache_stats():
+    """
+    Hit / miss / eviction counters for the recommendation and
+    LLM explanation caches, plus sizes of the pre-encoded static payloads.
+    """
+    return {
+        "recommendations": get_recommendation_cache_stats(),
+        "llm_explanations": get_explanation_cache_stats(),
+        "static_payloads": get_static_payload_stats(),
+    }
+
+
+@app.post("/admin/explanations/prewarm", response_class=FastJSONResponse)
+async def admin_prewarm_explanations(limit: int = 20):
+    """
+    Pre-generate LLM explanations for the most common quiz answer
+    combinations in the analytics store, so repeat segments hit the
+    persistent explanation cache instead of the API.
+    """
+    segments = get_top_segments(limit)
+    quizzes = [
+        QuizAnswers(**{k: v for k, v in seg.items() if k != "count"}, budget=None)
+        for seg in segments
     ]
+    outcomes = await prewarm_llm_explanations(quizzes)
+    return {"segments": len(segments), **outcomes}
+
+
+@app.get("/admin/export-recent")
+async def admin_export_recent(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    profile_type: Optional[List[str]] = Query(None),
+    risk_label: Optional[List[str]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    gzip: bool = False,
+    chunk_size: int = Query(5000, ge=1, le=100_000),
+):
+    """
+    Export recommendations as CSV (for quick analysis in Excel/Sheets).
+
+    - since / until: date (YYYY-MM-DD, until inclusive) or ISO datetime, UTC
+    - profile_type / risk_label: repeatable filters
+    - limit: newest N matching records (default: all)
+    - gzip=true: download as a .csv.gz file
+
+    Rows are streamed newest first, chunk_size records at a time, so large
+    exports start immediately and run in constant memory.
+    """
+    try:
+        since_ts, until_ts = normalize_range(since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    batches = get_backend().iter_batches(
+        since=since_ts,
+        until=until_ts,
+        profile_types=profile_type,
+        risk_labels=risk_label,
+        limit=limit,
+        batch_size=chunk_size,
+    )
+    if gzip:
+        return StreamingResponse(
+            iter_csv(batches, compress=True),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="recommendations.csv.gz"'},
+        )
+    return StreamingResponse(iter_csv(batches), media_type="text/csv")
+
+
+@app.get("/admin/export-history")
+async def admin_export_history(
+    format: str = "parquet",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    profile_type: Optional[List[str]] = Query(None),
+    risk_label: Optional[List[str]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    chunk_size: int = Query(50_000, ge=1, le=1_000_000),
+):
+    """
+    Export recommendation history as an Arrow IPC file (format=arrow) or
+    Parquet (format=parquet) for notebooks: list columns stay native lists,
+    category columns are dictionary-encoded. Same filters as
+    /admin/export-recent; written and streamed one record batch at a time.
+    Needs pyarrow.
+    """
+    if format not in COLUMNAR_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of {tuple(COLUMNAR_FORMATS)}"
+        )
+    if not columnar_available():
+        raise HTTPException(status_code=501, detail="pyarrow is not installed on the server")
+    try:
+        since_ts, until_ts = normalize_range(since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    batches = get_backend().iter_column_batches(
+        since=since_ts,
+        until=until_ts,
+        profile_types=profile_type,
+        risk_labels=risk_label,
+        limit=limit,
+        batch_size=chunk_size,
+    )
+    media_type, extension = COLUMNAR_FORMATS[format]
+    return StreamingResponse(
+        iter_columnar(batches, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="recommendations.{extension}"'
+        },
+    )
 
-    for rec in items:
-        def _join_list(val):
-            if isinstance(val, list):
-                return ";".join(str(x) for x in val)
-            return "" if val is None else str(val)
-
-        timestamp = rec.get("timestamp", "")
-        profile_type = rec.get("profile_type", "")
-        age_group = rec.get("age_group", "")
-        goals = _join_list(rec.get("goals"))
-        products = _join_list(rec.get("products"))
-        upsell = _join_list(rec.get("upsell"))
-        bundle_price = rec.get("bundle_price", "")
-        sub_price = rec.get("bundle_price_subscription", "")
-
-        # Escape commas/quotes properly
-        row = [
-            timestamp,
-            profile_type,
-            age_group,
-            goals,
-            products,
-            upsell,
-            bundle_price,
-            sub_price,
-        ]
-        safe_row = []
-        for field in row:
-            s = "" if field is None else str(field)
-            if any(c in s for c in [",", ";", '"']):
-                s = '"' + s.replace('"', '""') + '"'
-            safe_row.append(s)
-
-        lines.append(",".join(safe_row))
-
-    csv_data = "\n".join(lines)
-    return PlainTextResponse(csv_data, media_type="text/csv")
 
 class ContentRequest(BaseModel):
     quiz: QuizAnswers
     recommendation: Dict[str, Any]
 
 
-@app.post("/content/welcome-email")
+@app.post("/content/welcome-email", response_class=FastJSONResponse)
 async def content_welcome_email(payload: ContentRequest):
     """
     Generate engagement content (subject + preview + body) for a given
@@ -153,3 +542,86 @@ async def content_welcome_email(payload: ContentRequest):
     """
     email = generate_email_copy(payload.quiz, payload.recommendation)
     return email
+
+
+@app.post("/content/welcome-email/bulk")
+async def content_welcome_email_bulk(
+    request: Request,
+    recommend: bool = Query(False, description="re-run recommendations instead of using the input's"),
+    chunk_size: int = Query(1000, ge=1, le=10_000),
+):
+    """
+    Bulk version of /content/welcome-email for campaigns.
+    - Request body: NDJSON, one {"quiz", "recommendation", "id"?} per line;
+      rows without a recommendation (or all rows, with recommend=true)
+      are scored first
+    - Response: NDJSON, one {"index", "id"?, "email"} or {"index", "error"}
+      per input line, streamed chunk by chunk
+    - Bodies over BULK_MAX_BODY_BYTES get a 413; run those through
+      python -m app.bulk_content instead
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=(
+            f"Request body exceeds {BULK_MAX_BODY_BYTES} bytes; "
+            "render large campaigns with python -m app.bulk_content"
+        ),
+    )
+    try:
+        declared = int(request.headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if declared > BULK_MAX_BODY_BYTES:
+        raise too_large
+    # Content-Length may be absent (chunked uploads) or wrong: count as we read
+    parts: List[bytes] = []
+    size = 0
+    async for part in request.stream():
+        size += len(part)
+        if size > BULK_MAX_BODY_BYTES:
+            raise too_large
+        parts.append(part)
+    body = b"".join(parts)
+    return StreamingResponse(
+        stream_bulk_emails(body, recommend=recommend, chunk_size=chunk_size),
+        media_type="application/x-ndjson",
+    )
+
+
+class ChurnRecord(BaseModel):
+    profile_type: Optional[str] = None
+    age_group: Optional[str] = None
+    goals: List[str] = []
+    lifestyle: List[str] = []
+    diet: List[str] = []
+    allergies: Optional[str] = None
+    products: List[str] = []
+    upsell: List[str] = []
+    bundle_price: Optional[float] = None
+    bundle_price_subscription: Optional[float] = None
+
+
+class ChurnScoreRequest(BaseModel):
+    records: List[ChurnRecord] = Field(..., max_length=10_000)
+
+
+@app.post("/churn/score-batch", response_class=FastJSONResponse)
+def churn_score_batch(payload: ChurnScoreRequest):
+    """
+    Churn risk for a batch of quiz + recommendation records (the analytics
+    record fields), scored in one vectorized call to the churn model.
+    """
+    model = get_churn_model()
+    if model is None:
+        raise HTTPException(status_code=503, detail="Churn model is not loaded")
+
+    columns = records_to_columns([r.model_dump() for r in payload.records])
+    probabilities = model.predict_proba(columns)
+    scores, labels = model.risk_from_proba(probabilities)
+    return {
+        "model_version": model.version,
+        "items": [
+            {"risk_score": s, "risk_label": l, "churn_probability": round(float(p), 4)}
+            for s, l, p in zip(scores, labels, probabilities)
+        ],
+    }
@@ -0,0 +1,283 @@
+# backend/app/product_embeddings.py
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # if library not installed
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # the hashed TF-IDF embedder needs nothing extra
+    SentenceTransformer = None
+
+
+# Directory holding product_vectors.npy, idf.npy and meta.json
+EMBEDDINGS_DIR_ENV = "NUTRIGUIDE_EMBEDDINGS_DIR"
+_DEFAULT_EMBEDDINGS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "embeddings"
+)
+# Local sentence-transformers model to use instead of hashed TF-IDF
+EMBEDDING_MODEL_ENV = "NUTRIGUIDE_EMBEDDING_MODEL"
+
+_VECTORS_FILE = "product_vectors.npy"
+_IDF_FILE = "idf.npy"
+_META_FILE = "meta.json"
+
+HASHED_DIM = 512
+_CHAR_NGRAMS = (3, 4)
+
+
+def _words(value: str) -> str:
+    return value.replace("_", " ").replace("-", " ")
+
+
+def product_text(product: Dict[str, Any]) -> str:
+    """
+    Text a product is embedded from: name, optional description, and its
+    tags as words ("low_veggies" -> "low veggies"). Contraindications
+    become what the product contains ("fish_allergy" -> "contains fish").
+    """
+    parts = [product.get("name", "")]
+    if product.get("description"):
+        parts.append(product["description"])
+    for key in ("profile_types", "goals", "lifestyle", "diet_tags"):
+        values = product.get(key) or []
+        if values:
+            parts.append(" ".join(_words(v) for v in values))
+    contains = [
+        _words(c.rsplit("_allergy", 1)[0]) for c in product.get("contraindications") or []
+    ]
+    if contains:
+        parts.append("contains " + " ".join(contains))
+    return ". ".join(p for p in parts if p)
+
+
+def quiz_text(quiz) -> str:
+    """
+    Text of the structured quiz answers the products are matched against.
+    Free-text allergies are embedded separately (see recommend_products).
+    """
+    parts = [_words(quiz.profile_type or "")]
+    for values in (quiz.goals, quiz.lifestyle, quiz.diet):
+        parts.extend(_words(v) for v in values or [])
+    return " ".join(p for p in parts if p)
+
+
+def _tokens(text: str) -> List[str]:
+    words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+    features = list(words)
+    for word in words:
+        padded = f"<{word}>"
+        for n in _CHAR_NGRAMS:
+            features.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+    return features
+
+
+class HashedTfidfEmbedder:
+    """
+    Signed feature hashing of word and character n-grams with sublinear
+    TF and an IDF fitted on the product texts. No vocabulary to store and
+    no model download; the n-grams give some tolerance to spelling and
+    morphology ("shellfish" still shares features with "fish").
+
+    crc32 is used instead of hash() so vectors are stable across processes.
+    """
+
+    name = "hashed-tfidf"
+
+    def __init__(self, dim: int = HASHED_DIM, idf: Optional["np.ndarray"] = None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    def _counts(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        for feature, tf in Counter(_tokens(text)).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            bucket = h % self.dim
+            counts[bucket] = counts.get(bucket, 0.0) + sign * (1.0 + math.log(tf))
+        return counts
+
+    def fit(self, texts: List[str]) -> "HashedTfidfEmbedder":
+        df = np.zeros(self.dim, dtype=np.float64)
+        for text in texts:
+            buckets = list(self._counts(text))
+            df[buckets] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = self._counts(text)
+            if counts:
+                out[row, list(counts)] = list(counts.values())
+        out *= self.idf
+        return _normalize(out)
+
+
+class SentenceTransformerEmbedder:
+    """
+    Dense embeddings from a locally available sentence-transformers model
+    (e.g. "all-MiniLM-L6-v2" in the local model cache).
+    """
+
+    def __init__(self, model: str):
+        if SentenceTransformer is None:
+            raise RuntimeError("sentence-transformers is not installed")
+        self.name = model
+        self._model = SentenceTransformer(model)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        vectors = self._model.encode(texts, batch_size=256, convert_to_numpy=True)
+        return _normalize(vectors.astype(np.float32))
+
+
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def catalog_fingerprint(texts: List[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ProductEmbeddings:
+    """
+    Unit-length product vectors (rows in catalog order) plus the embedder
+    that maps query texts into the same space.
+    """
+
+    def __init__(self, vectors: "np.ndarray", ids: List[str], embedder, fingerprint: str):
+        self.vectors = vectors
+        self.ids = ids
+        self.embedder = embedder
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def embed_queries(self, texts: List[str]) -> "np.ndarray":
+        return self.embedder.embed(texts)
+
+
+def build_embeddings(
+    products: List[Dict[str, Any]], model: Optional[str] = None, dim: int = HASHED_DIM
+) -> ProductEmbeddings:
+    """
+    Embed a catalog with the given sentence-transformers model, or with
+    hashed TF-IDF when no model is given.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for product embeddings")
+    texts = [product_text(p) for p in products]
+    if model:
+        embedder = SentenceTransformerEmbedder(model)
+    else:
+        embedder = HashedTfidfEmbedder(dim).fit(texts)
+    return ProductEmbeddings(
+        embedder.embed(texts),
+        [p["id"] for p in products],
+        embedder,
+        catalog_fingerprint(texts),
+    )
+
+
+def save_embeddings(embeddings: ProductEmbeddings, directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    embedder = embeddings.embedder
+    np.save(os.path.join(directory, _VECTORS_FILE), np.ascontiguousarray(embeddings.vectors))
+    if isinstance(embedder, HashedTfidfEmbedder):
+        np.save(os.path.join(directory, _IDF_FILE), embedder.idf)
+    meta = {
+        "embedder": embedder.name,
+        "dim": embedder.dim,
+        "count": len(embeddings),
+        "fingerprint": embeddings.fingerprint,
+        "ids": embeddings.ids,
+    }
+    with open(os.path.join(directory, _META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def load_embeddings(directory: str) -> ProductEmbeddings:
+    """
+    Open saved vectors memory-mapped (read-only; pages are loaded on
+    first touch and shared between worker processes).
+    """
+    with open(os.path.join(directory, _META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    vectors = np.load(os.path.join(directory, _VECTORS_FILE), mmap_mode="r")
+    if meta["embedder"] == HashedTfidfEmbedder.name:
+        embedder = HashedTfidfEmbedder(meta["dim"], np.load(os.path.join(directory, _IDF_FILE)))
+    else:
+        embedder = SentenceTransformerEmbedder(meta["embedder"])
+    return ProductEmbeddings(vectors, meta["ids"], embedder, meta["fingerprint"])
+
+
+def embeddings_dir() -> str:
+    return os.getenv(EMBEDDINGS_DIR_ENV) or _DEFAULT_EMBEDDINGS_DIR
+
+
+def embeddings_for_catalog(products: List[Dict[str, Any]]) -> ProductEmbeddings:
+    """
+    Saved embeddings when they were built from exactly this catalog,
+    otherwise hashed TF-IDF embeddings built in memory (a few ms for the
+    shipped catalog).
+    """
+    texts = [product_text(p) for p in products]
+    directory = embeddings_dir()
+    try:
+        saved = load_embeddings(directory)
+    except (OSError, ValueError, KeyError, RuntimeError):
+        saved = None
+    if saved is not None and saved.fingerprint == catalog_fingerprint(texts):
+        return saved
+    return build_embeddings(products)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Offline build of the product vectors for the shipped catalog, e.g.
+
+        python -m app.product_embeddings
+        python -m app.product_embeddings --model all-MiniLM-L6-v2
+    """
+    from . import products_catalog
+
+    parser = argparse.ArgumentParser(description="Build product embedding vectors.")
+    parser.add_argument("--out", default=embeddings_dir(), help="output directory")
+    parser.add_argument(
+        "--model",
+        default=os.getenv(EMBEDDING_MODEL_ENV),
+        help="local sentence-transformers model (default: hashed TF-IDF)",
+    )
+    parser.add_argument("--dim", type=int, default=HASHED_DIM, help="hashed TF-IDF width")
+    args = parser.parse_args(argv)
+
+    embeddings = build_embeddings(products_catalog.PRODUCT_CATALOG, args.model, args.dim)
+    save_embeddings(embeddings, args.out)
+    print(
+        f"Wrote {len(embeddings)} x {embeddings.embedder.dim} "
+        f"{embeddings.embedder.name} vectors to {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
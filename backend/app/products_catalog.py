@@ -162,3 +162,49 @@ PRODUCT_CATALOG = [
         "subscription_discount": 0.15,
     },
 ]
+
+
+# Allergen lexicon for the free-text allergies answer. Each entry maps
+# the terms a user may type to the product contraindication they trigger.
+# Terms match as whole words, case-insensitive, with an optional plural
+# "s"/"es" ("y" -> "ies"); spaces and hyphens inside a term also match
+# "omega3" / "omega 3". "compound_terms" also match inside longer words,
+# except in the whole words listed in "compound_exclusions".
+ALLERGEN_LEXICON = [
+    {
+        "contraindication": "fish_allergy",
+        "label": "fish/seafood allergy",
+        "terms": [
+            "fish", "seafood", "shellfish", "fish oil", "omega-3", "cod liver",
+            "salmon", "tuna", "cod", "sardine", "anchovy", "mackerel", "krill",
+            "shrimp", "prawn", "crab", "lobster",
+        ],
+        # Also inside longer words: catfish, swordfish, crayfish, ...
+        "compound_terms": ["fish"],
+    },
+    {
+        "contraindication": "dairy_allergy",
+        "label": "dairy allergy",
+        "terms": [
+            "dairy", "milk", "lactose", "casein", "whey", "cheese", "yogurt",
+            "yoghurt",
+        ],
+        # Also inside longer words: buttermilk, milkshake, ...
+        "compound_terms": ["milk"],
+    },
+    {
+        "contraindication": "nut_allergy",
+        "label": "nut allergy",
+        "terms": [
+            "nut", "peanut", "tree nut", "almond", "cashew", "walnut", "hazelnut",
+            "pecan", "pistachio", "macadamia", "brazil nut", "groundnut",
+        ],
+        # Also inside longer words: chestnut, peanutbutter, nutella, ...
+        # but not in these, which hold no nuts
+        "compound_terms": ["nut"],
+        "compound_exclusions": [
+            "coconut", "nutmeg", "doughnut", "donut", "butternut",
+            "nutrition", "nutritional", "nutrient", "nutritious",
+        ],
+    },
+]
@@ -1,9 +1,56 @@
 # backend/app/recommend_products.py
 
-from typing import Dict, List, Any
-
-from .products_catalog import PRODUCT_CATALOG
-from .llm_explainer import generate_llm_explanation
+import asyncio
+import os
+from time import perf_counter
+from typing import Dict, List, Any, NamedTuple, Tuple
+
+from .allergens import AllergenLexicon
+from .catalog_index import CatalogIndex, get_catalog_index
+from .llm_explainer import (
+    generate_llm_explanation,
+    generate_llm_explanation_async,
+    register_explanation_stream,
+    warm_explanation,
+)
+from .scoring_matrix import get_catalog_matrix, np
+from .product_embeddings import quiz_text
+from .similarity_index import get_semantic_index
+from .result_cache import cache_from_env
+from .metrics import RECOMMEND_STAGE_SECONDS, RECOMMENDATION_SECONDS
+
+
+# Scoring backend: "index" (default), "linear" (full scan) or "numpy"
+SCORING_BACKEND_ENV = "NUTRIGUIDE_SCORING_BACKEND"
+SCORING_BACKENDS = ("index", "linear", "numpy")
+
+# Points added for a product whose embedding matches the quiz answers
+# exactly (cosine 1.0); 0 (default) turns semantic blending off.
+# NUTRIGUIDE_SEMANTIC_APPROX=1 uses the approximate (IVF) index.
+SEMANTIC_WEIGHT_ENV = "NUTRIGUIDE_SEMANTIC_WEIGHT"
+SEMANTIC_APPROX_ENV = "NUTRIGUIDE_SEMANTIC_APPROX"
+_SEMANTIC_TOP_K = 50
+
+# Scoring results per canonical quiz; NUTRIGUIDE_RESULT_CACHE_SIZE / _TTL
+# override the defaults (size 0 disables it)
+_RESULT_CACHE = cache_from_env("NUTRIGUIDE_RESULT_CACHE", maxsize=4096, ttl=600)
+_RESULT_CACHE_VERSION = -1
+
+# Stage timers, bound once so a request only pays perf_counter + observe
+_SAFETY_TIMER = RECOMMEND_STAGE_SECONDS.labels("safety")
+_SEMANTIC_TIMER = RECOMMEND_STAGE_SECONDS.labels("semantic")
+_SCORING_TIMER = RECOMMEND_STAGE_SECONDS.labels("scoring")
+_RANKING_TIMER = RECOMMEND_STAGE_SECONDS.labels("ranking")
+_PRICING_TIMER = RECOMMEND_STAGE_SECONDS.labels("pricing")
+_LLM_TIMER = RECOMMEND_STAGE_SECONDS.labels("llm_explanation")
+_CACHE_HIT_TIMER = RECOMMENDATION_SECONDS.labels("hit")
+_CACHE_MISS_TIMER = RECOMMENDATION_SECONDS.labels("miss")
+
+
+_NO_SAFE_PRODUCTS_NOTE = (
+    "We could not find products that fully match all safety filters, "
+    "so we are showing general options. Please review with your doctor."
+)
 
 
 def _lower_age_from_group(age_group: str) -> int:
@@ -24,17 +71,35 @@ def _lower_age_from_group(age_group: str) -> int:
             return 0
 
 
-def _check_safety(product: Dict[str, Any], quiz) -> (bool, str | None):
+class _SafetyProfile(NamedTuple):
     """
-    Returns (is_safe, reason_if_not_safe).
-    Uses age, allergies, and product contraindications.
+    What the safety checks need from a quiz, worked out once per request.
     """
-    user_age_lower = _lower_age_from_group(quiz.age_group or "")
-    allergies = (quiz.allergies or "").lower()
 
+    age_lower: int
+    allergy_mask: int  # allergies parsed with the allergen lexicon
+    lexicon: AllergenLexicon
+
+
+def _safety_profile(quiz, index: CatalogIndex) -> _SafetyProfile:
+    return _SafetyProfile(
+        _lower_age_from_group(quiz.age_group or ""),
+        index.lexicon.parse(quiz.allergies),
+        index.lexicon,
+    )
+
+
+def _check_safety(
+    product: Dict[str, Any], contra_mask: int, safety: _SafetyProfile
+) -> (bool, str | None):
+    """
+    Returns (is_safe, reason_if_not_safe).
+    Uses age, allergies, and the product's contraindication bitmask
+    (CatalogIndex.contra_masks).
+    """
+    user_age_lower = safety.age_lower
     min_age = product.get("min_age")
     max_age = product.get("max_age")
-    contraindications: List[str] = product.get("contraindications", [])
 
     # Age-based rule
     if isinstance(min_age, (int, float)) and user_age_lower and user_age_lower < min_age:
@@ -43,26 +108,71 @@ def _check_safety(product: Dict[str, Any], quiz) -> (bool, str | None):
     if isinstance(max_age, (int, float)) and user_age_lower and user_age_lower > max_age:
         return False, f"{product['name']} is not intended above age {max_age}."
 
-    # Allergy-based rules
-    if "fish_allergy" in contraindications and any(
-        word in allergies for word in ["fish", "seafood", "omega-3"]
-    ):
-        return False, f"{product['name']} was skipped due to reported fish/seafood allergy."
-
-    if "dairy_allergy" in contraindications and any(
-        word in allergies for word in ["dairy", "milk", "lactose", "casein", "whey"]
-    ):
-        return False, f"{product['name']} was skipped due to reported dairy allergy."
-
-    if "nut_allergy" in contraindications and any(
-        word in allergies for word in ["nut", "nuts", "peanut", "almond", "cashew"]
-    ):
-        return False, f"{product['name']} was skipped due to reported nut allergy."
+    # Allergy-based rules: first lexicon entry both sides share
+    hit = contra_mask & safety.allergy_mask
+    if hit:
+        label = safety.lexicon.first_label(hit)
+        return False, f"{product['name']} was skipped due to reported {label}."
 
     # If we reach here, product is considered safe
     return True, None
 
 
+def _semantic_settings() -> Tuple[float, bool]:
+    """
+    (weight, approximate) from the environment; weight 0 when disabled
+    or numpy is missing.
+    """
+    try:
+        weight = float(os.getenv(SEMANTIC_WEIGHT_ENV, "0") or 0)
+    except ValueError:
+        weight = 0.0
+    if np is None or weight <= 0:
+        return 0.0, False
+    approximate = os.getenv(SEMANTIC_APPROX_ENV, "").strip().lower() in ("1", "true", "yes")
+    return weight, approximate
+
+
+def _semantic_bonus(quiz, index: CatalogIndex, weight: float, approximate: bool) -> Dict[int, float]:
+    """
+    Extra raw-score points per catalog position for the products closest
+    to the quiz answers in embedding space (top _SEMANTIC_TOP_K only).
+
+    The bonus is weight * (similarity to the answers - similarity to the
+    free-text allergies), clipped at 0, so products that read like the
+    reported allergens get less of it. It never adds a penalty; the
+    allergy rules in _check_safety still do the actual filtering.
+    """
+    semantic = get_semantic_index(index)
+    texts = [quiz_text(quiz)]
+    allergies = (quiz.allergies or "").strip().lower()
+    if allergies and allergies != "none":
+        texts.append(allergies)
+    vectors = semantic.embeddings.embed_queries(texts)
+
+    positions, sims = semantic.index.search(vectors[:1], _SEMANTIC_TOP_K, approximate)
+    positions, sims = positions[0], sims[0]
+    keep = positions >= 0
+    positions, sims = positions[keep], sims[keep].astype(np.float64)
+    if len(texts) > 1:
+        sims = sims - semantic.embeddings.vectors[positions] @ vectors[1]
+
+    bonus = weight * np.clip(sims, 0.0, 1.0)
+    return {int(pos): float(b) for pos, b in zip(positions, bonus) if b > 0}
+
+
+def _apply_semantic_bonus(
+    scored: List[Dict[str, Any]], bonus: Dict[int, float], index: CatalogIndex
+) -> None:
+    """
+    Add the bonus to products that already match on tags (raw_score > 0),
+    so it reorders matches without surfacing products that would
+    otherwise score 0 (the index path never scores those).
+    """
+    by_id = {index.products[pos]["id"]: b for pos, b in bonus.items()}
+    for p in scored:
+        if p["raw_score"] > 0 and p["id"] in by_id:
+            p["raw_score"] += by_id[p["id"]]
 
 
 def _score_product(product: Dict[str, Any], quiz) -> Dict[str, Any]:
@@ -134,33 +244,80 @@ def _score_product(product: Dict[str, Any], quiz) -> Dict[str, Any]:
     }
 
 
-def get_recommendation(quiz) -> Dict[str, Any]:
+def _filter_and_score_linear(
+    quiz, index: CatalogIndex, safety: _SafetyProfile
+) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
-    Score all products, pick top core products and upsell candidates,
-    and return a structured recommendation.
+    Reference path: run safety checks and scoring over every product.
+    Returns (scored products in catalog order, safety notes).
     """
-
+    start = perf_counter()
+    products = index.products
     safe_products: List[Dict[str, Any]] = []
     safety_notes: List[str] = []
 
-    for p in PRODUCT_CATALOG:
-        is_safe, reason = _check_safety(p, quiz)
+    for p, contra_mask in zip(products, index.contra_masks):
+        is_safe, reason = _check_safety(p, contra_mask, safety)
         if is_safe:
             safe_products.append(p)
         elif reason:
             safety_notes.append(reason)
 
     # If everything got filtered out by mistake, fall back to full catalog
-    products_to_score = safe_products or PRODUCT_CATALOG
+    products_to_score = safe_products or products
     if not safe_products and safety_notes:
-        safety_notes.append(
-            "We could not find products that fully match all safety filters, "
-            "so we are showing general options. Please review with your doctor."
-        )
+        safety_notes.append(_NO_SAFE_PRODUCTS_NOTE)
+    scoring_start = perf_counter()
+    _SAFETY_TIMER.observe(scoring_start - start)
 
     scored = [_score_product(p, quiz) for p in products_to_score]
+    _SCORING_TIMER.observe(perf_counter() - scoring_start)
+    return scored, safety_notes
 
 
+def _filter_and_score_indexed(
+    quiz, index: CatalogIndex, safety: _SafetyProfile
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Same output as _filter_and_score_linear, but only touches products
+    from the index posting lists. Products that are skipped would score
+    exactly 0, so they can never be picked as core or upsell.
+    """
+    start = perf_counter()
+    products = index.products
+    safety_notes: List[str] = []
+    unsafe = set()
+
+    triggered = safety.lexicon.names(safety.allergy_mask)
+    for pos in index.safety_candidates(safety.age_lower, triggered):
+        is_safe, reason = _check_safety(products[pos], index.contra_masks[pos], safety)
+        if not is_safe:
+            unsafe.add(pos)
+            if reason:
+                safety_notes.append(reason)
+
+    if products and len(unsafe) == len(products):
+        # Nothing passed the safety filters → same fallback as the linear path
+        return _filter_and_score_linear(quiz, index, safety)
+    scoring_start = perf_counter()
+    _SAFETY_TIMER.observe(scoring_start - start)
+
+    scored = [
+        _score_product(products[pos], quiz)
+        for pos in index.score_candidates(quiz, exclude=unsafe)
+    ]
+    _SCORING_TIMER.observe(perf_counter() - scoring_start)
+
+    return scored, safety_notes
+
+
+def _rank_scored(
+    scored: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Normalize raw scores, sort, and pick core + upsell products.
+    Returns (core_selected, upsell_selected).
+    """
     # Normalize scores 0–100
     max_score = max((p["raw_score"] for p in scored), default=0)
     if max_score > 0:
@@ -182,6 +339,233 @@ def get_recommendation(quiz) -> Dict[str, Any]:
     # Pick up to 2 upsells with non-zero score
     upsell_selected = [p for p in upsell_candidates if p["score"] > 0][:2]
 
+    return core_selected, upsell_selected
+
+
+def _select_numpy(
+    quiz, index: CatalogIndex, safety: _SafetyProfile, bonus: Dict[int, float] | None = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+    """
+    Vectorized path: safety masks + one matrix-vector product over the
+    whole catalog. Reason strings are only built for the selected products.
+    """
+    start = perf_counter()
+    matrix = get_catalog_matrix(index)
+    products = matrix.products
+
+    unsafe = matrix.unsafe_mask(safety.age_lower, safety.allergy_mask)
+    safety_notes: List[str] = []
+    for pos in np.flatnonzero(unsafe):
+        _, reason = _check_safety(products[pos], index.contra_masks[pos], safety)
+        if reason:
+            safety_notes.append(reason)
+    if products and unsafe.all() and safety_notes:
+        safety_notes.append(_NO_SAFE_PRODUCTS_NOTE)
+    scoring_start = perf_counter()
+    _SAFETY_TIMER.observe(scoring_start - start)
+
+    extra = None
+    if bonus:
+        extra = np.zeros(len(products))
+        extra[list(bonus)] = list(bonus.values())
+    order, scores, _ = matrix.rank(quiz, unsafe, extra)
+
+    core_pos = order[matrix.is_core[order]][:3]
+    upsell_pos = order[~matrix.is_core[order] & (scores[order] > 0)][:2]
+
+    def _materialize(pos) -> Dict[str, Any]:
+        p = _score_product(products[pos], quiz)
+        if bonus and p["raw_score"] > 0 and pos in bonus:
+            p["raw_score"] += bonus[pos]
+        p["score"] = int(scores[pos])
+        return p
+
+    core_selected = [_materialize(pos) for pos in core_pos]
+    upsell_selected = [_materialize(pos) for pos in upsell_pos]
+    # Ranking happens inside matrix.rank here, so it is part of "scoring"
+    _SCORING_TIMER.observe(perf_counter() - scoring_start)
+    return core_selected, upsell_selected, safety_notes
+
+
+def _scoring_backend() -> str:
+    backend = os.getenv(SCORING_BACKEND_ENV, "index").strip().lower()
+    if backend not in SCORING_BACKENDS:
+        backend = "index"
+    if backend == "numpy" and np is None:
+        # numpy not installed → fall back to the pure-Python index
+        backend = "index"
+    return backend
+
+
+def _select_products(
+    quiz, backend: str | None = None, semantic: Tuple[float, bool] | None = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+    """
+    Run safety filtering + scoring with the configured backend, blending
+    in the semantic bonus when enabled (semantic=(weight, approximate),
+    default from the environment).
+    Returns (core_selected, upsell_selected, safety_notes).
+    """
+    backend = backend or _scoring_backend()
+    weight, approximate = semantic if semantic is not None else _semantic_settings()
+    index = get_catalog_index()
+    safety = _safety_profile(quiz, index)
+    bonus = {}
+    if weight > 0:
+        start = perf_counter()
+        bonus = _semantic_bonus(quiz, index, weight, approximate)
+        _SEMANTIC_TIMER.observe(perf_counter() - start)
+
+    if backend == "numpy":
+        return _select_numpy(quiz, index, safety, bonus)
+
+    if backend == "linear":
+        scored, safety_notes = _filter_and_score_linear(quiz, index, safety)
+    else:
+        scored, safety_notes = _filter_and_score_indexed(quiz, index, safety)
+    start = perf_counter()
+    if bonus:
+        _apply_semantic_bonus(scored, bonus, index)
+
+    core_selected, upsell_selected = _rank_scored(scored)
+    _RANKING_TIMER.observe(perf_counter() - start)
+    return core_selected, upsell_selected, safety_notes
+
+
+def canonical_quiz_key(quiz) -> Tuple[Any, ...]:
+    """
+    Cache key for the scoring result: answers that only differ in list
+    order or in the case of the allergy text score the same. (Whitespace
+    is kept: "none" and " none" produce different allergy notes.)
+    Budget is not used for scoring, so it is left out.
+    """
+    return (
+        quiz.profile_type,
+        quiz.age_group,
+        tuple(sorted(set(quiz.goals or []))),
+        tuple(sorted(set(quiz.lifestyle or []))),
+        tuple(sorted(set(quiz.diet or []))),
+        (quiz.allergies or "").lower(),
+    )
+
+
+def get_recommendation_cache_stats() -> Dict[str, Any]:
+    return _RESULT_CACHE.stats()
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a _build_result() dict down to its lists and nested dicts,
+    so nothing a caller changes reaches the cached one.
+    """
+    return {
+        **result,
+        "products": list(result["products"]),
+        "upsell": list(result["upsell"]),
+        "explanation": list(result["explanation"]),
+        "product_details": [
+            {**p, "reasons": list(p["reasons"])} for p in result["product_details"]
+        ],
+        "safety_notes": list(result["safety_notes"]),
+        "pricing": dict(result["pricing"]),
+    }
+
+
+def get_recommendation(quiz, include_llm_explanation: bool = True) -> Dict[str, Any]:
+    """
+    Score all products, pick top core products and upsell candidates,
+    and return a structured recommendation.
+
+    Scoring results are cached per canonical quiz (see canonical_quiz_key)
+    and dropped whenever the catalog index is rebuilt; after editing
+    products in place, call catalog_index.refresh_catalog_index(). The
+    LLM explanation is not part of the cached result; it has its own
+    cache in llm_explainer.
+
+    Set include_llm_explanation=False to skip the (slow) explanation call,
+    e.g. for bulk re-scoring.
+    """
+    global _RESULT_CACHE_VERSION
+
+    start = perf_counter()
+    index = get_catalog_index()
+    if index.version != _RESULT_CACHE_VERSION:
+        _RESULT_CACHE.clear()
+        _RESULT_CACHE_VERSION = index.version
+
+    backend = _scoring_backend()
+    semantic = _semantic_settings()
+    key = (index.version, backend, semantic, canonical_quiz_key(quiz))
+    cached = _RESULT_CACHE.get(key)
+    timer = _CACHE_HIT_TIMER
+    if cached is None:
+        cached = _build_result(quiz, backend, semantic)
+        _RESULT_CACHE.set(key, cached)
+        timer = _CACHE_MISS_TIMER
+
+    # The cached result is shared: callers get their own copy
+    result = _copy_result(cached)
+    timer.observe(perf_counter() - start)
+
+    # Generate LLM explanation (optional)
+    if include_llm_explanation:
+        start = perf_counter()
+        llm_explanation = generate_llm_explanation(quiz, result["product_details"])
+        _LLM_TIMER.observe(perf_counter() - start)
+        if llm_explanation:
+            result["llm_explanation"] = llm_explanation
+
+    return result
+
+
+async def get_recommendation_async(quiz, stream_explanation: bool = False) -> Dict[str, Any]:
+    """
+    Same as get_recommendation, but the LLM explanation never blocks the
+    event loop and is bounded by a deadline. If the deadline passes, the
+    fallback explanation is returned with llm_explanation_status="pending"
+    and the real one can be fetched later by llm_explanation_id.
+
+    With stream_explanation=True the LLM is not awaited at all: the bundle
+    comes back right away with status "streaming", and the client streams
+    the text from the explanation SSE endpoint.
+    """
+    result = get_recommendation(quiz, include_llm_explanation=False)
+    if stream_explanation:
+        result.update(await register_explanation_stream(quiz, result["product_details"]))
+    else:
+        start = perf_counter()
+        result.update(
+            await generate_llm_explanation_async(quiz, result["product_details"])
+        )
+        _LLM_TIMER.observe(perf_counter() - start)
+    return result
+
+
+async def prewarm_llm_explanations(quizzes: List[Any]) -> Dict[str, int]:
+    """
+    Score each quiz and make sure its LLM explanation is in the
+    explanation cache. Completions run concurrently, bounded by the
+    explainer's semaphore. Returns counts per outcome.
+    """
+    tasks = [
+        warm_explanation(
+            q, get_recommendation(q, include_llm_explanation=False)["product_details"]
+        )
+        for q in quizzes
+    ]
+    counts = {"cached": 0, "generated": 0, "failed": 0, "unavailable": 0}
+    for outcome in await asyncio.gather(*tasks):
+        counts[outcome] += 1
+    return counts
+
+
+def _build_result(quiz, backend: str, semantic: Tuple[float, bool] | None = None) -> Dict[str, Any]:
+    """
+    Scoring, selection and pricing for one quiz (no LLM call).
+    """
+    core_selected, upsell_selected, safety_notes = _select_products(quiz, backend, semantic)
+    start = perf_counter()
+
         # ---------- PRICING CALCULATIONS ----------
     # Full-price monthly bundle (sum of core products)
     bundle_price = sum(p.get("price_usd", 0.0) for p in core_selected)
@@ -247,11 +631,6 @@ def get_recommendation(quiz) -> Dict[str, Any]:
             "subscription_savings_pct": subscription_savings_pct,
         },
     }
-
-    # Generate LLM explanation (optional)
-    llm_explanation = generate_llm_explanation(quiz, result["product_details"])
-    if llm_explanation:
-        result["llm_explanation"] = llm_explanation
+    _PRICING_TIMER.observe(perf_counter() - start)
 
     return result
-
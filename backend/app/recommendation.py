@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 
@@ -10,3 +10,41 @@ class QuizResponse(BaseModel):
     lifestyle: Optional[List[str]]
     allergies: Optional[str]
     budget: Optional[str]
+
+
+class ProductDetail(BaseModel):
+    id: str
+    name: str
+    score: int  # 0-100, relative to the best match
+    reasons: List[str]
+    price_usd: float
+    price_per_day: float
+
+
+class Pricing(BaseModel):
+    bundle_price: float
+    bundle_price_subscription: float
+    subscription_savings_pct: int
+
+
+class RecommendationResult(BaseModel):
+    """
+    Body of POST /quiz/recommend.
+
+    products / upsell are plain name lists kept for older clients;
+    product_details carries the same core products with scores and prices.
+    """
+
+    products: List[str]
+    upsell: List[str]
+    explanation: List[str]
+    bundle_summary: str
+    product_details: List[ProductDetail]
+    safety_notes: List[str]
+    pricing: Pricing
+    llm_explanation: Optional[str] = None
+    # Set when the explanation can be polled / streamed later
+    llm_explanation_id: Optional[str] = None
+    llm_explanation_status: Optional[
+        Literal["complete", "pending", "streaming", "fallback"]
+    ] = None
@@ -0,0 +1,103 @@
+# backend/app/result_cache.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class LRUTTLCache:
+    """
+    Small thread-safe LRU cache with a per-entry time-to-live.
+
+    - maxsize <= 0 disables the cache (every lookup is a miss)
+    - ttl <= 0 means entries never expire
+    - clock is injectable so expiry can be driven by a fake clock
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if self.ttl > 0 and expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def cache_from_env(prefix: str, maxsize: int, ttl: float) -> LRUTTLCache:
+    """
+    Build a cache whose size / TTL can be overridden with
+    <prefix>_SIZE and <prefix>_TTL environment variables.
+    """
+    def _num(name: str, default: float) -> float:
+        raw: Optional[str] = os.getenv(name)
+        try:
+            return float(raw) if raw is not None else default
+        except ValueError:
+            return default
+
+    return LRUTTLCache(
+        maxsize=int(_num(f"{prefix}_SIZE", maxsize)),
+        ttl=_num(f"{prefix}_TTL", ttl),
+    )
@@ -0,0 +1,469 @@
+# backend/app/retention_flows.py
+
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from . import products_catalog
+from .analytics_rollups import parse_window
+from .retention_store import PendingRow, PendingStepStore, open_pending_store
+
+
+# Flow definitions; NUTRIGUIDE_RETENTION_FLOWS overrides the path
+RETENTION_FLOWS_ENV = "NUTRIGUIDE_RETENTION_FLOWS"
+RETENTION_MAX_PENDING_ENV = "NUTRIGUIDE_RETENTION_MAX_PENDING"
+_DEFAULT_FLOWS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "automations",
+    "retention_flows.json",
+)
+
+# Record fields a trigger can test; list fields match when any value does
+TRIGGER_FIELDS = ("risk_label", "profile_type", "age_group", "products", "upsell", "goals")
+_LIST_TRIGGER_FIELDS = {"products", "upsell", "goals"}
+
+# Record fields kept with a pending action (the action's context)
+_CONTEXT_FIELDS = (
+    "timestamp",
+    "profile_type",
+    "age_group",
+    "products",
+    "risk_score",
+    "risk_label",
+    "bundle_price",
+    "bundle_price_subscription",
+)
+
+# Pending-step changes written to the store per transaction in run_due
+_STORE_BATCH = 1000
+
+# action(event) where event = {"flow", "step", "action", "params", "record", "due", "executed_at"}
+ActionHandler = Callable[[Dict[str, Any]], None]
+
+
+class FlowStep(NamedTuple):
+    delay: float  # seconds after the previous step (the trigger, for the first)
+    action: str
+    params: Dict[str, Any]
+
+
+def parse_delay(value: Any) -> float:
+    """
+    Seconds (number) or a window string like "30m", "1h", "3d".
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value < 0:
+            raise ValueError("delay must not be negative")
+        return float(value)
+    return float(parse_window(str(value)))
+
+
+class RetentionFlow:
+    """
+    One flow definition: a trigger (every listed field must match) and
+    the steps run after it, each `delay` after the one before.
+
+    Trigger values are lists (or a single value) of accepted values, plus
+    an optional "min_risk_score". Product triggers take catalog ids or
+    names; ids are resolved to names, which is what records hold.
+    """
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.id: str = definition["id"]
+        self.description: str = definition.get("description", "")
+        self.enabled: bool = definition.get("enabled", True)
+
+        trigger = dict(definition.get("trigger") or {})
+        self.min_risk_score: Optional[float] = trigger.pop("min_risk_score", None)
+        unknown = set(trigger) - set(TRIGGER_FIELDS)
+        if unknown:
+            raise ValueError(f"flow {self.id}: unknown trigger fields {sorted(unknown)}")
+
+        names = {p["id"]: p["name"] for p in products_catalog.PRODUCT_CATALOG}
+        self.criteria: List[Tuple[str, frozenset]] = []
+        for field in TRIGGER_FIELDS:
+            if field not in trigger:
+                continue
+            values = trigger[field]
+            if not isinstance(values, list):
+                values = [values]
+            if field in ("products", "upsell"):
+                values = [names.get(v, v) for v in values]
+            self.criteria.append((field, frozenset(values)))
+
+        self.steps: List[FlowStep] = [
+            FlowStep(parse_delay(s.get("delay", 0)), s["action"], s.get("params") or {})
+            for s in definition.get("steps") or []
+        ]
+        if not self.steps:
+            raise ValueError(f"flow {self.id}: at least one step is required")
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        for field, accepted in self.criteria:
+            value = record.get(field)
+            if field in _LIST_TRIGGER_FIELDS:
+                if accepted.isdisjoint(value or ()):
+                    return False
+            elif value not in accepted:
+                return False
+        if self.min_risk_score is not None:
+            score = record.get("risk_score")
+            if score is None or score < self.min_risk_score:
+                return False
+        return True
+
+
+def parse_flows(data: Any) -> List[RetentionFlow]:
+    """
+    {"flows": [...]} (or a bare list) -> enabled flows. Raises ValueError
+    on invalid definitions.
+    """
+    definitions = data.get("flows", []) if isinstance(data, dict) else data
+    flows = []
+    try:
+        for definition in definitions or []:
+            flow = RetentionFlow(definition)
+            if flow.enabled:
+                flows.append(flow)
+    except KeyError as e:
+        raise ValueError(f"flow definition is missing {e}") from None
+    ids = [f.id for f in flows]
+    if len(set(ids)) != len(ids):
+        raise ValueError("flow ids must be unique")
+    return flows
+
+
+def load_flows(path: Optional[str] = None) -> List[RetentionFlow]:
+    """
+    Flows from the JSON file; none when it is missing or empty.
+    """
+    path = path or os.getenv(RETENTION_FLOWS_ENV) or _DEFAULT_FLOWS_PATH
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return parse_flows(json.loads(text)) if text.strip() else []
+
+
+# ---------- actions ----------
+
+
+class Outbox:
+    """
+    Last N executed actions, for the admin view; a stand-in for the
+    email / CRM integrations actions would call.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self._items: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def append(self, item: Dict[str, Any]) -> None:
+        with self._lock:
+            self._items.append(item)
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._items)
+        return items[::-1][:limit]
+
+
+class _TemplateFields(dict):
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
+
+
+def render_template(text: str, record: Dict[str, Any]) -> str:
+    """
+    str.format over the record fields; lists are joined with ", " and
+    unknown placeholders are left as they are.
+    """
+    fields = _TemplateFields(
+        {k: ", ".join(v) if isinstance(v, list) else v for k, v in record.items()}
+    )
+    return text.format_map(fields)
+
+
+def default_actions(outbox: Outbox) -> Dict[str, ActionHandler]:
+    def log_action(event: Dict[str, Any]) -> None:
+        outbox.append(event)
+
+    def email_action(event: Dict[str, Any]) -> None:
+        params = event["params"]
+        outbox.append(
+            {
+                **event,
+                "email": {
+                    "template": params.get("template"),
+                    "subject": render_template(params.get("subject", ""), event["record"]),
+                },
+            }
+        )
+
+    return {"log": log_action, "email": email_action}
+
+
+# ---------- engine ----------
+
+
+class RetentionEngine:
+    """
+    Evaluates the flows over committed analytics records and runs their
+    delayed steps.
+
+    Pending steps live in one min-heap keyed by due time, so scheduling
+    and running a step are O(log n) however many are pending, and the
+    runner only ever looks at the head: it sleeps until the earliest due
+    time (or until an earlier step is scheduled) instead of scanning.
+    A flow instance holds a single heap entry; running a step schedules
+    the next one, `delay` after the step's due time.
+
+    With a `store`, the heap is mirrored to SQLite and reloaded on
+    construction, so pending steps survive restarts and deploys. Steps
+    of flows that were removed (or lost steps) since are dropped and
+    counted as orphaned. A step that ran just before a crash, before its
+    batch was written, runs again after the restart (at least once).
+
+    `clock` is injectable: tests drive the engine with a fake clock and
+    run_due() instead of start().
+    """
+
+    def __init__(
+        self,
+        flows: List[RetentionFlow],
+        actions: Optional[Dict[str, ActionHandler]] = None,
+        clock: Callable[[], float] = time.time,
+        max_pending: int = 1_000_000,
+        store: Optional[PendingStepStore] = None,
+    ):
+        self.outbox = Outbox()
+        self.actions: Dict[str, ActionHandler] = default_actions(self.outbox)
+        self.actions.update(actions or {})
+        for flow in flows:
+            for step in flow.steps:
+                if step.action not in self.actions:
+                    raise ValueError(f"flow {flow.id}: unknown action {step.action!r}")
+
+        self.flows = flows
+        self.max_pending = max_pending
+        self._clock = clock
+        # (due, seq, flow index, step index, record context)
+        self._heap: List[Tuple[float, int, int, int, Dict[str, Any]]] = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.triggered = {flow.id: 0 for flow in flows}
+        self.executed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.orphaned = 0
+
+        self.store = store
+        if store is not None:
+            self._restore(store)
+
+    def _restore(self, store: PendingStepStore) -> None:
+        index_of = {flow.id: i for i, flow in enumerate(self.flows)}
+        orphans = []
+        for seq, due, flow_id, step_index, context in store.load():
+            i = index_of.get(flow_id)
+            if i is None or step_index >= len(self.flows[i].steps):
+                orphans.append(seq)
+                continue
+            self._heap.append((due, seq, i, step_index, context))
+            self._seq = max(self._seq, seq)
+        heapq.heapify(self._heap)
+        if orphans:
+            self.orphaned = len(orphans)
+            print(f"Retention flows: dropped {len(orphans)} pending steps of removed flows")
+            store.apply(removed=orphans)
+
+    def _row(self, entry: Tuple[float, int, int, int, Dict[str, Any]]) -> PendingRow:
+        due, seq, flow_index, step_index, context = entry
+        return seq, due, self.flows[flow_index].id, step_index, context
+
+    # ---------- scheduling ----------
+
+    def _push_locked(
+        self,
+        due: float,
+        flow_index: int,
+        step_index: int,
+        context: Dict[str, Any],
+        added: Optional[List[PendingRow]] = None,
+    ) -> bool:
+        if len(self._heap) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._seq += 1
+        entry = (due, self._seq, flow_index, step_index, context)
+        heapq.heappush(self._heap, entry)
+        if added is not None:
+            added.append(self._row(entry))
+        return True
+
+    def on_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Commit listener: start the flows each record triggers.
+        """
+        if not self.flows:
+            return
+        now = self._clock()
+        added: Optional[List[PendingRow]] = [] if self.store is not None else None
+        with self._lock:
+            head = self._heap[0][0] if self._heap else None
+            for record in records:
+                context = None
+                for i, flow in enumerate(self.flows):
+                    if not flow.matches(record):
+                        continue
+                    if context is None:
+                        context = {k: record.get(k) for k in _CONTEXT_FIELDS}
+                    if self._push_locked(now + flow.steps[0].delay, i, 0, context, added):
+                        self.triggered[flow.id] += 1
+            if added:
+                self.store.apply(added=added)
+            new_head = self._heap[0][0] if self._heap else None
+        if new_head is not None and (head is None or new_head < head):
+            self._wake.set()
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def pending(self) -> int:
+        return len(self._heap)
+
+    # ---------- execution ----------
+
+    def run_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> int:
+        """
+        Run every step due at `now` (default: the clock), including
+        follow-up steps that fall due by then; returns how many ran.
+        The store is updated every _STORE_BATCH steps and at the end.
+        """
+        if now is None:
+            now = self._clock()
+        ran = 0
+        added: Optional[List[PendingRow]] = [] if self.store is not None else None
+        removed: List[int] = []
+        while limit is None or ran < limit:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                due, seq, flow_index, step_index, context = heapq.heappop(self._heap)
+                flow = self.flows[flow_index]
+                if step_index + 1 < len(flow.steps):
+                    self._push_locked(
+                        due + flow.steps[step_index + 1].delay,
+                        flow_index,
+                        step_index + 1,
+                        context,
+                        added,
+                    )
+                if added is not None:
+                    removed.append(seq)
+                    if len(removed) >= _STORE_BATCH:
+                        self.store.apply(added, removed)
+                        added, removed = [], []
+
+            step = flow.steps[step_index]
+            event = {
+                "flow": flow.id,
+                "step": step_index,
+                "action": step.action,
+                "params": step.params,
+                "record": context,
+                "due": due,
+                "executed_at": now,
+            }
+            try:
+                self.actions[step.action](event)
+                self.executed += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Retention action error ({flow.id} step {step_index}):", e)
+            ran += 1
+        if added is not None:
+            with self._lock:
+                self.store.apply(added, removed)
+        return ran
+
+    # ---------- background runner ----------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="retention-flows", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, max_sleep: float = 60.0) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.run_due()
+            due = self.next_due()
+            timeout = max_sleep if due is None else min(max(due - self._clock(), 0.0), max_sleep)
+            self._wake.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "flows": [flow.id for flow in self.flows],
+            "running": self.running,
+            "pending": self.pending(),
+            "next_due": self.next_due(),
+            "triggered": dict(self.triggered),
+            "executed": self.executed,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "orphaned": self.orphaned,
+            "persisted": self.store is not None,
+        }
+
+
+_ENGINE: Optional[RetentionEngine] = None
+
+
+def get_retention_engine() -> RetentionEngine:
+    """
+    Engine over the configured flows file, created on first use.
+    """
+    global _ENGINE
+    if _ENGINE is None:
+        max_pending = int(os.getenv(RETENTION_MAX_PENDING_ENV, 1_000_000))
+        try:
+            flows = load_flows()
+            # Without flows (none defined, or a broken file) the stored
+            # steps are left alone rather than dropped as orphans
+            store = open_pending_store() if flows else None
+            _ENGINE = RetentionEngine(flows, max_pending=max_pending, store=store)
+        except (OSError, ValueError) as e:
+            print("Retention flows load error:", e)
+            _ENGINE = RetentionEngine([], max_pending=max_pending)
+    return _ENGINE
+
+
+def set_retention_engine(engine: Optional[RetentionEngine]) -> None:
+    global _ENGINE
+    if _ENGINE is not None and _ENGINE is not engine:
+        _ENGINE.stop()
+    _ENGINE = engine
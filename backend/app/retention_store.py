@@ -0,0 +1,108 @@
+# backend/app/retention_store.py
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Path of the pending retention steps; set to "" to keep them in memory only
+RETENTION_DB_ENV = "NUTRIGUIDE_RETENTION_DB"
+
+_DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "retention.sqlite3",
+)
+
+# (seq, due, flow id, step index, record context)
+PendingRow = Tuple[int, float, str, int, Dict[str, Any]]
+
+
+class PendingStepStore:
+    """
+    Pending retention flow steps in a local SQLite file, so a restart
+    picks up the delayed steps where the last process left them.
+
+    The engine's heap stays the scheduler; this table only mirrors it.
+    Rows are keyed by the heap entry's sequence number and written in
+    one transaction per batch of changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pending_steps (
+                    seq INTEGER PRIMARY KEY,
+                    due REAL NOT NULL,
+                    flow TEXT NOT NULL,
+                    step INTEGER NOT NULL,
+                    context TEXT NOT NULL
+                )
+                """
+            )
+
+    def load(self) -> List[PendingRow]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, due, flow, step, context FROM pending_steps"
+            ).fetchall()
+        return [(seq, due, flow, step, json.loads(context)) for seq, due, flow, step, context in rows]
+
+    def apply(self, added: Iterable[PendingRow] = (), removed: Iterable[int] = ()) -> None:
+        """
+        Insert the newly scheduled steps and delete the ones that ran (or
+        were dropped), in one transaction.
+        """
+        added = [
+            (seq, due, flow, step, json.dumps(context))
+            for seq, due, flow, step, context in added
+        ]
+        removed = [(seq,) for seq in removed]
+        if not added and not removed:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                if removed:
+                    self._conn.executemany("DELETE FROM pending_steps WHERE seq = ?", removed)
+                if added:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO pending_steps (seq, due, flow, step, context) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        added,
+                    )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending_steps").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_pending_store() -> Optional[PendingStepStore]:
+    """
+    Open the store configured by NUTRIGUIDE_RETENTION_DB (default
+    backend/data/retention.sqlite3), or None if disabled or the file
+    can't be opened.
+    """
+    path = os.getenv(RETENTION_DB_ENV, _DEFAULT_DB_PATH)
+    if not path:
+        return None
+    try:
+        return PendingStepStore(path)
+    except (sqlite3.Error, OSError) as e:
+        print("Retention store disabled:", e)
+        return None
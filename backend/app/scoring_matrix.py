@@ -0,0 +1,186 @@
+# backend/app/scoring_matrix.py
+
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # if library not installed
+
+from .allergens import get_allergen_lexicon
+from .catalog_index import CatalogIndex
+
+
+# Must stay in sync with the weights in recommend_products._score_product
+PROFILE_WEIGHT = 25
+AGE_WEIGHT = 15
+GOAL_WEIGHT = 10
+LIFESTYLE_WEIGHT = 6
+DIET_WEIGHT = 6
+BASE_PRIORITY_WEIGHT = 5
+
+
+def _vocab(products: List[Dict[str, Any]], key: str) -> Dict[str, int]:
+    values = sorted({v for p in products for v in p.get(key, [])})
+    return {v: i for i, v in enumerate(values)}
+
+
+class CatalogMatrix:
+    """
+    Dense feature matrix of a product catalog.
+
+    Columns are laid out as
+    [profile_types | age_groups | goals | lifestyle | veg_friendly | base_priority],
+    all multi-hot except base_priority, so a quiz turns into one weight
+    vector and raw scores for every product come from a single
+    matrix-vector product.
+
+    Contraindications are kept as allergen lexicon bitmasks (uint64),
+    one per product.
+    """
+
+    def __init__(
+        self,
+        products: List[Dict[str, Any]],
+        version: int = 0,
+        contra_masks: Optional[List[int]] = None,
+    ):
+        if np is None:
+            raise RuntimeError("numpy is required for the numpy scoring backend")
+
+        self.products = products
+        self.version = version
+        n = len(products)
+
+        self.profile_vocab = _vocab(products, "profile_types")
+        self.age_vocab = _vocab(products, "age_groups")
+        self.goal_vocab = _vocab(products, "goals")
+        self.lifestyle_vocab = _vocab(products, "lifestyle")
+
+        self._profile_off = 0
+        self._age_off = self._profile_off + len(self.profile_vocab)
+        self._goal_off = self._age_off + len(self.age_vocab)
+        self._lifestyle_off = self._goal_off + len(self.goal_vocab)
+        self._veg_col = self._lifestyle_off + len(self.lifestyle_vocab)
+        self._base_col = self._veg_col + 1
+        width = self._base_col + 1
+
+        features = np.zeros((n, width), dtype=np.float64)
+        min_age = np.full(n, np.nan)
+        max_age = np.full(n, np.nan)
+
+        for row, p in enumerate(products):
+            for v in p.get("profile_types", []):
+                features[row, self._profile_off + self.profile_vocab[v]] = 1
+            for v in p.get("age_groups", []):
+                features[row, self._age_off + self.age_vocab[v]] = 1
+            for v in p.get("goals", []):
+                features[row, self._goal_off + self.goal_vocab[v]] = 1
+            for v in p.get("lifestyle", []):
+                features[row, self._lifestyle_off + self.lifestyle_vocab[v]] = 1
+            if any("vegan" in t or "vegetarian" in t for t in p.get("diet_tags", [])):
+                features[row, self._veg_col] = 1
+            features[row, self._base_col] = p.get("base_priority", 0)
+
+            if isinstance(p.get("min_age"), (int, float)):
+                min_age[row] = p["min_age"]
+            if isinstance(p.get("max_age"), (int, float)):
+                max_age[row] = p["max_age"]
+
+        if contra_masks is None:
+            lexicon = get_allergen_lexicon()
+            contra_masks = [lexicon.mask_of(p.get("contraindications", [])) for p in products]
+
+        self.features = features
+        self.contra_bits = np.array(contra_masks, dtype=np.uint64).reshape(n)
+        self.min_age = min_age
+        self.max_age = max_age
+        self.is_core = features[:, self._base_col] > 0
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def quiz_vector(self, quiz) -> "np.ndarray":
+        """
+        Weight vector for a quiz, aligned with the feature columns.
+        """
+        q = np.zeros(self.features.shape[1], dtype=np.float64)
+
+        if quiz.profile_type and quiz.profile_type in self.profile_vocab:
+            q[self._profile_off + self.profile_vocab[quiz.profile_type]] = PROFILE_WEIGHT
+        if quiz.age_group and quiz.age_group in self.age_vocab:
+            q[self._age_off + self.age_vocab[quiz.age_group]] = AGE_WEIGHT
+        for g in quiz.goals or []:
+            if g in self.goal_vocab:
+                q[self._goal_off + self.goal_vocab[g]] = GOAL_WEIGHT
+        for s in quiz.lifestyle or []:
+            if s in self.lifestyle_vocab:
+                q[self._lifestyle_off + self.lifestyle_vocab[s]] = LIFESTYLE_WEIGHT
+
+        diet = quiz.diet or []
+        if "vegan" in diet or "vegetarian" in diet:
+            q[self._veg_col] = DIET_WEIGHT
+        q[self._base_col] = BASE_PRIORITY_WEIGHT
+        return q
+
+    def raw_scores(self, quiz) -> "np.ndarray":
+        return self.features @ self.quiz_vector(quiz)
+
+    def unsafe_mask(self, user_age_lower: int, allergy_mask: int) -> "np.ndarray":
+        """
+        Boolean mask of products that fail an age or allergy rule
+        (allergy_mask: the quiz's allergies parsed by the allergen lexicon).
+        """
+        unsafe = np.zeros(len(self.products), dtype=bool)
+        if user_age_lower:
+            with np.errstate(invalid="ignore"):
+                unsafe |= user_age_lower < self.min_age
+                unsafe |= user_age_lower > self.max_age
+
+        if allergy_mask:
+            unsafe |= (self.contra_bits & np.uint64(allergy_mask)) != 0
+        return unsafe
+
+    def rank(
+        self, quiz, unsafe: "np.ndarray", bonus: Optional["np.ndarray"] = None
+    ) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Returns (positions in ranked order, normalized scores, eligible mask).
+
+        Mirrors the pure-Python path: normalize by the max raw score of the
+        eligible products, round half-to-even like round(), then a stable
+        descending sort so ties keep catalog order. `bonus` (semantic
+        points per product) is added where the raw score is positive.
+        """
+        eligible = ~unsafe
+        if not eligible.any():
+            eligible = np.ones(len(self.products), dtype=bool)
+
+        raw = self.raw_scores(quiz)
+        if bonus is not None:
+            raw = raw + np.where(raw > 0, bonus, 0.0)
+        max_score = raw[eligible].max() if eligible.any() else 0
+        if max_score > 0:
+            scores = np.round(raw / max_score * 100)
+        else:
+            scores = np.zeros_like(raw)
+
+        positions = np.flatnonzero(eligible)
+        order = positions[np.argsort(-scores[positions], kind="stable")]
+        return order, scores, eligible
+
+
+_MATRIX: Optional[CatalogMatrix] = None
+
+
+def get_catalog_matrix(index: CatalogIndex) -> CatalogMatrix:
+    """
+    Matrix for the given compiled index, rebuilt whenever the index
+    version changes.
+    """
+    global _MATRIX
+    if _MATRIX is None or _MATRIX.version != index.version or _MATRIX.products is not index.products:
+        _MATRIX = CatalogMatrix(
+            index.products, version=index.version, contra_masks=index.contra_masks
+        )
+    return _MATRIX
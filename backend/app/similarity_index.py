@@ -0,0 +1,169 @@
+# backend/app/similarity_index.py
+
+from typing import Optional, Tuple
+
+from .catalog_index import CatalogIndex
+from .product_embeddings import ProductEmbeddings, embeddings_for_catalog, np
+
+
+class SimilarityIndex:
+    """
+    In-process top-k cosine similarity over unit-length product vectors.
+
+    Exact mode scores every product with one (queries x dim) @ (dim x n)
+    matmul and keeps the top k with argpartition.
+
+    Approximate mode is an inverted file (IVF): products are clustered
+    with spherical k-means into about sqrt(n) lists, a query scores the
+    centroids and then only the products in its `nprobe` closest lists.
+    The clustering is trained on first use.
+    """
+
+    def __init__(
+        self,
+        vectors: "np.ndarray",
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        seed: int = 0,
+    ):
+        self.vectors = vectors
+        n = len(vectors)
+        self.nlist = max(1, min(n, nlist or int(np.sqrt(n))))
+        self.nprobe = max(1, min(self.nlist, nprobe or max(1, self.nlist // 8)))
+        self._seed = seed
+        self._centroids: Optional["np.ndarray"] = None
+        self._list_offsets: Optional["np.ndarray"] = None
+        self._list_members: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    # ---------- exact ----------
+
+    def _top_k(self, scores: "np.ndarray", k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Row-wise top k of a (queries x candidates) score matrix, sorted by
+        descending score (ties in candidate order).
+        """
+        if k < scores.shape[1]:
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            part.sort(axis=1)
+        else:
+            part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+    def _search_exact(self, queries: "np.ndarray", k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        return self._top_k(queries @ self.vectors.T, k)
+
+    # ---------- approximate ----------
+
+    def train(self, iterations: int = 10, sample_size: int = 20_000) -> None:
+        """
+        Spherical k-means on a sample of the vectors, then assign every
+        vector to its closest centroid.
+        """
+        vectors = self.vectors
+        n = len(vectors)
+        rng = np.random.default_rng(self._seed)
+        sample = vectors[np.sort(rng.choice(n, min(n, sample_size), replace=False))]
+        centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids[~empty] = sums[~empty] / norms[~empty]
+
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 50_000):
+            block = vectors[start : start + 50_000]
+            assign[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+        members = np.argsort(assign, kind="stable")
+        self._list_offsets = np.searchsorted(assign[members], np.arange(self.nlist + 1))
+        self._list_members = members
+        self._centroids = centroids
+
+    def _search_approximate(
+        self, queries: "np.ndarray", k: int
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        if self._centroids is None:
+            self.train()
+        probes = self._top_k(queries @ self._centroids.T, self.nprobe)[0]
+
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        offsets, members = self._list_offsets, self._list_members
+        for row, lists in enumerate(probes):
+            candidates = np.sort(
+                np.concatenate([members[offsets[c] : offsets[c + 1]] for c in lists])
+            )
+            if not len(candidates):
+                continue
+            top, top_scores = self._top_k(
+                queries[row : row + 1] @ self.vectors[candidates].T, min(k, len(candidates))
+            )
+            positions[row, : top.shape[1]] = candidates[top[0]]
+            scores[row, : top.shape[1]] = top_scores[0]
+        return positions, scores
+
+    # ---------- public ----------
+
+    def search(
+        self, queries: "np.ndarray", k: int, approximate: bool = False
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Top k products for each query vector (rows of `queries`, unit
+        length). Returns (positions, cosine scores), both (queries x k),
+        best first. Approximate mode may find fewer than k; the rest of
+        the row is padded with position -1 / score -inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        if k <= 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        if approximate and self.nlist > 1:
+            return self._search_approximate(queries, k)
+        return self._search_exact(queries, k)
+
+
+class SemanticIndex:
+    """
+    Product embeddings and their similarity index for one compiled
+    catalog.
+    """
+
+    def __init__(self, embeddings: ProductEmbeddings, version: int = 0):
+        self.embeddings = embeddings
+        self.version = version
+        self.index = SimilarityIndex(embeddings.vectors)
+
+    def search_texts(self, texts, k: int, approximate: bool = False):
+        return self.index.search(self.embeddings.embed_queries(list(texts)), k, approximate)
+
+
+_SEMANTIC: Optional[SemanticIndex] = None
+_SEMANTIC_SOURCE = None
+
+
+def get_semantic_index(index: CatalogIndex) -> SemanticIndex:
+    """
+    Semantic index for the given compiled catalog, rebuilt whenever the
+    catalog index changes (see get_catalog_matrix).
+    """
+    global _SEMANTIC, _SEMANTIC_SOURCE
+    if np is None:
+        raise RuntimeError("numpy is required for semantic retrieval")
+    if (
+        _SEMANTIC is None
+        or _SEMANTIC.version != index.version
+        or _SEMANTIC_SOURCE is not index.products
+    ):
+        _SEMANTIC = SemanticIndex(embeddings_for_catalog(index.products), version=index.version)
+        _SEMANTIC_SOURCE = index.products
+    return _SEMANTIC
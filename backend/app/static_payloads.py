@@ -0,0 +1,151 @@
+# backend/app/static_payloads.py
+
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli variant is optional
+    brotli = None
+
+
+def encode_json(data: Any) -> bytes:
+    """
+    Same bytes FastAPI's JSONResponse would produce.
+    """
+    return json.dumps(
+        data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    """
+    Whether Accept-Encoding allows `coding` (listed with q > 0, or "*").
+    """
+    allowed = None
+    for part in accept_encoding.lower().split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        if name not in (coding, "*"):
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if name == coding:
+            return q > 0
+        allowed = q > 0  # "*", unless the coding is listed explicitly
+    return bool(allowed)
+
+
+class StaticPayload:
+    """
+    A response body that never changes for the life of the process,
+    encoded once: identity bytes, a strong ETag, and gzip / brotli
+    variants (kept only when they are actually smaller).
+
+    Each encoding gets its own ETag (the identity tag plus a suffix) since
+    the bytes differ; If-None-Match accepts any of them.
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        media_type: str = "application/json",
+        cache_control: str = "public, max-age=3600",
+    ):
+        self.body = body
+        self.media_type = media_type
+        self.cache_control = cache_control
+
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.variants: Dict[str, bytes] = {}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants["gzip"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                self.variants["br"] = compressed
+        self._etags = {self.etag} | {self._variant_etag(c) for c in self.variants}
+
+    def _variant_etag(self, coding: str) -> str:
+        return f'"{self.etag[1:-1]}-{coding}"'
+
+    def _not_modified(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):  # weak comparison is fine for GET
+                tag = tag[2:]
+            if tag in self._etags:
+                return True
+        return False
+
+    def _choose(self, accept_encoding: str) -> Tuple[Optional[str], bytes]:
+        for coding in ("br", "gzip"):
+            if coding in self.variants and _accepts(accept_encoding, coding):
+                return coding, self.variants[coding]
+        return None, self.body
+
+    def response(self, request: Request) -> Response:
+        coding, body = self._choose(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": self._variant_etag(coding) if coding else self.etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self._not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if coding:
+            headers["Content-Encoding"] = coding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "etag": self.etag,
+            "bytes": len(self.body),
+            **{f"{coding}_bytes": len(data) for coding, data in self.variants.items()},
+        }
+
+
+_PAYLOADS: Dict[str, Tuple[Hashable, StaticPayload]] = {}
+_PAYLOADS_LOCK = threading.Lock()
+
+
+def static_payload(
+    name: str,
+    build: Callable[[], Any],
+    version: Hashable = None,
+    cache_control: str = "public, max-age=3600",
+) -> StaticPayload:
+    """
+    The compiled payload registered under `name`, built from build() (any
+    JSON-serializable data) the first time, and again whenever `version`
+    changes (e.g. the catalog was reloaded).
+    """
+    entry = _PAYLOADS.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _PAYLOADS_LOCK:
+        entry = _PAYLOADS.get(name)
+        if entry is None or entry[0] != version:
+            payload = StaticPayload(encode_json(build()), cache_control=cache_control)
+            entry = _PAYLOADS[name] = (version, payload)
+    return entry[1]
+
+
+def get_static_payload_stats() -> Dict[str, Any]:
+    return {name: payload.stats() for name, (_, payload) in _PAYLOADS.items()}
@@ -0,0 +1,185 @@
+# backend/app/traffic_capture.py
+
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
+from .analytics_pipeline import AnalyticsPipeline
+
+
+# Capture file (off when unset); a ".gz" suffix writes gzip
+TRAFFIC_CAPTURE_ENV = "NUTRIGUIDE_TRAFFIC_CAPTURE"
+# Share of requests captured, 0-1 (default 1)
+TRAFFIC_CAPTURE_SAMPLE_ENV = "NUTRIGUIDE_TRAFFIC_CAPTURE_SAMPLE"
+
+CAPTURE_FORMAT = "nutriguide-traffic"
+CAPTURE_VERSION = 1
+
+
+class CapturedRequest(NamedTuple):
+    ts: float  # arrival time, epoch seconds
+    method: str
+    path: str
+    params: Dict[str, Any]
+    body: Any
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+class TrafficCapture:
+    """
+    Appends request payloads with their arrival times to an NDJSON log,
+    one compact line per request:
+
+        {"ts": 1760000000.123, "method": "POST", "path": "/quiz/recommend", "body": {...}}
+
+    ("params" only when the request had query parameters), after a header
+    line {"format": "nutriguide-traffic", "version": 1, ...}.
+
+    record() only enqueues; lines are encoded and written in batches by
+    the same bounded queue + writer thread the analytics pipeline uses,
+    so capture adds microseconds to a request. When the writer falls
+    behind, requests are dropped from the capture (counted), never slowed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample: float = 1.0,
+        clock: Callable[[], float] = time.time,
+        maxsize: int = 100_000,
+    ):
+        self.path = path
+        self.sample = min(1.0, max(0.0, sample))
+        self._clock = clock
+        self._rng = random.Random()
+        self.captured = 0
+        self.sampled_out = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = _open(path, "ab")
+        if is_new:
+            header = {"format": CAPTURE_FORMAT, "version": CAPTURE_VERSION, "started_at": clock()}
+            self._file.write(_dumps(header) + b"\n")
+        self._lock = threading.Lock()
+        self._pipeline = AnalyticsPipeline(
+            self._write_batch, maxsize=maxsize, batch_size=1024, flush_interval=0.5
+        )
+        self._pipeline.start()
+
+    def record(
+        self, path: str, body: Any, params: Optional[Dict[str, Any]] = None, method: str = "POST"
+    ) -> None:
+        if self.sample < 1.0 and self._rng.random() >= self.sample:
+            self.sampled_out += 1
+            return
+        line: Dict[str, Any] = {"ts": round(self._clock(), 3), "method": method, "path": path}
+        if params:
+            line["params"] = params
+        # Request models are dumped only for the requests actually captured
+        line["body"] = body.model_dump() if hasattr(body, "model_dump") else body
+        self._pipeline.submit(line)
+
+    def _write_batch(self, lines) -> None:
+        data = b"".join(_dumps(line) + b"\n" for line in lines)
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+        self.captured += len(lines)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        return self._pipeline.flush(timeout)
+
+    def close(self) -> None:
+        self._pipeline.stop()
+        with self._lock:
+            self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        pipeline = self._pipeline.stats()
+        return {
+            "path": self.path,
+            "sample": self.sample,
+            "captured": self.captured,
+            "sampled_out": self.sampled_out,
+            "dropped": pipeline.get("dropped"),
+            "queue_depth": pipeline.get("queue_depth"),
+        }
+
+
+def read_capture(path: str) -> Iterator[CapturedRequest]:
+    """
+    Requests of a capture file in arrival order as written. A truncated
+    last line (capture still running, or killed) is skipped.
+    """
+    with _open(path, "rb") as f:
+        for raw in f:
+            try:
+                line = json.loads(raw)
+            except ValueError:
+                continue
+            if "format" in line:
+                if line["format"] != CAPTURE_FORMAT or line.get("version", 1) > CAPTURE_VERSION:
+                    raise ValueError(f"{path}: not a {CAPTURE_FORMAT} v{CAPTURE_VERSION} capture")
+                continue
+            yield CapturedRequest(
+                line["ts"], line.get("method", "POST"), line["path"], line.get("params") or {}, line.get("body")
+            )
+
+
+_CAPTURE: Optional[TrafficCapture] = None
+
+
+def start_traffic_capture() -> Optional[TrafficCapture]:
+    """
+    Start capturing when NUTRIGUIDE_TRAFFIC_CAPTURE is set (with
+    NUTRIGUIDE_TRAFFIC_CAPTURE_SAMPLE); None otherwise.
+    """
+    global _CAPTURE
+    path = os.getenv(TRAFFIC_CAPTURE_ENV)
+    if _CAPTURE is None and path:
+        try:
+            sample = float(os.getenv(TRAFFIC_CAPTURE_SAMPLE_ENV, "1"))
+        except ValueError:
+            sample = 1.0
+        _CAPTURE = TrafficCapture(path, sample=sample)
+    return _CAPTURE
+
+
+def stop_traffic_capture() -> None:
+    global _CAPTURE
+    if _CAPTURE is not None:
+        _CAPTURE.close()
+        _CAPTURE = None
+
+
+def capture_request(
+    path: str, body: Any, params: Optional[Dict[str, Any]] = None, method: str = "POST"
+) -> None:
+    """
+    Record one request if capture is on (a no-op otherwise).
+    """
+    if _CAPTURE is not None:
+        _CAPTURE.record(path, body, params, method)
+
+
+def get_traffic_capture_stats() -> Optional[Dict[str, Any]]:
+    return _CAPTURE.stats() if _CAPTURE is not None else None
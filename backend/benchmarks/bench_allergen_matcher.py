@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_allergen_matcher.py
+"""
+Allergy safety filtering over a synthetic catalog: the previous per
+product substring scans (kept here as a reference) vs. parsing the
+allergies once into a lexicon bitmask and ANDing it with the products'
+precomputed contraindication masks. Also lists answers where the two
+disagree (substring false positives / negatives).
+
+Run from backend/:
+    python -m benchmarks.bench_allergen_matcher [catalog_size]
+"""
+
+import json
+import sys
+import time
+
+from app.allergens import get_allergen_lexicon
+from app.catalog_index import CatalogIndex
+
+from .synthetic import make_catalog
+
+# The rules that used to live in recommend_products._ALLERGY_RULES
+_SUBSTRING_RULES = [
+    ("fish_allergy", ["fish", "seafood", "omega-3"]),
+    ("dairy_allergy", ["dairy", "milk", "lactose", "casein", "whey"]),
+    ("nut_allergy", ["nut", "nuts", "peanut", "almond", "cashew"]),
+]
+
+ANSWERS = [
+    "none", "", "fish", "milk", "peanuts", "shellfish and dairy", "pollen",
+    "coconut", "nutmeg", "doughnuts", "whey protein", "omega 3", "tree nuts",
+    "Walnuts, cheese", "fishing", "salmon",
+]
+
+
+def _substring_unsafe(products, allergies: str):
+    allergies = allergies.lower()
+    return [
+        pos
+        for pos, p in enumerate(products)
+        if any(
+            contra in p.get("contraindications", []) and any(w in allergies for w in words)
+            for contra, words in _SUBSTRING_RULES
+        )
+    ]
+
+
+def _mask_unsafe(index: CatalogIndex, allergies: str):
+    mask = index.lexicon.parse(allergies)
+    if not mask:
+        return []
+    return [pos for pos, m in enumerate(index.contra_masks) if m & mask]
+
+
+def _per_request_us(fn, *args, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for answer in ANSWERS:
+            fn(*args, answer)
+    return (time.perf_counter() - start) / (repeat * len(ANSWERS)) * 1e6
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    products = make_catalog(size, seed=11)
+    index = CatalogIndex(products, lexicon=get_allergen_lexicon())
+    lexicon = index.lexicon
+
+    disagreements = {}
+    for answer in ANSWERS:
+        old = sorted({c for c, words in _SUBSTRING_RULES if any(w in answer.lower() for w in words)})
+        new = sorted(lexicon.names(lexicon.parse(answer)))
+        if old != new:
+            disagreements[answer] = {"substring": old, "lexicon": new}
+
+    repeat = max(1, 200_000 // size)
+    json.dump(
+        {
+            "catalog_size": size,
+            "substring_scan_us": round(_per_request_us(_substring_unsafe, products, repeat=repeat), 1),
+            "bitmask_us": round(_per_request_us(_mask_unsafe, index, repeat=repeat), 1),
+            "parse_only_us": round(_per_request_us(lexicon.parse, repeat=repeat * 100), 2),
+            "disagreements": disagreements,
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_analytics_memory.py
+"""
+Bytes per record: list of dicts (the original store) vs. the columnar
+RingBufferBackend, plus append throughput.
+
+Run from backend/:
+    python -m benchmarks.bench_analytics_memory [records]
+
+The dict-list side is measured with tracemalloc, which is memory hungry;
+bytes per record do not depend on the count, so the default is 200k.
+"""
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from app.analytics_backends import RingBufferBackend
+
+from .synthetic import make_records
+
+
+def _fresh(records):
+    # Independent objects per record, like records built from real requests
+    return [json.loads(json.dumps(rec)) for rec in records]
+
+
+def _check_consistent(records, capacity: int = 1_000) -> None:
+    ring = RingBufferBackend(capacity)
+    for i in range(0, len(records), 97):
+        ring.append(records[i:i + 97])
+    expected = list(reversed(records[-capacity:]))
+    assert ring.recent(capacity) == expected
+    assert ring.count() == min(capacity, len(records))
+
+
+def _traced_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    template = make_records(min(count, 50_000), seed=5)
+    _check_consistent(template[:5_000])
+
+    def _dict_list():
+        out = []
+        while len(out) < count:
+            out.extend(_fresh(template[: count - len(out)]))
+        return out
+
+    def _ring():
+        ring = RingBufferBackend(count)
+        appended = 0
+        while appended < count:
+            chunk = template[: count - appended]
+            ring.append(chunk)
+            appended += len(chunk)
+        return ring
+
+    dict_bytes = _traced_bytes(_dict_list)
+    ring_bytes = _traced_bytes(_ring)
+
+    ring = RingBufferBackend(count)
+    start = time.perf_counter()
+    for i in range(0, count, 256):
+        ring.append(template[i % len(template):i % len(template) + 256])
+    append_s = time.perf_counter() - start
+
+    json.dump(
+        {
+            "records": count,
+            "dict_list_bytes_per_record": round(dict_bytes / count, 1),
+            "ring_buffer_bytes_per_record": round(ring_bytes / count, 1),
+            "ring_buffer_appends_per_s": round(ring.count() / append_s) if append_s else None,
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_analytics_rollups.py
+"""
+Consistency check + timing for the time-bucketed analytics rollups.
+
+Records spread over the last `days` are fed through a RollupStore on a
+fake clock (so compaction runs as it would in production). Windowed
+queries are then compared with a scan of the raw records in the same
+(bucket-aligned) window and timed against that scan.
+
+Run from backend/:
+    python -m benchmarks.bench_analytics_rollups [records] [days]
+"""
+
+import json
+import sys
+import time
+
+from app import analytics_store
+from app.analytics_backends import _epoch_to_iso, _iso_to_epoch, aggregate_records
+from app.analytics_rollups import RollupStore, parse_window
+
+from .synthetic import make_records
+
+_QUERIES = [
+    ("15m", None),
+    ("1h", "minute"),
+    ("24h", "hour"),
+    ("7d", None),
+    ("7d", "day"),
+    ("30d", "day"),
+]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    days = float(sys.argv[2]) if len(sys.argv) > 2 else 30.0
+
+    end = 1_700_000_000.0
+    start = end - days * 86400
+    step = (end - start) / count
+    records = make_records(count, seed=9)
+    for i, rec in enumerate(records):
+        rec["timestamp"] = _epoch_to_iso(start + i * step)
+
+    now = [start]
+    rollups = RollupStore(clock=lambda: now[0])
+    t0 = time.perf_counter()
+    for i in range(0, count, 256):
+        chunk = records[i:i + 256]
+        now[0] = _iso_to_epoch(chunk[-1]["timestamp"]) + 1
+        rollups.add(chunk)
+    add_s = time.perf_counter() - t0
+
+    epochs = [_iso_to_epoch(rec["timestamp"]) for rec in records]
+    results = []
+    for window, granularity in _QUERIES:
+        seconds = parse_window(window)
+        q0 = time.perf_counter()
+        total, series, used, window_start, _ = rollups.query(seconds, granularity)
+        query_ms = (time.perf_counter() - q0) * 1e3
+
+        s0 = time.perf_counter()
+        in_window = [rec for rec, ts in zip(records, epochs) if ts >= window_start]
+        expected = aggregate_records(in_window)
+        scan_ms = (time.perf_counter() - s0) * 1e3
+
+        summarize = analytics_store._summary_from_aggregates
+        assert summarize(total.snapshot()) == summarize(expected), (window, granularity)
+        assert sum(agg.total for _, agg in series) == total.total
+        results.append(
+            {
+                "window": window,
+                "granularity": used,
+                "records_in_window": total.total,
+                "series_points": len(series),
+                "rollup_query_ms": round(query_ms, 3),
+                "raw_scan_ms": round(scan_ms, 2),
+            }
+        )
+
+    json.dump(
+        {
+            "records": count,
+            "days": days,
+            "adds_per_s": round(count / add_s),
+            "rollups": rollups.stats(),
+            "queries": results,
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_analytics_sqlite.py
+"""
+Insert throughput and query latency of the SQLite analytics backend.
+
+Run from backend/:
+    python -m benchmarks.bench_analytics_sqlite [rows] [batch_size]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.analytics_backends import SQLiteBackend
+
+from .synthetic import make_records
+
+
+CHECKPOINTS = [10_000, 100_000, 1_000_000, 3_000_000]
+
+
+def _query_ms(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1e3, 2)
+
+
+def main() -> None:
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    # Reuse a block of records; only timestamps matter for ordering
+    block = make_records(min(total_rows, 100_000), seed=3)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "analytics.sqlite3"))
+        inserted = 0
+        insert_seconds = 0.0
+
+        for checkpoint in [c for c in CHECKPOINTS if c <= total_rows] or [total_rows]:
+            while inserted < checkpoint:
+                n = min(batch_size, checkpoint - inserted)
+                offset = inserted % len(block)
+                batch = block[offset:offset + n]
+                start = time.perf_counter()
+                backend.append(batch)
+                insert_seconds += time.perf_counter() - start
+                inserted += len(batch)
+
+            results.append(
+                {
+                    "rows": inserted,
+                    "insert_rows_per_s": round(inserted / insert_seconds),
+                    "recent_100_ms": _query_ms(lambda: backend.recent(100)),
+                    "count_ms": _query_ms(backend.count),
+                    "aggregates_ms": _query_ms(backend.aggregates, repeat=1),
+                    "top_segments_ms": _query_ms(lambda: backend.top_segments(20), repeat=1),
+                    "db_bytes_per_row": round(
+                        os.path.getsize(backend.path) / inserted, 1
+                    ),
+                }
+            )
+        backend.close()
+
+    json.dump({"batch_size": batch_size, "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_bulk_emails.py
+"""
+Bulk welcome-email generation: NDJSON in -> NDJSON out throughput on one
+core, for the CLI path (parse, render, encode) with the input's
+recommendations and with recommendations re-run, and through the
+/content/welcome-email/bulk endpoint in-process (with as many lines as
+fit under its body cap). The per-email
+/content/welcome-email handler work (request validation, render,
+response encoding) is the baseline. Target: 100k emails / minute.
+
+Run from backend/:
+    python -m benchmarks.bench_bulk_emails [emails]
+"""
+
+import io
+import json
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app.bulk_content import MAX_BODY_BYTES, _encode_chunk, iter_bulk_emails, iter_ndjson_items
+from app.content_assistant import generate_email_copy
+from app.main import ContentRequest, app
+from app.recommend_products import get_recommendation
+
+from .synthetic import make_quizzes
+
+
+def _per_minute(count: int, seconds: float) -> int:
+    return round(count / seconds * 60)
+
+
+def _run_cli_path(data: bytes, recommend: bool) -> float:
+    start = time.perf_counter()
+    out = io.BytesIO()
+    rows = []
+    for row in iter_bulk_emails(iter_ndjson_items(io.BytesIO(data)), recommend):
+        rows.append(row)
+        if len(rows) >= 1000:
+            out.write(_encode_chunk(rows))
+            rows = []
+    out.write(_encode_chunk(rows))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    quizzes = make_quizzes(500, seed=12)
+    items = []
+    for i, quiz in enumerate(quizzes):
+        result = get_recommendation(quiz, include_llm_explanation=False)
+        items.append({"id": i, "quiz": quiz.model_dump(), "recommendation": result})
+    lines = [json.dumps(items[i % len(items)]).encode("utf-8") for i in range(count)]
+    data = b"\n".join(lines) + b"\n"
+
+    # Baseline: what the single-email endpoint does per call
+    sample = [json.dumps({"quiz": it["quiz"], "recommendation": it["recommendation"]}) for it in items]
+    start = time.perf_counter()
+    for i in range(count):
+        payload = ContentRequest.model_validate_json(sample[i % len(sample)])
+        json.dumps(generate_email_copy(payload.quiz, payload.recommendation))
+    single_s = time.perf_counter() - start
+
+    cli_s = _run_cli_path(data, recommend=False)
+    cli_recommend_s = _run_cli_path(data, recommend=True)
+
+    endpoint_data = data[: data.rfind(b"\n", 0, MAX_BODY_BYTES) + 1]
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        response = client.post("/content/welcome-email/bulk", content=endpoint_data)
+        endpoint_s = time.perf_counter() - start
+        assert response.status_code == 200
+        endpoint_rows = response.content.count(b"\n")
+
+    json.dump(
+        {
+            "emails": count,
+            "input_mb": round(len(data) / 1e6, 1),
+            "single_handler_per_min": _per_minute(count, single_s),
+            "bulk_cli_per_min": _per_minute(count, cli_s),
+            "bulk_cli_recommend_per_min": _per_minute(count, cli_recommend_s),
+            "bulk_endpoint_per_min": _per_minute(endpoint_rows, endpoint_s),
+            "target_per_min": 100_000,
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
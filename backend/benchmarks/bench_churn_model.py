@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_churn_model.py
+"""
+Churn model on synthetic analytics records: training time, batch scoring
+throughput against the per-record _compute_risk heuristic it replaces,
+and a full re-score of a SQLite store (read, score, update per batch).
+
+Run from backend/:
+    python -m benchmarks.bench_churn_model [record_count]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.analytics_backends import SQLiteBackend
+from app.analytics_store import _compute_risk
+from app.churn_model import records_to_columns, synthetic_churn_labels, train_churn_model
+from app.recommend_products import get_recommendation
+
+from .synthetic import make_quizzes, make_records
+
+
+def _seconds(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    records = make_records(count, seed=5)
+    columns = records_to_columns(records)
+    labels = synthetic_churn_labels(columns, seed=5)
+
+    model = None
+
+    def train():
+        nonlocal model
+        model = train_churn_model(columns, labels)
+
+    train_s = _seconds(train)
+
+    # The heuristic needs (quiz, result) pairs; use a pool like make_records
+    quizzes = make_quizzes(500, seed=5)
+    pairs = [(q, get_recommendation(q, include_llm_explanation=False)) for q in quizzes]
+    pairs = (pairs * (count // len(pairs) + 1))[:count]
+    heuristic_s = _seconds(lambda: [_compute_risk(q, r) for q, r in pairs])
+    batch_s = _seconds(lambda: model.score_columns(columns))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "analytics.sqlite3"))
+        backend.append(records)
+        rescore_s = _seconds(lambda: backend.rescore_risk(model.score_columns, model.version))
+        backend.close()
+
+    json.dump(
+        {
+            "records": count,
+            "train_s": round(train_s, 3),
+            "metrics": model.params["metrics"],
+            "heuristic_per_row_records_per_s": round(count / heuristic_s),
+            "model_batch_records_per_s": round(count / batch_s),
+            "sqlite_rescore_s": round(rescore_s, 2),
+            "sqlite_rescore_records_per_s": round(count / rescore_s),
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
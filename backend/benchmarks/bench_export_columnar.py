@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_export_columnar.py
+"""
+CSV vs Arrow IPC vs Parquet exports of a SQLite analytics file: export
+time, output size, and the time to load the result back with list
+columns as lists (what a notebook does). Needs pyarrow.
+
+Run from backend/:
+    python -m benchmarks.bench_export_columnar [rows]
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.analytics_backends import SQLiteBackend
+from app.analytics_export import iter_columnar, iter_csv
+
+from .synthetic import make_records
+
+_LIST_FIELDS = ("goals", "lifestyle", "diet", "products", "upsell")
+
+
+def _load_csv(data: bytes) -> int:
+    rows = 0
+    for row in csv.DictReader(io.StringIO(data.decode("utf-8"))):
+        for col in _LIST_FIELDS:
+            row[col] = row[col].split(";") if row[col] else []
+        rows += 1
+    return rows
+
+
+def _load_arrow(data: bytes) -> int:
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all().num_rows
+
+
+def _load_parquet(data: bytes) -> int:
+    return pq.read_table(pa.BufferReader(data)).num_rows
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "analytics.sqlite3"))
+        template = make_records(min(rows, 50_000), seed=6)
+        written = 0
+        while written < rows:
+            batch = template[: min(len(template), rows - written)]
+            backend.append(batch)
+            written += len(batch)
+
+        exports = {
+            "csv": (lambda: iter_csv(backend.iter_batches(batch_size=5_000)), _load_csv),
+            "arrow": (
+                lambda: iter_columnar(backend.iter_column_batches(batch_size=50_000), "arrow"),
+                _load_arrow,
+            ),
+            "parquet": (
+                lambda: iter_columnar(backend.iter_column_batches(batch_size=50_000), "parquet"),
+                _load_parquet,
+            ),
+        }
+
+        results = {}
+        for name, (export, load) in exports.items():
+            start = time.perf_counter()
+            data = b"".join(export())
+            export_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loaded = load(data)
+            load_s = time.perf_counter() - start
+            assert loaded == rows, (name, loaded)
+
+            results[name] = {
+                "export_s": round(export_s, 2),
+                "megabytes": round(len(data) / 1e6, 2),
+                "load_s": round(load_s, 3),
+            }
+        backend.close()
+
+    json.dump({"rows": rows, **results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
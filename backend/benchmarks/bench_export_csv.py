@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_export_csv.py
+"""
+Streaming CSV export from a SQLite analytics file: time to first byte,
+throughput, and peak traced memory at two export sizes (it should stay
+at about one batch whatever the row count).
+
+Run from backend/:
+    python -m benchmarks.bench_export_csv [rows] [chunk_size]
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app.analytics_backends import SQLiteBackend
+from app.analytics_export import iter_csv
+
+from .synthetic import make_records
+
+
+def _export(backend, chunk_size: int, compress: bool):
+    start = time.perf_counter()
+    first_byte_ms = None
+    size = 0
+    for chunk in iter_csv(backend.iter_batches(batch_size=chunk_size), compress=compress):
+        if first_byte_ms is None:
+            first_byte_ms = (time.perf_counter() - start) * 1e3
+        size += len(chunk)
+    return first_byte_ms, time.perf_counter() - start, size
+
+
+def _peak_traced(backend, rows: int, chunk_size: int) -> int:
+    tracemalloc.start()
+    for _ in iter_csv(backend.iter_batches(limit=rows, batch_size=chunk_size)):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "analytics.sqlite3"))
+        template = make_records(min(rows, 50_000), seed=3)
+        written = 0
+        while written < rows:
+            batch = template[: min(len(template), rows - written)]
+            backend.append(batch)
+            written += len(batch)
+
+        # Sanity: the gzip stream is valid and holds header + every row
+        small = b"".join(iter_csv(backend.iter_batches(limit=1_000, batch_size=97), compress=True))
+        assert gzip.decompress(small).decode().count("\n") == 1_001
+
+        results = {}
+        for compress in (False, True):
+            first_byte_ms, total_s, size = _export(backend, chunk_size, compress)
+            results["gzip" if compress else "plain"] = {
+                "first_byte_ms": round(first_byte_ms, 2),
+                "rows_per_s": round(rows / total_s),
+                "megabytes": round(size / 1e6, 1),
+            }
+        # Peak memory is about one batch, so it shouldn't move with row count
+        results["peak_traced_mb"] = {
+            str(n): round(_peak_traced(backend, n, chunk_size) / 1e6, 2)
+            for n in (rows // 10, rows // 2)
+        }
+        backend.close()
+
+    json.dump({"rows": rows, "chunk_size": chunk_size, **results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
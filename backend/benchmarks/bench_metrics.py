@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_metrics.py
+"""
+Cost of the /metrics instrumentation: one histogram observation and
+counter increment, the stage timers on get_recommendation (cache hit and
+miss, against the same calls with the timers swapped for no-ops; the
+differences are within this box's run-to-run noise, compare several), the
+per-route HTTP middleware around a trivial ASGI app, and rendering a
+scrape. Target: a few microseconds per request.
+
+Run from backend/:
+    python -m benchmarks.bench_metrics
+"""
+
+import asyncio
+import json
+import time
+
+from app import recommend_products
+from app.metrics import HTTP_REQUEST_SECONDS, LLM_FALLBACKS, MetricsMiddleware, render_metrics
+
+from .suite import measure
+from .synthetic import make_quizzes
+
+_TIMERS = [name for name in vars(recommend_products) if name.endswith("_TIMER")]
+
+
+class _NullTimer:
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _recommendation_costs(quizzes) -> dict:
+    def hit(q):
+        recommend_products.get_recommendation(q, include_llm_explanation=False)
+
+    def miss(q):
+        recommend_products._RESULT_CACHE.clear()
+        recommend_products.get_recommendation(q, include_llm_explanation=False)
+
+    timed = {"hit": measure(hit, quizzes), "miss": measure(miss, quizzes)}
+    saved = {name: getattr(recommend_products, name) for name in _TIMERS}
+    try:
+        for name in _TIMERS:
+            setattr(recommend_products, name, _NullTimer())
+        bare = {"hit": measure(hit, quizzes), "miss": measure(miss, quizzes)}
+    finally:
+        for name, timer in saved.items():
+            setattr(recommend_products, name, timer)
+
+    return {
+        path: {
+            "instrumented_us": timed[path]["min_us"],
+            "bare_us": bare[path]["min_us"],
+            "overhead_us": round(timed[path]["min_us"] - bare[path]["min_us"], 2),
+        }
+        for path in timed
+    }
+
+
+def _middleware_cost(requests: int = 20_000) -> dict:
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    wrapped = MetricsMiddleware(endpoint)
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+
+    async def run(app) -> float:
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        return (time.perf_counter() - start) / requests * 1e6
+
+    async def best(app) -> float:
+        return min([await run(app) for _ in range(5)])
+
+    bare_us = asyncio.run(best(endpoint))
+    wrapped_us = asyncio.run(best(wrapped))
+    return {
+        "bare_us": round(bare_us, 2),
+        "instrumented_us": round(wrapped_us, 2),
+        "overhead_us": round(wrapped_us - bare_us, 2),
+    }
+
+
+def main() -> None:
+    quizzes = make_quizzes(200, seed=25)
+    child = HTTP_REQUEST_SECONDS.labels("GET", "/bench", "200")
+    fallback = LLM_FALLBACKS.labels("unavailable")
+
+    report = {
+        "histogram_observe": measure(lambda v: child.observe(v), [0.0001, 0.002, 0.3]),
+        "counter_inc": measure(lambda _: fallback.inc(), [None]),
+        "labels_lookup_inc": measure(lambda _: LLM_FALLBACKS.labels("unavailable").inc(), [None]),
+        "get_recommendation": _recommendation_costs(quizzes),
+        "http_middleware": _middleware_cost(),
+    }
+    start = time.perf_counter()
+    text = render_metrics()
+    report["render"] = {
+        "ms": round((time.perf_counter() - start) * 1e3, 3),
+        "bytes": len(text),
+        "lines": text.count("\n"),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_scoring_backends.py
+"""
+Compare the linear, index and numpy scoring backends: identical
+recommendations first, then per-request latency.
+
+Run from backend/:
+    python -m benchmarks.bench_scoring_backends
+"""
+
+import json
+import os
+import sys
+import time
+
+from app import products_catalog
+from app.recommend_products import SCORING_BACKENDS, _select_products
+
+from .synthetic import make_catalog, make_quizzes
+
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+
+
+def _check_identical(quizzes) -> None:
+    for q in quizzes:
+        expected = _select_products(q, "linear")
+        for backend in SCORING_BACKENDS:
+            got = _select_products(q, backend)
+            assert got == expected, f"{backend} differs from linear for {q!r}"
+
+
+def main() -> None:
+    os.environ.pop("OPENAI_API_KEY", None)
+    original = products_catalog.PRODUCT_CATALOG
+    results = []
+
+    try:
+        # The shipped catalog first, then synthetic ones
+        _check_identical(make_quizzes(500, seed=7))
+
+        for size in SIZES:
+            products_catalog.PRODUCT_CATALOG = make_catalog(size, seed=size)
+            quizzes = make_quizzes(max(5, min(200, 200_000 // size)), seed=1)
+            _check_identical(quizzes[:20])
+
+            row = {"catalog_size": size}
+            for backend in SCORING_BACKENDS:
+                start = time.perf_counter()
+                for q in quizzes:
+                    _select_products(q, backend)
+                row[f"{backend}_us"] = round(
+                    (time.perf_counter() - start) / len(quizzes) * 1e6, 1
+                )
+            results.append(row)
+    finally:
+        products_catalog.PRODUCT_CATALOG = original
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# backend/benchmarks/bench_semantic_index.py
+"""
+Semantic retrieval over synthetic catalogs: build time, load time of the
+saved vectors (memory-mapped vs. a full read), and top-k query latency
+for single and batched queries, exact vs. approximate (IVF) with its
+recall against exact. Ends with the cost of semantic blending on
+_select_products for the shipped catalog.
+
+Run from backend/:
+    python -m benchmarks.bench_semantic_index [max_catalog_size]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.product_embeddings import build_embeddings, load_embeddings, quiz_text, save_embeddings
+from app.recommend_products import _select_products
+from app.similarity_index import SimilarityIndex
+
+from .synthetic import make_catalog, make_quizzes
+
+SIZES = [1_000, 10_000, 100_000]
+K = 50
+
+
+def _ms(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def _recall(exact: np.ndarray, approx: np.ndarray) -> float:
+    hits = sum(len(set(e) & set(a[a >= 0])) for e, a in zip(exact, approx))
+    return hits / exact.size
+
+
+def main() -> None:
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    quizzes = make_quizzes(256, seed=4)
+    results = []
+
+    for size in [s for s in SIZES if s <= max_size]:
+        catalog = make_catalog(size, seed=size)
+        start = time.perf_counter()
+        embeddings = build_embeddings(catalog)
+        build_s = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            save_embeddings(embeddings, tmp)
+            vectors_path = os.path.join(tmp, "product_vectors.npy")
+            load_mmap_ms = _ms(lambda: load_embeddings(tmp), 5)
+            load_full_ms = _ms(lambda: np.load(vectors_path), 5)
+            loaded = load_embeddings(tmp)
+
+        queries = loaded.embed_queries([quiz_text(q) for q in quizzes])
+        index = SimilarityIndex(loaded.vectors)
+        index.search(queries[:1], K)  # fault the pages in
+        train_ms = _ms(index.train)
+
+        exact, _ = index.search(queries, K)
+        approx, _ = index.search(queries, K, approximate=True)
+        results.append(
+            {
+                "catalog_size": size,
+                "build_s": round(build_s, 2),
+                "load_mmap_ms": round(load_mmap_ms, 2),
+                "load_full_ms": round(load_full_ms, 2),
+                "exact_single_ms": round(_ms(lambda: index.search(queries[:1], K), 50), 3),
+                "exact_batch256_ms": round(_ms(lambda: index.search(queries, K), 5), 2),
+                "ivf_train_ms": round(train_ms, 1),
+                "ivf_single_ms": round(
+                    _ms(lambda: index.search(queries[:1], K, approximate=True), 50), 3
+                ),
+                "ivf_nlist_nprobe": [index.nlist, index.nprobe],
+                "ivf_recall_at_k": round(_recall(exact, approx), 3),
+            }
+        )
+
+    # End to end on the shipped catalog: blending off vs. on
+    pool = make_quizzes(200, seed=9)
+    _select_products(pool[0], "index", (10.0, False))  # build the semantic index
+    blend = {
+        f"{name}_us": round(_ms(lambda: [_select_products(q, "index", sem) for q in pool]) / len(pool) * 1e3, 1)
+        for name, sem in (("off", (0.0, False)), ("exact", (10.0, False)), ("approx", (10.0, True)))
+    }
+
+    json.dump({"k": K, "sizes": results, "select_products_shipped": blend}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# backend/benchmarks/replay_traffic.py
+"""
+Replay captured traffic (NUTRIGUIDE_TRAFFIC_CAPTURE, see
+app/traffic_capture.py) against the app and report latency percentiles
+and throughput per endpoint.
+
+Requests are sent open-loop at their recorded arrival offsets, divided
+by --speed (2 = twice the recorded rate), or at a fixed --rate; a slow
+server does not slow the offered load down, so the report shows what a
+traffic spike of that shape would do. The in-process target runs the app
+through an ASGI transport with the LLM stubbed and its on-disk state
+kept in memory (suite.isolated_app); a URL target drives a running
+server, e.g. a local uvicorn.
+
+Run from backend/:
+    python -m benchmarks.replay_traffic capture.ndjson.gz
+    python -m benchmarks.replay_traffic capture.ndjson.gz --speed 5 --target http://127.0.0.1:8000
+    python -m benchmarks.replay_traffic --synthetic 2000 --rate 200   # no capture needed
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # if library not installed (pip install -r requirements-dev.txt)
+
+from app.analytics_backends import RingBufferBackend
+from app.traffic_capture import CapturedRequest, read_capture
+
+from .suite import HISTORY_RECORDS, StubLLMClient, isolated_app
+from .synthetic import make_quizzes
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # Nearest rank
+    rank = min(len(sorted_values), max(1, math.ceil(q / 100 * len(sorted_values))))
+    return round(sorted_values[rank - 1], 2)
+
+
+def synthetic_requests(count: int, rate: float, seed: int = 0) -> List[CapturedRequest]:
+    """
+    /quiz/recommend requests with Poisson arrivals at `rate` per second.
+    """
+    rng = random.Random(seed)
+    ts = 0.0
+    requests = []
+    for quiz in make_quizzes(count, seed=seed):
+        ts += rng.expovariate(rate)
+        requests.append(CapturedRequest(ts, "POST", "/quiz/recommend", {}, quiz.model_dump()))
+    return requests
+
+
+def schedule(requests: List[CapturedRequest], speed: float, rate: Optional[float]) -> List[float]:
+    """
+    Send offsets (seconds from the start) for the requests.
+    """
+    if rate:
+        return [i / rate for i in range(len(requests))]
+    t0 = requests[0].ts
+    return [(r.ts - t0) / speed for r in requests]
+
+
+async def replay(
+    client: "httpx.AsyncClient",
+    requests: List[CapturedRequest],
+    offsets: List[float],
+    max_in_flight: int,
+) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    send_lag: List[float] = []
+    skipped: Counter = Counter()
+    in_flight = 0
+
+    async def send(req: CapturedRequest) -> None:
+        nonlocal in_flight
+        key = f"{req.method} {req.path}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(req.method, req.path, params=req.params or None, json=req.body)
+            await response.aread()
+            statuses[key][str(response.status_code)] += 1
+        except Exception as e:
+            statuses[key][type(e).__name__] += 1
+        finally:
+            latencies[key].append((time.perf_counter() - start) * 1e3)
+            in_flight -= 1
+
+    tasks = []
+    start = time.perf_counter()
+    for req, offset in zip(requests, offsets):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        send_lag.append(max(0.0, -delay) * 1e3)
+        if in_flight >= max_in_flight:
+            # The server is this far behind: count it instead of queueing
+            # unbounded work in the load generator
+            skipped[f"{req.method} {req.path}"] += 1
+            continue
+        in_flight += 1
+        tasks.append(asyncio.create_task(send(req)))
+    offered_s = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    wall_s = time.perf_counter() - start
+
+    endpoints = {}
+    for key, values in sorted(latencies.items()):
+        values.sort()
+        ok = sum(n for code, n in statuses[key].items() if code.startswith("2"))
+        endpoints[key] = {
+            "requests": len(values),
+            "ok": ok,
+            "statuses": dict(statuses[key]),
+            "skipped_over_max_in_flight": skipped.get(key, 0),
+            "p50_ms": _percentile(values, 50),
+            "p95_ms": _percentile(values, 95),
+            "p99_ms": _percentile(values, 99),
+            "max_ms": round(values[-1], 2),
+            "throughput_rps": round(ok / wall_s, 1) if wall_s else None,
+        }
+    send_lag.sort()
+    return {
+        "requests": len(requests),
+        "offered_duration_s": round(offered_s, 3),
+        "offered_rps": round(len(requests) / offered_s, 1) if offered_s else None,
+        "wall_duration_s": round(wall_s, 3),
+        "send_lag_p99_ms": _percentile(send_lag, 99),
+        "endpoints": endpoints,
+    }
+
+
+async def _run(args, requests: List[CapturedRequest], offsets: List[float]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.max_in_flight)
+    if args.target == "inprocess":
+        from app.main import app
+
+        # A fresh in-memory analytics backend and no capture, so the run
+        # can't append to the capture it is replaying
+        stub = None if args.real_llm else StubLLMClient(args.llm_latency_ms / 1e3)
+        transport = httpx.ASGITransport(app=app)
+        with isolated_app(RingBufferBackend(HISTORY_RECORDS), stub):
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+                    return await replay(client, requests, offsets, args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=args.timeout) as client:
+        return await replay(client, requests, offsets, args.max_in_flight)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay captured traffic and report latency.")
+    parser.add_argument("capture", nargs="?", help="capture file (.ndjson or .ndjson.gz)")
+    parser.add_argument("--synthetic", type=int, help="replay N synthetic quizzes instead of a capture")
+    parser.add_argument("--target", default="inprocess", help='"inprocess" or a base URL')
+    parser.add_argument("--speed", type=float, default=1.0, help="multiply the recorded arrival rate")
+    parser.add_argument("--rate", type=float, help="fixed requests per second instead of recorded times")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--path", help="replay only this path, e.g. /quiz/recommend")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="stub LLM delay (in-process)")
+    parser.add_argument("--real-llm", action="store_true", help="in-process without the LLM stub")
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    if httpx is None:
+        sys.exit("httpx is not installed; pip install -r requirements-dev.txt")
+    if args.synthetic:
+        requests = synthetic_requests(args.synthetic, args.rate or 50.0)
+    elif args.capture:
+        requests = list(read_capture(args.capture))
+    else:
+        parser.error("give a capture file or --synthetic N")
+    if args.path:
+        requests = [r for r in requests if r.path == args.path]
+    if args.limit:
+        requests = requests[: args.limit]
+    if not requests:
+        sys.exit("no requests to replay")
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    offsets = schedule(requests, args.speed, args.rate)
+    report = {
+        "source": args.capture or f"synthetic:{args.synthetic}",
+        "target": args.target,
+        "speed": None if args.rate else args.speed,
+        "rate": args.rate,
+        **asyncio.run(_run(args, requests, offsets)),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+# backend/benchmarks/suite.py
+"""
+Reproducible benchmark suite for the recommendation hot path, one JSON
+document per run so results can be compared between commits.
+
+Micro benchmarks (per synthetic catalog size): get_recommendation
+(scoring cache miss and hit), _score_product, _check_safety,
+log_recommendation, get_segments_summary, generate_email_copy.
+End-to-end (shipped catalog): the main endpoints through an in-process
+ASGI client, with the LLM replaced by a stub client and the analytics
+store seeded with synthetic records. Inputs are seeded, so two runs on
+the same commit measure the same work.
+
+Run from backend/:
+    python -m benchmarks.suite --out bench.json
+    python -m benchmarks.suite --sizes 10,1000,10000,100000 --out full.json
+    python -m benchmarks.suite --compare bench.json   # flags >10% slowdowns
+
+The bench_*.py modules next to this one cover what the suite does not:
+scoring and storage backends, exports, indexes and bulk jobs.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from app import analytics_store, llm_explainer, products_catalog, retention_flows
+from app.analytics_backends import AnalyticsBackend, RingBufferBackend
+from app.catalog_index import get_catalog_index
+from app.content_assistant import generate_email_copy
+from app.explanation_store import EXPLANATION_DB_ENV
+from app.recommend_products import (
+    _RESULT_CACHE,
+    _check_safety,
+    _safety_profile,
+    _score_product,
+    get_recommendation,
+)
+from app.retention_store import RETENTION_DB_ENV
+from app.traffic_capture import TRAFFIC_CAPTURE_ENV
+
+from .synthetic import make_catalog, make_quizzes, make_records
+
+DEFAULT_SIZES = [10, 1_000, 10_000]
+HISTORY_RECORDS = 50_000
+STUB_EXPLANATION = (
+    "This bundle covers the basics your answers point to, in a routine that is easy to keep. "
+    "Check with your doctor if you are unsure about any of it."
+)
+
+
+# ---------- timing ----------
+
+
+def measure(
+    fn: Callable[[Any], Any],
+    inputs: Sequence[Any],
+    min_time: float = 0.2,
+    repeats: int = 5,
+) -> Dict[str, Any]:
+    """
+    Call fn over the inputs (cycling) in `repeats` rounds of at least
+    min_time seconds each; per-call median / min over the rounds.
+    """
+    n = len(inputs)
+    fn(inputs[0])  # warm up
+    # Calibrate the round length on ~1/10 of min_time
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time / 10:
+        fn(inputs[calls % n])
+        calls += 1
+    rate = calls / (time.perf_counter() - start)
+    per_round = max(1, int(rate * min_time))
+
+    rounds = []
+    for r in range(repeats):
+        offset = r * per_round
+        start = time.perf_counter()
+        for i in range(per_round):
+            fn(inputs[(offset + i) % n])
+        rounds.append((time.perf_counter() - start) / per_round * 1e6)
+    return {
+        "us_per_op": round(statistics.median(rounds), 2),
+        "min_us": round(min(rounds), 2),
+        "calls_per_round": per_round,
+    }
+
+
+# ---------- LLM stub ----------
+
+
+class _StubCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, stream: bool = False, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not stream:
+            message = SimpleNamespace(content=STUB_EXPLANATION)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream()
+
+    async def _stream(self):
+        for word in STUB_EXPLANATION.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class StubLLMClient:
+    """
+    Stands in for AsyncOpenAI: answers every completion with fixed text
+    after `latency` seconds, so end-to-end runs never hit the network.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.chat = SimpleNamespace(completions=_StubCompletions(latency))
+
+
+# ---------- micro benchmarks ----------
+
+
+def _bench_catalog(size: int, quizzes: List[Any]) -> Dict[str, Any]:
+    products_catalog.PRODUCT_CATALOG = make_catalog(size, seed=size)
+    index = get_catalog_index()
+    products = index.products
+    masks = index.contra_masks
+    per_product = [(p, masks[i]) for i, p in enumerate(products)]
+    pairs = [(q, _safety_profile(q, index)) for q in quizzes[:50]]
+    # Enough (product, quiz) combinations that the cycle doesn't repeat quickly
+    combos = [(per_product[(i * 7919) % len(per_product)], pairs[i % len(pairs)]) for i in range(5_000)]
+
+    def recommend_miss(q):
+        _RESULT_CACHE.clear()
+        return get_recommendation(q, include_llm_explanation=False)
+
+    def recommend_hit(q):
+        return get_recommendation(q, include_llm_explanation=False)
+
+    min_time = 0.5 if size >= 10_000 else 0.2
+    miss = measure(recommend_miss, quizzes, min_time=min_time, repeats=3)
+
+    # The scoring cache has to hold every quiz of the hit loop
+    hit_quizzes = quizzes[:200]
+    for q in hit_quizzes:
+        recommend_hit(q)
+
+    return {
+        "catalog_size": size,
+        "get_recommendation_miss": miss,
+        "get_recommendation_hit": measure(recommend_hit, hit_quizzes),
+        "_score_product": measure(lambda c: _score_product(c[0][0], c[1][0]), combos),
+        "_check_safety": measure(lambda c: _check_safety(c[0][0], c[0][1], c[1][1]), combos),
+    }
+
+
+def run_micro(sizes: List[int]) -> Dict[str, Any]:
+    quizzes = make_quizzes(1_000, seed=23)
+    original = products_catalog.PRODUCT_CATALOG
+    try:
+        catalogs = [_bench_catalog(size, quizzes) for size in sizes]
+    finally:
+        products_catalog.PRODUCT_CATALOG = original
+        get_catalog_index()
+
+    pool = [(q, get_recommendation(q, include_llm_explanation=False)) for q in quizzes[:500]]
+
+    analytics_store.set_backend(RingBufferBackend(HISTORY_RECORDS))
+    log = measure(lambda p: analytics_store.log_recommendation(p[0], p[1]), pool)
+
+    backend = RingBufferBackend(HISTORY_RECORDS)
+    backend.append(make_records(HISTORY_RECORDS, seed=23))
+    analytics_store.set_backend(backend)
+    summary = measure(lambda _: analytics_store.get_segments_summary(), [None])
+
+    return {
+        "catalogs": catalogs,
+        "log_recommendation": log,
+        f"get_segments_summary_{HISTORY_RECORDS}": summary,
+        "generate_email_copy": measure(lambda p: generate_email_copy(p[0], p[1]), pool),
+    }
+
+
+# ---------- end to end ----------
+
+
+# Files the app would otherwise write to: "" keeps that state in memory
+# (or, for the traffic capture, turns it off)
+_ISOLATED_ENV = {EXPLANATION_DB_ENV: "", RETENTION_DB_ENV: "", TRAFFIC_CAPTURE_ENV: ""}
+
+
+@contextmanager
+def isolated_app(backend: AnalyticsBackend, llm_client: Any = None) -> Iterator[None]:
+    """
+    Point the in-process app at throwaway state for a benchmark run: the
+    given analytics backend, explanations and retention steps kept in
+    memory, no traffic capture, and (if given) a stub LLM client. Everything is put back on
+    exit, so stub text and synthetic or replayed records never reach the
+    files a real server reads.
+    """
+    saved_env = {name: os.environ.get(name) for name in [*_ISOLATED_ENV, "OPENAI_API_KEY"]}
+    saved_store = (llm_explainer._STORE, llm_explainer._STORE_OPENED)
+    saved_client = llm_explainer._ASYNC_CLIENT
+    saved_analytics = (analytics_store._BACKEND, analytics_store._ROLLUPS)
+    saved_engine = retention_flows._ENGINE
+
+    os.environ.update(_ISOLATED_ENV)
+    llm_explainer._STORE, llm_explainer._STORE_OPENED = None, True
+    if llm_client is not None:
+        os.environ["OPENAI_API_KEY"] = "stub"
+        llm_explainer.set_async_client(llm_client)
+    analytics_store.set_backend(backend)
+    # The app's lifespan builds (and stops) its own engine
+    retention_flows._ENGINE = None
+    try:
+        yield
+    finally:
+        retention_flows._ENGINE = saved_engine
+        with analytics_store._BACKEND_LOCK:
+            analytics_store._BACKEND, analytics_store._ROLLUPS = saved_analytics
+        llm_explainer.set_async_client(saved_client)
+        llm_explainer._STORE, llm_explainer._STORE_OPENED = saved_store
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run_asgi(llm_latency: float) -> Dict[str, Any]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    stub = StubLLMClient(llm_latency)
+    backend = RingBufferBackend(HISTORY_RECORDS)
+    backend.append(make_records(HISTORY_RECORDS, seed=29))
+
+    models = make_quizzes(1_000, seed=29)
+    quizzes = [q.model_dump() for q in models]
+    email_payloads = [
+        {"quiz": q.model_dump(), "recommendation": get_recommendation(q, include_llm_explanation=False)}
+        for q in models[:50]
+    ]
+
+    def ok(response):
+        assert response.status_code == 200, (response.status_code, response.text[:200])
+        return response
+
+    results: Dict[str, Any] = {}
+    with isolated_app(backend, stub), TestClient(app) as client:
+        results["POST /quiz/recommend"] = measure(
+            lambda q: ok(client.post("/quiz/recommend", json=q)), quizzes, min_time=0.5
+        )
+        results["GET /quiz/questions"] = measure(
+            lambda _: ok(client.get("/quiz/questions")), [None]
+        )
+        results["GET /admin/segments-summary"] = measure(
+            lambda _: ok(client.get("/admin/segments-summary")), [None]
+        )
+        results["GET /admin/export-recent?limit=1000"] = measure(
+            lambda _: ok(client.get("/admin/export-recent", params={"limit": 1000})), [None]
+        )
+        results[f"GET /admin/export-recent (all {HISTORY_RECORDS})"] = measure(
+            lambda _: ok(client.get("/admin/export-recent")), [None], min_time=0.5, repeats=3
+        )
+        results["POST /content/welcome-email"] = measure(
+            lambda p: ok(client.post("/content/welcome-email", json=p)), email_payloads
+        )
+
+    results["llm_stub"] = {"latency_ms": llm_latency * 1e3, "calls": stub.chat.completions.calls}
+    return results
+
+
+# ---------- reporting ----------
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _metrics(report: Dict[str, Any], field: str = "min_us") -> Dict[str, float]:
+    """
+    Flatten a report to {"section/name": value of field}.
+    """
+    flat: Dict[str, float] = {}
+    micro = report.get("micro", {})
+    for catalog in micro.get("catalogs", []):
+        for name, value in catalog.items():
+            if isinstance(value, dict):
+                flat[f"micro/{name}@{catalog['catalog_size']}"] = value[field]
+    for section in ("micro", "asgi"):
+        for name, value in report.get(section, {}).items():
+            if isinstance(value, dict) and field in value:
+                flat[f"{section}/{name}"] = value[field]
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """
+    Per-metric current / baseline ratios of the per-call minimum (the
+    round least disturbed by other load, so the steadiest figure).
+    """
+    old, new = _metrics(baseline), _metrics(current)
+    rows = {}
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key] if old[key] else None
+        rows[key] = {"baseline_us": old[key], "current_us": new[key], "ratio": round(ratio, 3) if ratio else None}
+        if ratio and ratio > 1 + threshold:
+            regressions.append(key)
+    return {
+        "baseline_commit": baseline.get("meta", {}).get("commit"),
+        "threshold": threshold,
+        "metrics": rows,
+        "regressions": regressions,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Recommendation hot-path benchmark suite.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="synthetic catalog sizes, comma separated (10 to 100000)")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-asgi", action="store_true")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="stub LLM response delay")
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    if any(not 1 <= s <= 100_000 for s in sizes):
+        parser.error("catalog sizes must be between 1 and 100000")
+
+    # Keep the environment from changing what is measured
+    for name in ("OPENAI_API_KEY", "NUTRIGUIDE_SCORING_BACKEND", "NUTRIGUIDE_SEMANTIC_WEIGHT",
+                 "NUTRIGUIDE_ANALYTICS_BACKEND"):
+        os.environ.pop(name, None)
+
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": numpy.__version__ if numpy is not None else None,
+            "cpu_count": os.cpu_count(),
+            "sizes": sizes,
+            "llm_latency_ms": args.llm_latency_ms,
+        }
+    }
+    if not args.skip_micro:
+        report["micro"] = run_micro(sizes)
+    if not args.skip_asgi:
+        report["asgi"] = run_asgi(args.llm_latency_ms / 1e3)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["compare"] = compare(json.load(f), report, args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.fail_on_regression and report.get("compare", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# backend/benchmarks/synthetic.py
+
+import random
+from typing import Dict, Any, List, Optional
+
+from app.quiz_schema import get_quiz_questions
+from app.recommendation import QuizResponse
+
+
+_CONTRAINDICATIONS = ["fish_allergy", "dairy_allergy", "nut_allergy"]
+_ALLERGY_TEXTS = ["none", "", "fish", "milk", "peanuts", "shellfish and dairy", "pollen"]
+_DIET_TAGS = ["vegetarian_friendly", "vegan_friendly"]
+
+# Real SKUs target one life stage, so keep profiles and ages coherent
+_AGES_BY_PROFILE = {
+    "child": ["0_3", "4_8", "9_13"],
+    "teen": ["9_13", "14_18"],
+    "adult_woman": ["19_30", "31_50", "51_plus"],
+    "adult_man": ["19_30", "31_50", "51_plus"],
+}
+
+
+def _option_ids() -> Dict[str, List[str]]:
+    """
+    Option ids per question, taken from the real quiz schema.
+    """
+    return {
+        q.id: [o.id for o in q.options]
+        for q in get_quiz_questions()
+        if q.options
+    }
+
+
+def _sample(rng: random.Random, values: List[str], lo: int, hi: int) -> List[str]:
+    return rng.sample(values, rng.randint(lo, min(hi, len(values))))
+
+
+def make_catalog(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Build a synthetic catalog with the same shape as PRODUCT_CATALOG.
+    """
+    rng = random.Random(seed)
+    opts = _option_ids()
+
+    catalog: List[Dict[str, Any]] = []
+    for i in range(size):
+        profile = rng.choice(opts["profile_type"])
+        min_age: Optional[int] = rng.choice([None, 2, 4, 9, 14, 18])
+        catalog.append(
+            {
+                "id": f"sku_{i:06d}",
+                "name": f"Synthetic Product {i}",
+                "profile_types": [profile],
+                "age_groups": _sample(rng, _AGES_BY_PROFILE.get(profile, opts["age_group"]), 1, 3),
+                "goals": _sample(rng, opts["goals"], 0, 2),
+                "lifestyle": _sample(rng, opts["lifestyle"], 0, 1),
+                "diet_tags": _sample(rng, _DIET_TAGS, 0, 1),
+                "base_priority": rng.choice([0] * 20 + [1, 2, 3]),
+                "min_age": min_age,
+                "max_age": rng.choice([None, None, None, 50]),
+                "contraindications": _sample(rng, _CONTRAINDICATIONS, 0, 1),
+                "price_usd": round(rng.uniform(9.99, 59.99), 2),
+                "servings": rng.choice([30, 60]),
+                "subscription_discount": rng.choice([0.0, 0.1, 0.15, 0.18]),
+            }
+        )
+    return catalog
+
+
+def make_quizzes(count: int, seed: int = 0) -> List[QuizResponse]:
+    """
+    Draw random quiz answers from the option ids in quiz_schema.
+    """
+    rng = random.Random(seed)
+    opts = _option_ids()
+
+    return [
+        QuizResponse(
+            profile_type=rng.choice(opts["profile_type"]),
+            age_group=rng.choice(opts["age_group"]),
+            diet=_sample(rng, opts["diet"], 0, 2),
+            goals=_sample(rng, opts["goals"], 1, 3),
+            lifestyle=_sample(rng, opts["lifestyle"], 0, 2),
+            allergies=rng.choice(_ALLERGY_TEXTS),
+            budget=str(rng.choice([30, 50, 80, 120])),
+        )
+        for _ in range(count)
+    ]
+
+
+def make_records(count: int, seed: int = 0, start_ts: float = 1_700_000_000.0) -> List[Dict[str, Any]]:
+    """
+    Analytics records as log_recommendation would store them, one per
+    second starting at start_ts. Recommendations are computed once for a
+    pool of quizzes and reused, so this stays fast for millions of rows.
+    """
+    from app.analytics_store import _build_record
+    from app.recommend_products import get_recommendation
+
+    pool = make_quizzes(min(count, 500) or 1, seed=seed)
+    results = [get_recommendation(q, include_llm_explanation=False) for q in pool]
+    rng = random.Random(seed)
+
+    records = []
+    for i in range(count):
+        j = rng.randrange(len(pool))
+        records.append(_build_record(pool[j], results[j], start_ts + i))
+    return records
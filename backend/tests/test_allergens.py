@@ -0,0 +1,108 @@
+# backend/tests/test_allergens.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import recommend_products
+from app.allergens import get_allergen_lexicon
+from app.main import app
+from app.products_catalog import PRODUCT_CATALOG
+from app.recommendation import QuizResponse
+
+FISH = "fish_allergy"
+DAIRY = "dairy_allergy"
+NUT = "nut_allergy"
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        # Compound words the old substring scan caught
+        ("catfish", {FISH}),
+        ("swordfish", {FISH}),
+        ("crayfish", {FISH}),
+        ("Shellfish", {FISH}),
+        ("buttermilk", {DAIRY}),
+        ("milkshakes", {DAIRY}),
+        ("chestnuts", {NUT}),
+        ("peanutbutter", {NUT}),
+        ("Nutella", {NUT}),
+        ("hazelnut spread", {NUT}),
+        ("coconut milk", {DAIRY}),
+        # Plurals, including -y -> -ies
+        ("anchovies", {FISH}),
+        ("anchovy", {FISH}),
+        ("sardines", {FISH}),
+        ("peanuts", {NUT}),
+        ("walnuts, cheese", {NUT, DAIRY}),
+        ("omega 3", {FISH}),
+        ("coconut, catfish", {FISH}),
+        # Words that hold no nuts despite the substring
+        ("coconut", set()),
+        ("nutmeg", set()),
+        ("doughnuts", set()),
+        ("butternut squash", set()),
+        ("nutritional yeast", set()),
+        ("none", set()),
+        ("", set()),
+        (None, set()),
+    ],
+)
+def test_parse(text, expected):
+    lexicon = get_allergen_lexicon()
+    assert set(lexicon.names(lexicon.parse(text))) == expected
+
+
+def _unsafe_names(contraindication):
+    return {p["name"] for p in PRODUCT_CATALOG if contraindication in p.get("contraindications", [])}
+
+
+@pytest.mark.parametrize("backend", recommend_products.SCORING_BACKENDS)
+@pytest.mark.parametrize(
+    "allergies, contraindication",
+    [
+        ("coconut, catfish", FISH),
+        ("swordfish", FISH),
+        ("crayfish", FISH),
+        ("anchovies", FISH),
+        ("buttermilk", DAIRY),
+        ("chestnuts", NUT),
+        ("peanutbutter", NUT),
+        ("nutella", NUT),
+    ],
+)
+@pytest.mark.parametrize("profile_type, age_group", [("child", "4_8"), ("adult_woman", "31_50")])
+def test_recommendation_skips_unsafe_products(
+    monkeypatch, backend, allergies, contraindication, profile_type, age_group
+):
+    monkeypatch.setenv(recommend_products.SCORING_BACKEND_ENV, backend)
+    quiz = QuizResponse(
+        profile_type=profile_type,
+        age_group=age_group,
+        diet=[],
+        goals=["brain", "immunity", "gut"],
+        lifestyle=["screen_heavy"],
+        allergies=allergies,
+        budget=None,
+    )
+    result = recommend_products.get_recommendation(quiz, include_llm_explanation=False)
+    unsafe = _unsafe_names(contraindication)
+    assert unsafe.isdisjoint(result["products"] + result["upsell"])
+    assert result["safety_notes"]
+
+
+def test_recommend_endpoint_catfish(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    quiz = {
+        "profile_type": "child",
+        "age_group": "4_8",
+        "diet": [],
+        "goals": ["brain", "immunity"],
+        "lifestyle": [],
+        "allergies": "coconut, catfish",
+        "budget": None,
+    }
+    response = TestClient(app).post("/quiz/recommend", json=quiz)
+    assert response.status_code == 200
+    body = response.json()
+    assert _unsafe_names(FISH).isdisjoint(body["products"] + body["upsell"])
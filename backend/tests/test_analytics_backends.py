@@ -0,0 +1,154 @@
+# backend/tests/test_analytics_backends.py
+
+from collections import Counter
+
+import pytest
+
+from app import analytics_store
+from app.analytics_backends import (
+    AnalyticsBackend,
+    RingBufferBackend,
+    SQLiteBackend,
+    aggregate_records,
+)
+from benchmarks.synthetic import make_records
+
+
+@pytest.fixture(scope="module")
+def records():
+    return make_records(3_000, seed=5)
+
+
+def _assert_same(agg, expected) -> None:
+    for key, value in expected.items():
+        if key.endswith("_sum") and isinstance(value, float):
+            assert agg[key] == pytest.approx(value, rel=1e-6), key
+        else:
+            assert agg[key] == value, key
+    # The summary is what the dashboard sees: it must match exactly
+    assert analytics_store._summary_from_aggregates(agg) == (
+        analytics_store._summary_from_aggregates(expected)
+    )
+
+
+def _append_and_check(backend, records, batch: int = 97) -> None:
+    # Running aggregates vs a full recompute over what is still stored
+    for i in range(0, len(records), batch):
+        backend.append(records[i:i + batch])
+        _assert_same(backend.aggregates(), aggregate_records(backend.recent(backend.count())))
+
+
+def test_ring_buffer_aggregates_match_full_recompute(records):
+    ring = RingBufferBackend(500)
+    _append_and_check(ring, records)
+    assert ring.count() == 500
+
+
+def test_sqlite_aggregates_match_full_recompute(records, tmp_path):
+    path = str(tmp_path / "analytics.sqlite3")
+    backend = SQLiteBackend(path, max_rows=700)
+    _append_and_check(backend, records)
+    assert backend.count() == 700
+    backend.close()
+
+    # Seeding from the SQL scan on reopen must agree with the running totals
+    reopened = SQLiteBackend(path)
+    _assert_same(reopened.aggregates(), aggregate_records(reopened.recent(reopened.count())))
+    reopened.close()
+
+
+def test_segments_summary_reads_running_aggregates(records):
+    ring = RingBufferBackend(1_000)
+    ring.append(records)
+    previous = analytics_store.get_backend()
+    analytics_store.set_backend(ring)
+    try:
+        summary = analytics_store.get_segments_summary()
+    finally:
+        analytics_store.set_backend(previous)
+    assert summary == analytics_store._summary_from_aggregates(
+        aggregate_records(ring.recent(ring.count()))
+    )
+
+
+def test_ring_buffer_keeps_the_newest_records(records):
+    capacity = 1_000
+    ring = RingBufferBackend(capacity)
+    for i in range(0, len(records), 97):
+        ring.append(records[i:i + 97])
+    assert ring.recent(capacity) == list(reversed(records[-capacity:]))
+    assert ring.count() == capacity
+
+
+def test_free_text_allergies_are_not_interned(records):
+    ring = RingBufferBackend(100)
+    ring.append(records)  # every option / bundle value is interned now
+    interned = (len(ring.strings), len(ring.tuples))
+
+    for i in range(5_000):
+        ring.append([{**records[i % len(records)], "allergies": f"pollen and dust #{i}"}])
+
+    assert (len(ring.strings), len(ring.tuples)) == interned
+    assert ring.recent(1)[0]["allergies"] == "pollen and dust #4999"
+    segments = ring.top_segments(5)
+    assert all(key[-1].startswith("pollen and dust #") for key, _ in segments)
+
+
+def _junk(record, i):
+    # Quiz fields are client input: unknown ids, repeats, any ordering
+    return {
+        **record,
+        "profile_type": f"profile #{i}",
+        "age_group": i,
+        "goals": ["brain"] * (i % 7 + 1),
+        "lifestyle": [f"style #{i}", "sports"],
+        "diet": list(reversed(record["diet"])) + [f"diet #{i}"],
+    }
+
+
+def test_unknown_quiz_values_are_not_interned(records):
+    ring = RingBufferBackend(100)
+    ring.append(records)
+    interned = (len(ring.strings), len(ring.tuples))
+
+    junk = [_junk(records[i % len(records)], i) for i in range(5_000)]
+    ring.append(junk)
+
+    assert (len(ring.strings), len(ring.tuples)) == interned
+    assert ring.recent(100) == list(reversed(junk[-100:]))
+    # Raw values go with the slot they were stored in
+    assert len(ring.raw) <= 5 * ring.capacity
+    ring.append(records[:100])
+    assert not ring.raw
+
+
+def test_unknown_quiz_values_in_aggregates_exports_and_segments(records):
+    ring = RingBufferBackend(300)
+    mixed = [_junk(r, i) if i % 3 == 0 else r for i, r in enumerate(records[:1_000])]
+    _append_and_check(ring, mixed)
+
+    stored = ring.recent(ring.count())
+    exported = [
+        row
+        for batch in ring.iter_column_batches(profile_types=["profile #999", "child"])
+        for row in zip(*batch.values())
+    ]
+    expected = [r for r in stored if r["profile_type"] in ("profile #999", "child")]
+    assert [row[1] for row in exported] == [r["profile_type"] for r in expected]
+    assert [row[3] for row in exported] == [r["goals"] for r in expected]
+
+    segments = Counter(
+        (r["profile_type"], r["age_group"], tuple(r["goals"]), tuple(r["lifestyle"]),
+         tuple(r["diet"]), r["allergies"])
+        for r in stored
+    )
+    assert dict(ring.top_segments(len(stored))) == dict(segments)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class AppendOnly(AnalyticsBackend):
+        def append(self, records):
+            pass
+
+    with pytest.raises(TypeError):
+        AppendOnly()
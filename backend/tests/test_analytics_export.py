@@ -0,0 +1,54 @@
+# backend/tests/test_analytics_export.py
+
+import csv
+import gzip
+import io
+
+import pytest
+
+from app import analytics_export
+from app.analytics_backends import ANALYTICS_BACKEND_ENV, SQLiteBackend
+from benchmarks.synthetic import make_records
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "analytics.sqlite3")
+    backend = SQLiteBackend(path)
+    backend.append(make_records(500, seed=3))
+    backend.close()
+    return path
+
+
+def test_cli_exports_the_sqlite_history(db, tmp_path):
+    out = tmp_path / "history.csv.gz"
+    analytics_export.main(["--db", db, "--format", "csv", "--gzip", "--out", str(out)])
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(out.read_bytes()).decode())))
+    assert len(rows) == 500
+
+
+def test_cli_exports_parquet(db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    out = tmp_path / "history.parquet"
+    analytics_export.main(
+        ["--db", db, "--format", "parquet", "--out", str(out), "--profile-type", "teen"]
+    )
+    table = pq.read_table(str(out))
+    assert table.num_rows > 0
+    assert set(table.column("profile_type").to_pylist()) == {"teen"}
+
+
+def test_cli_refuses_the_in_memory_store(monkeypatch, tmp_path):
+    monkeypatch.delenv(ANALYTICS_BACKEND_ENV, raising=False)
+    out = tmp_path / "history.csv"
+    with pytest.raises(SystemExit) as exc:
+        analytics_export.main(["--format", "csv", "--out", str(out)])
+    assert "--db" in str(exc.value)
+    assert not out.exists()
+
+
+def test_cli_rejects_a_missing_db(tmp_path):
+    with pytest.raises(SystemExit):
+        analytics_export.main(
+            ["--db", str(tmp_path / "nope.sqlite3"), "--format", "csv", "--out", str(tmp_path / "x.csv")]
+        )
@@ -0,0 +1,90 @@
+# backend/tests/test_analytics_pipeline.py
+
+import asyncio
+import threading
+import time
+
+from app.analytics_pipeline import AnalyticsPipeline
+
+
+def _full_pipeline(block_timeout: float) -> tuple:
+    """
+    A "block" pipeline whose consumer is stuck on its first item and
+    whose one-slot queue is full.
+    """
+    release = threading.Event()
+    pipeline = AnalyticsPipeline(
+        lambda batch: release.wait(5), maxsize=1, batch_size=1, flush_interval=0.01,
+        backpressure="block", block_timeout=block_timeout,
+    )
+    pipeline.start()
+    pipeline.submit("taken by the consumer")
+    deadline = time.monotonic() + 2
+    while pipeline._queue.qsize() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    pipeline.submit("fills the queue")
+    return pipeline, release
+
+
+def test_submit_async_waits_off_the_event_loop():
+    pipeline, release = _full_pipeline(block_timeout=0.3)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        start = time.monotonic()
+        accepted = await pipeline.submit_async("waits for space")
+        elapsed = time.monotonic() - start
+        task.cancel()
+        return accepted, elapsed, ticks
+
+    try:
+        accepted, elapsed, ticks = asyncio.run(run())
+    finally:
+        release.set()
+        pipeline.stop()
+
+    assert not accepted
+    assert elapsed >= 0.25
+    # The loop kept running other coroutines while this one waited
+    assert ticks >= 10
+    assert pipeline.dropped == 1
+
+
+def test_submit_async_enqueues_once_space_frees_up():
+    pipeline, release = _full_pipeline(block_timeout=2.0)
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.05, release.set)
+        return await pipeline.submit_async("waits for space")
+
+    try:
+        assert asyncio.run(run())
+    finally:
+        release.set()
+        pipeline.stop()
+    assert pipeline.dropped == 0
+
+
+def test_sync_submit_never_blocks_an_event_loop_thread():
+    pipeline, release = _full_pipeline(block_timeout=1.0)
+
+    async def run():
+        start = time.monotonic()
+        accepted = pipeline.submit("on the loop")
+        return accepted, time.monotonic() - start
+
+    try:
+        accepted, elapsed = asyncio.run(run())
+    finally:
+        release.set()
+        pipeline.stop()
+    assert not accepted
+    assert elapsed < 0.1
@@ -0,0 +1,135 @@
+# backend/tests/test_bulk_content.py
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.bulk_content import bulk_email_row, stream_bulk_emails
+from app.content_assistant import generate_email_copy
+from app.recommendation import QuizResponse
+
+QUIZ = {
+    "profile_type": "student",
+    "age_group": "18_25",
+    "diet": [],
+    "goals": ["energy"],
+    "lifestyle": [],
+    "allergies": "",
+    "budget": None,
+}
+RECOMMENDATION = {
+    "products": ["Daily Multi"],
+    "product_details": [{"name": "Daily Multi", "reasons": ["Covers the basics."]}],
+}
+
+
+def _ndjson(items):
+    return b"\n".join(
+        item if isinstance(item, bytes) else json.dumps(item).encode() for item in items
+    )
+
+
+def _collect(body, **kwargs):
+    async def run():
+        return b"".join([chunk async for chunk in stream_bulk_emails(body, **kwargs)])
+
+    return [json.loads(line) for line in asyncio.run(run()).splitlines()]
+
+
+def test_row_matches_the_single_email():
+    row = bulk_email_row(3, {"id": "c-1", "quiz": QUIZ, "recommendation": RECOMMENDATION})
+    assert row == {
+        "index": 3,
+        "id": "c-1",
+        "email": generate_email_copy(QuizResponse(**QUIZ), RECOMMENDATION),
+    }
+
+
+def test_unanswered_questions_may_be_left_out():
+    row = bulk_email_row(0, {"quiz": {"goals": ["sleep"]}, "recommendation": RECOMMENDATION})
+    assert "error" not in row
+    assert "better sleep" in row["email"]["preview_line"]
+
+
+@pytest.mark.parametrize(
+    "item, field",
+    [
+        ({"quiz": {"goals": [1]}}, "quiz.goals.0"),
+        ({"quiz": {"age_group": 5}}, "quiz.age_group"),
+        ({"quiz": {"goals": "energy"}}, "quiz.goals"),
+        ({"quiz": {"lifestyle": {"a": 1}}}, "quiz.lifestyle"),
+    ],
+)
+def test_malformed_quiz_fields_become_error_rows(item, field):
+    row = bulk_email_row(7, {**item, "recommendation": RECOMMENDATION})
+    assert set(row) == {"index", "error"}
+    assert row["index"] == 7
+    assert row["error"].startswith(field + ":")
+
+
+@pytest.mark.parametrize("item", [None, [], "quiz", {"quiz": None}, {"quiz": [QUIZ]}])
+def test_items_without_a_quiz_object_become_error_rows(item):
+    assert bulk_email_row(0, item) == {"index": 0, "error": 'each item needs a "quiz" object'}
+
+
+def test_rows_keep_input_order_across_chunks():
+    items = []
+    for i in range(23):
+        if i % 5 == 0:
+            items.append(b"{not json")
+        elif i % 7 == 0:
+            items.append({"id": i, "quiz": {"goals": "energy"}})
+        else:
+            items.append({"id": i, "quiz": QUIZ, "recommendation": RECOMMENDATION})
+    body = _ndjson(items[:10]) + b"\n\n" + _ndjson(items[10:]) + b"\n"
+
+    rows = _collect(body, chunk_size=4)
+
+    assert [row["index"] for row in rows] == list(range(23))
+    for i, row in enumerate(rows):
+        if i % 5 == 0:
+            assert "id" not in row and "error" in row
+        elif i % 7 == 0:
+            assert row["id"] == i and row["error"].startswith("quiz.goals:")
+        else:
+            assert row["id"] == i and "email" in row
+
+
+def test_endpoint_streams_ndjson_rows():
+    body = _ndjson(
+        [
+            {"id": "a", "quiz": QUIZ, "recommendation": RECOMMENDATION},
+            {"id": "b", "quiz": {"age_group": 5}},
+            {"id": "c", "quiz": QUIZ},
+        ]
+    )
+    response = TestClient(main.app).post(
+        "/content/welcome-email/bulk", content=body, params={"chunk_size": 2}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["index"], row["id"]) for row in rows] == [(0, "a"), (1, "b"), (2, "c")]
+    assert "email" in rows[0] and "error" in rows[1]
+    # no recommendation given: the quiz is scored first
+    assert rows[2]["email"]["subject"] == rows[0]["email"]["subject"]
+
+
+def test_endpoint_rejects_oversized_bodies(monkeypatch):
+    monkeypatch.setattr(main, "BULK_MAX_BODY_BYTES", 64)
+    client = TestClient(main.app)
+    line = json.dumps({"quiz": QUIZ}).encode()
+    assert len(line) > 64
+
+    response = client.post("/content/welcome-email/bulk", content=line)
+    assert response.status_code == 413
+    assert "app.bulk_content" in response.json()["detail"]
+
+    # chunked upload, no Content-Length to go by
+    response = client.post(
+        "/content/welcome-email/bulk", content=iter([line[:40], line[40:]])
+    )
+    assert response.status_code == 413
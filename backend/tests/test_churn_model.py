@@ -0,0 +1,162 @@
+# backend/tests/test_churn_model.py
+
+import math
+from collections import Counter
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import churn_model
+from app.analytics_backends import RingBufferBackend, SQLiteBackend
+from app.analytics_rollups import RollupStore
+from app.churn_model import (
+    load_churn_model,
+    records_to_columns,
+    save_churn_model,
+    synthetic_churn_labels,
+    train_churn_model,
+)
+from app.main import app
+from benchmarks.synthetic import make_records
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def records():
+    return make_records(3_000, seed=13)
+
+
+@pytest.fixture(scope="module")
+def model(records):
+    columns = records_to_columns(records)
+    return train_churn_model(columns, synthetic_churn_labels(columns, seed=13), seed=13)
+
+
+def _odd_records(records):
+    # Missing / NaN prices, unknown and repeated options, no lists at all
+    base = records[0]
+    return [
+        {**base, "bundle_price": None, "bundle_price_subscription": None},
+        {**base, "bundle_price": math.nan, "bundle_price_subscription": 10.0},
+        {**base, "bundle_price": 20.0, "bundle_price_subscription": math.nan},
+        {**base, "profile_type": "robot", "goals": ["brain", "brain", "flying"]},
+        {"profile_type": None, "age_group": None, "allergies": "peanuts"},
+        {},
+    ]
+
+
+def test_train_save_load_round_trip(model, records, tmp_path):
+    path = str(tmp_path / "churn_model.json")
+    save_churn_model(model, path)
+    loaded = load_churn_model(path)
+
+    assert loaded.version == model.version
+    assert loaded.feature_names == model.feature_names
+    columns = records_to_columns(records[:500])
+    assert loaded.score_columns(columns) == model.score_columns(columns)
+    assert loaded.info()["rows"] == len(records)
+
+
+def test_training_is_deterministic(records, model):
+    columns = records_to_columns(records)
+    again = train_churn_model(columns, synthetic_churn_labels(columns, seed=13), seed=13)
+    assert again.version == model.version
+
+
+def test_row_path_matches_batch_path(model, records):
+    rows = [dict(r) for r in records[:200] + _odd_records(records)]
+    expected_scores, expected_labels = model.score_columns(records_to_columns(rows))
+
+    # score_records takes the per-row path for batches of up to 8
+    for start in range(0, len(rows), 5):
+        model.score_records(rows[start:start + 5])
+    assert [r["risk_score"] for r in rows] == expected_scores
+    assert [r["risk_label"] for r in rows] == expected_labels
+
+    big = [dict(r) for r in rows]
+    model.score_records(big)
+    assert [r["risk_score"] for r in big] == expected_scores
+
+
+def _rollups(records):
+    last = datetime.fromisoformat(records[-1]["timestamp"]).replace(tzinfo=timezone.utc)
+    rollups = RollupStore(clock=lambda: last.timestamp() + 60)
+    rollups.add(records)
+    return rollups
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_rescore_risk(model, records, kind, tmp_path):
+    if kind == "memory":
+        backend = RingBufferBackend(2_000)
+    else:
+        backend = SQLiteBackend(str(tmp_path / "analytics.sqlite3"))
+    backend.append(records)
+    stored = backend.recent(backend.count())
+    rollups = _rollups(stored)
+    assert backend.risk_model_version() is None
+
+    relabels = []
+
+    def on_relabel(changes):
+        relabels.extend(changes)
+        rollups.relabel("risk_label", changes)
+
+    scored = backend.rescore_risk(model.score_columns, model.version, on_relabel, batch_size=700)
+    assert scored == backend.count()
+    assert backend.risk_model_version() == model.version
+
+    rescored = backend.recent(backend.count())
+    scores, labels = model.score_columns(records_to_columns(rescored))
+    assert [r["risk_score"] for r in rescored] == scores
+    assert [r["risk_label"] for r in rescored] == labels
+    assert relabels, "the test model should change some labels"
+
+    # Running counts and rollups follow the new labels
+    expected = Counter(labels)
+    assert +Counter(backend.aggregates()["risk_counts"]) == expected
+    total = rollups.query(7 * 24 * 3600)[0].snapshot()
+    assert +Counter(total["risk_counts"]) == expected
+
+    if kind == "sqlite":
+        backend.close()
+        reopened = SQLiteBackend(str(tmp_path / "analytics.sqlite3"))
+        assert reopened.risk_model_version() == model.version
+        assert +Counter(reopened.aggregates()["risk_counts"]) == expected
+        reopened.close()
+
+
+@pytest.fixture
+def loaded_model(monkeypatch):
+    def use(model):
+        monkeypatch.setattr(churn_model, "_MODEL", model)
+        monkeypatch.setattr(churn_model, "_MODEL_LOADED", True)
+    return use
+
+
+def test_score_batch_endpoint(model, records, loaded_model):
+    loaded_model(model)
+    fields = ("profile_type", "age_group", "goals", "lifestyle", "diet", "allergies",
+              "products", "upsell", "bundle_price", "bundle_price_subscription")
+    payload = {"records": [{f: r[f] for f in fields} for r in records[:50]]}
+    response = TestClient(app).post("/churn/score-batch", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["model_version"] == model.version
+    scores, labels = model.score_columns(records_to_columns(records[:50]))
+    assert [item["risk_score"] for item in body["items"]] == scores
+    assert [item["risk_label"] for item in body["items"]] == labels
+
+
+def test_score_batch_without_a_model(loaded_model):
+    loaded_model(None)
+    response = TestClient(app).post("/churn/score-batch", json={"records": [{}]})
+    assert response.status_code == 503
+
+
+def test_score_batch_rejects_oversized_batches(model, loaded_model):
+    loaded_model(model)
+    response = TestClient(app).post("/churn/score-batch", json={"records": [{}] * 10_001})
+    assert response.status_code == 422
@@ -0,0 +1,186 @@
+# backend/tests/test_llm_explainer.py
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app import llm_explainer
+from app.recommendation import QuizResponse
+from app.result_cache import LRUTTLCache
+
+PRODUCTS = [{"name": "Omega-3 Kids", "score": 80, "reasons": ["brain support"]}]
+
+
+class StubAsyncClient:
+    """
+    Stands in for AsyncOpenAI: chat.completions.create() answers after
+    `delay` seconds, or raises `error`.
+    """
+
+    def __init__(self, text="Stub explanation.", delay=0.0, error=None):
+        self.text = text
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.running -= 1
+        if kwargs.get("stream"):
+            return self._stream()
+        message = SimpleNamespace(content=f" {self.text} ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self):
+        for word in self.text.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    # Fresh in-process cache, no on-disk store
+    monkeypatch.setattr(llm_explainer, "_EXPLANATION_CACHE", LRUTTLCache(maxsize=64, ttl=60))
+    monkeypatch.setattr(llm_explainer, "_STORE", None)
+    monkeypatch.setattr(llm_explainer, "_STORE_OPENED", True)
+
+    def install(**kwargs):
+        client = StubAsyncClient(**kwargs)
+        llm_explainer.set_async_client(client)
+        return client
+
+    yield install
+    llm_explainer.set_async_client(None)
+
+
+def _quiz(goal="brain"):
+    return QuizResponse(
+        profile_type="child", age_group="4_8", diet=[], goals=[goal],
+        lifestyle=[], allergies="", budget=None,
+    )
+
+
+def test_complete_within_deadline(stub_llm):
+    client = stub_llm(text="Fish oil helps.")
+    result = asyncio.run(
+        llm_explainer.generate_llm_explanation_async(_quiz(), PRODUCTS, deadline=1.0)
+    )
+    assert result["llm_explanation_status"] == "complete"
+    assert result["llm_explanation"] == "Fish oil helps."
+    assert client.calls == 1
+
+
+def test_deadline_returns_fallback_and_completion_finishes(stub_llm):
+    client = stub_llm(text="Late but done.", delay=0.2)
+
+    async def run():
+        first = await llm_explainer.generate_llm_explanation_async(
+            _quiz(), PRODUCTS, deadline=0.01
+        )
+        # The completion keeps running in the background...
+        await llm_explainer._PENDING[first["llm_explanation_id"]]
+        # ...and the next request is answered from the cache
+        second = await llm_explainer.generate_llm_explanation_async(
+            _quiz(), PRODUCTS, deadline=0.01
+        )
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["llm_explanation_status"] == "pending"
+    assert first["llm_explanation"] == llm_explainer._fallback_explanation(_quiz(), PRODUCTS)
+    assert second["llm_explanation_status"] == "complete"
+    assert second["llm_explanation"] == "Late but done."
+    assert second["llm_explanation_id"] == first["llm_explanation_id"]
+    assert client.calls == 1
+
+
+def test_api_error_falls_back(stub_llm):
+    stub_llm(error=RuntimeError("quota exceeded"))
+    result = asyncio.run(
+        llm_explainer.generate_llm_explanation_async(_quiz(), PRODUCTS, deadline=1.0)
+    )
+    assert result["llm_explanation_status"] == "fallback"
+    assert result["llm_explanation"] == llm_explainer._fallback_explanation(_quiz(), PRODUCTS)
+
+
+def test_stream_yields_tokens_then_done(stub_llm):
+    stub_llm(text="Streamed words here.")
+
+    async def run():
+        handle = await llm_explainer.register_explanation_stream(_quiz(), PRODUCTS)
+        stream = await llm_explainer.stream_explanation(handle["llm_explanation_id"])
+        return [event async for event in stream]
+
+    events = asyncio.run(run())
+    assert events[-1] == ("done", "")
+    assert "".join(data for kind, data in events if kind == "token").strip() == (
+        "Streamed words here."
+    )
+
+
+def test_concurrency_limit_holds_on_every_event_loop(stub_llm, monkeypatch):
+    monkeypatch.setenv(llm_explainer.LLM_CONCURRENCY_ENV, "1")
+    client = stub_llm(delay=0.02)
+
+    async def burst(goals):
+        return await asyncio.gather(*(
+            llm_explainer.generate_llm_explanation_async(_quiz(goal), PRODUCTS, deadline=1.0)
+            for goal in goals
+        ))
+
+    # Each asyncio.run is a new loop, as with a new TestClient or worker
+    for goals in (("brain", "immunity"), ("gut", "energy")):
+        results = asyncio.run(burst(goals))
+        assert [r["llm_explanation_status"] for r in results] == ["complete", "complete"]
+    assert client.calls == 4
+    assert client.max_running == 1
+
+
+class ThreadRecordingStore:
+    """
+    In-memory stand-in for ExplanationStore that records which thread
+    each call ran on.
+    """
+
+    def __init__(self):
+        self.texts = {}
+        self.threads = []
+
+    def get(self, explanation_id):
+        self.threads.append(threading.get_ident())
+        return self.texts.get(explanation_id)
+
+    def set(self, explanation_id, text):
+        self.threads.append(threading.get_ident())
+        self.texts[explanation_id] = text
+
+
+def test_store_io_stays_off_the_event_loop(stub_llm, monkeypatch):
+    store = ThreadRecordingStore()
+    monkeypatch.setattr(llm_explainer, "_STORE", store)
+    stub_llm(text="Stored off the loop.")
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await llm_explainer.generate_llm_explanation_async(_quiz(), PRODUCTS, deadline=1.0)
+        llm_explainer._EXPLANATION_CACHE.clear()
+        # In-memory miss -> read back from the store
+        second = await llm_explainer.get_explanation(first["llm_explanation_id"])
+        return loop_thread, second
+
+    loop_thread, second = asyncio.run(run())
+    assert second == {"status": "complete", "llm_explanation": "Stored off the loop."}
+    assert store.threads and loop_thread not in store.threads
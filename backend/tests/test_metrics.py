@@ -0,0 +1,42 @@
+# backend/tests/test_metrics.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import llm_explainer, retention_flows
+from app.main import app
+from app.metrics import HTTP_REQUEST_SECONDS
+from app.retention_flows import RetentionEngine
+
+
+@pytest.fixture(autouse=True)
+def in_memory_stores(monkeypatch):
+    # The scrape reads the explanation and retention stats; keep it off
+    # the SQLite files under backend/data
+    monkeypatch.setattr(llm_explainer, "_STORE", None)
+    monkeypatch.setattr(llm_explainer, "_STORE_OPENED", True)
+    monkeypatch.setattr(retention_flows, "_ENGINE", RetentionEngine([]))
+
+
+def _methods():
+    return {labels[0][1] for labels, _ in HTTP_REQUEST_SECONDS._items()}
+
+
+def test_unknown_methods_share_one_label():
+    client = TestClient(app)
+    for i in range(20):
+        client.request(f"BOGUS{i}", "/health")
+    client.get("/health")
+
+    methods = _methods()
+    assert "other" in methods
+    assert not any(m.startswith("BOGUS") for m in methods)
+
+
+def test_metrics_endpoint_format():
+    client = TestClient(app)
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'nutriguide_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
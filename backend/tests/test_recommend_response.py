@@ -0,0 +1,45 @@
+# backend/tests/test_recommend_response.py
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.recommendation import RecommendationResult
+
+QUIZ = {
+    "profile_type": "child",
+    "age_group": "4_8",
+    "diet": [],
+    "goals": ["brain"],
+    "lifestyle": [],
+    "allergies": "",
+    "budget": None,
+}
+
+
+def test_recommend_omits_unset_llm_fields(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    response = TestClient(app).post("/quiz/recommend", json=QUIZ)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert "llm_explanation_id" not in body
+    assert None not in body.values()
+    assert body["llm_explanation_status"] == "fallback"
+
+
+def test_recommend_body_matches_the_response_model(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    body = TestClient(app).post("/quiz/recommend", json=QUIZ).json()
+
+    assert all(isinstance(name, str) for name in body["products"] + body["upsell"])
+    assert [p["name"] for p in body["product_details"]] == body["products"]
+    for product in body["product_details"]:
+        assert isinstance(product["score"], int)
+        assert isinstance(product["price_usd"], float)
+        assert isinstance(product["reasons"], list)
+    assert set(body["pricing"]) == {
+        "bundle_price", "bundle_price_subscription", "subscription_savings_pct"
+    }
+    assert isinstance(body["pricing"]["subscription_savings_pct"], int)
+    # Validates against the declared schema, nothing extra
+    assert RecommendationResult.model_validate(body).model_dump(exclude_none=True) == body
@@ -0,0 +1,46 @@
+# backend/tests/test_recommendation_cache.py
+
+import copy
+
+import pytest
+
+from app import products_catalog
+from app.catalog_index import refresh_catalog_index
+from app.recommend_products import _RESULT_CACHE, get_recommendation
+from app.recommendation import QuizResponse
+
+
+@pytest.fixture
+def quiz():
+    _RESULT_CACHE.clear()
+    return QuizResponse(
+        profile_type="child", age_group="4_8", diet=[], goals=["brain", "immunity"],
+        lifestyle=[], allergies="", budget=None,
+    )
+
+
+def test_callers_cannot_change_the_cached_result(quiz):
+    first = get_recommendation(quiz, include_llm_explanation=False)
+    expected = copy.deepcopy(first)
+
+    first["products"].append("Mutated")
+    first["product_details"][0]["reasons"].clear()
+    first["product_details"][0]["score"] = -1
+    first["safety_notes"].append("Mutated")
+    first["pricing"]["bundle_price"] = 0
+
+    assert get_recommendation(quiz, include_llm_explanation=False) == expected
+
+
+def test_refresh_after_an_in_place_edit_drops_cached_results(quiz, monkeypatch):
+    catalog = copy.deepcopy(products_catalog.PRODUCT_CATALOG)
+    monkeypatch.setattr(products_catalog, "PRODUCT_CATALOG", catalog)
+    before = get_recommendation(quiz, include_llm_explanation=False)
+    top = next(p for p in catalog if p["name"] == before["products"][0])
+
+    top["price_usd"] += 10
+    refresh_catalog_index()
+
+    after = get_recommendation(quiz, include_llm_explanation=False)
+    assert after["product_details"][0]["price_usd"] == round(top["price_usd"], 2)
+    assert after["pricing"]["bundle_price"] > before["pricing"]["bundle_price"]
@@ -0,0 +1,213 @@
+# backend/tests/test_retention_flows.py
+
+import pytest
+
+from app.retention_flows import RetentionEngine, load_flows, parse_delay, parse_flows
+from app.retention_store import PendingStepStore
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _record(**fields):
+    record = {
+        "timestamp": "2026-01-01T00:00:00Z",
+        "profile_type": "adult_woman",
+        "age_group": "31_50",
+        "goals": ["energy"],
+        "products": ["Adult Daily Multivitamin"],
+        "upsell": [],
+        "risk_label": "low",
+        "risk_score": 0.1,
+    }
+    record.update(fields)
+    return record
+
+
+def _engine(flows, clock, **kwargs):
+    events = []
+    engine = RetentionEngine(
+        parse_flows({"flows": flows}), actions={"log": events.append}, clock=clock, **kwargs
+    )
+    return engine, events
+
+
+def test_parse_delay():
+    assert parse_delay(90) == 90.0
+    assert parse_delay("30m") == 30 * 60
+    assert parse_delay("3d") == 3 * DAY
+    with pytest.raises(ValueError):
+        parse_delay(-1)
+
+
+def test_invalid_definitions_are_rejected():
+    with pytest.raises(ValueError):
+        parse_flows([{"id": "a", "trigger": {"colour": "red"}, "steps": [{"action": "log"}]}])
+    with pytest.raises(ValueError):
+        parse_flows([{"id": "a", "steps": []}])
+    with pytest.raises(ValueError):
+        parse_flows([{"id": "a", "steps": [{"action": "log"}]}] * 2)
+    with pytest.raises(ValueError):
+        RetentionEngine(parse_flows([{"id": "a", "steps": [{"action": "sms"}]}]))
+
+
+def test_triggers_match_label_profile_and_product():
+    flows = parse_flows([
+        {"id": "high", "trigger": {"risk_label": "high"}, "steps": [{"action": "log"}]},
+        {"id": "kids", "trigger": {"profile_type": ["child"], "risk_label": ["medium", "high"]},
+         "steps": [{"action": "log"}]},
+        # Catalog ids resolve to the names records hold
+        {"id": "omega", "trigger": {"products": ["kids_omega3"]}, "steps": [{"action": "log"}]},
+        {"id": "scored", "trigger": {"min_risk_score": 0.5}, "steps": [{"action": "log"}]},
+    ])
+    high, kids, omega, scored = flows
+
+    assert high.matches(_record(risk_label="high"))
+    assert not high.matches(_record(risk_label="medium"))
+    assert kids.matches(_record(profile_type="child", risk_label="medium"))
+    assert not kids.matches(_record(profile_type="child", risk_label="low"))
+    assert omega.matches(_record(products=["Kids Probiotic", "Kids Omega-3"]))
+    assert not omega.matches(_record(products=["Kids Probiotic"]))
+    assert scored.matches(_record(risk_score=0.7))
+    assert not scored.matches(_record(risk_score=None))
+
+
+def test_steps_run_in_due_order_with_follow_ups():
+    clock = FakeClock(1_000.0)
+    engine, events = _engine(
+        [
+            {"id": "save", "trigger": {"risk_label": "high"},
+             "steps": [{"delay": "1h", "action": "log"}, {"delay": "3d", "action": "log"}]},
+            {"id": "tips", "trigger": {}, "steps": [{"delay": "2d", "action": "log"}]},
+        ],
+        clock,
+    )
+    engine.on_records([_record(risk_label="high"), _record()])
+    assert engine.pending() == 3
+    assert engine.next_due() == 1_000.0 + HOUR
+
+    # Nothing is due yet
+    assert engine.run_due(1_000.0 + HOUR - 1) == 0
+
+    clock.now += HOUR
+    assert engine.run_due() == 1
+    # The follow-up is scheduled `delay` after the step's due time
+    assert engine.pending() == 3
+
+    # Jumping far ahead runs everything due, in due order
+    assert engine.run_due(1_000.0 + 10 * DAY) == 3
+    assert [(e["flow"], e["step"], e["due"]) for e in events] == [
+        ("save", 0, 1_000.0 + HOUR),
+        ("tips", 0, 1_000.0 + 2 * DAY),
+        ("tips", 0, 1_000.0 + 2 * DAY),
+        ("save", 1, 1_000.0 + HOUR + 3 * DAY),
+    ]
+    assert events[0]["record"]["risk_label"] == "high"
+    assert engine.pending() == 0
+    assert engine.stats()["triggered"] == {"save": 1, "tips": 2}
+
+
+def test_max_pending_drops_new_flows():
+    engine, _ = _engine(
+        [{"id": "all", "trigger": {}, "steps": [{"delay": 60, "action": "log"}]}],
+        FakeClock(),
+        max_pending=5,
+    )
+    engine.on_records([_record()] * 8)
+    assert engine.pending() == 5
+    assert engine.dropped == 3
+    assert engine.triggered["all"] == 5
+
+
+def test_failing_action_is_counted_and_the_rest_still_run():
+    def boom(event):
+        raise RuntimeError("smtp down")
+
+    clock = FakeClock()
+    engine = RetentionEngine(
+        parse_flows([
+            {"id": "bad", "trigger": {}, "steps": [{"delay": 1, "action": "boom"}]},
+            {"id": "good", "trigger": {}, "steps": [{"delay": 2, "action": "log"}]},
+        ]),
+        actions={"boom": boom},
+        clock=clock,
+    )
+    engine.on_records([_record()])
+    assert engine.run_due(10) == 2
+    assert engine.errors == 1
+    assert [e["flow"] for e in engine.outbox.recent()] == ["good"]
+
+
+def test_email_subject_is_rendered_from_the_record():
+    engine = RetentionEngine(
+        parse_flows([{
+            "id": "save", "trigger": {},
+            "steps": [{"action": "email",
+                       "params": {"template": "t", "subject": "Save on your {products} {unknown}"}}],
+        }]),
+        clock=FakeClock(),
+    )
+    engine.on_records([_record(products=["Kids Omega-3", "Kids Probiotic"])])
+    engine.run_due(0)
+    (sent,) = engine.outbox.recent()
+    assert sent["email"] == {
+        "template": "t", "subject": "Save on your Kids Omega-3, Kids Probiotic {unknown}"
+    }
+
+
+def test_shipped_flows_load():
+    flows = load_flows()
+    assert flows
+    assert all(flow.steps for flow in flows)
+    RetentionEngine(flows, clock=FakeClock())
+
+
+FOLLOW_UP = [
+    {"id": "save", "trigger": {"risk_label": "high"},
+     "steps": [{"delay": "1h", "action": "log"}, {"delay": "3d", "action": "log"}]},
+    {"id": "tips", "trigger": {}, "steps": [{"delay": "2d", "action": "log"}]},
+]
+
+
+def test_pending_steps_survive_a_restart(tmp_path):
+    path = str(tmp_path / "retention.sqlite3")
+    clock = FakeClock(0.0)
+    engine, events = _engine(FOLLOW_UP, clock, store=PendingStepStore(path))
+    engine.on_records([_record(risk_label="high"), _record()])
+    assert engine.run_due(HOUR) == 1  # "save" step 0 ran, step 1 is scheduled
+    engine.store.close()
+
+    # New process: same flows, same file
+    restarted, events = _engine(FOLLOW_UP, clock, store=PendingStepStore(path))
+    assert restarted.pending() == 3
+    assert restarted.next_due() == 2 * DAY
+    assert restarted.run_due(10 * DAY) == 3
+    assert [(e["flow"], e["step"], e["due"]) for e in events] == [
+        ("tips", 0, 2 * DAY),
+        ("tips", 0, 2 * DAY),
+        ("save", 1, HOUR + 3 * DAY),
+    ]
+    assert events[-1]["record"]["risk_label"] == "high"
+    assert restarted.store.count() == 0
+
+
+def test_steps_of_removed_flows_are_dropped_on_restart(tmp_path):
+    path = str(tmp_path / "retention.sqlite3")
+    engine, _ = _engine(FOLLOW_UP, FakeClock(), store=PendingStepStore(path))
+    engine.on_records([_record(risk_label="high"), _record()])
+    engine.store.close()
+
+    restarted, events = _engine(FOLLOW_UP[1:], FakeClock(), store=PendingStepStore(path))
+    assert restarted.pending() == 2
+    assert restarted.orphaned == 1
+    assert restarted.store.count() == 2
+    restarted.run_due(10 * DAY)
+    assert {e["flow"] for e in events} == {"tips"}
@@ -0,0 +1,26 @@
+# backend/tests/test_scoring_backends.py
+
+import pytest
+
+from app import products_catalog
+from app.recommend_products import SCORING_BACKENDS, _select_products
+from benchmarks.synthetic import make_catalog, make_quizzes
+
+
+def _assert_same_as_linear(quizzes) -> None:
+    for q in quizzes:
+        expected = _select_products(q, "linear", semantic=(0.0, False))
+        for backend in SCORING_BACKENDS:
+            got = _select_products(q, backend, semantic=(0.0, False))
+            # Same products, scores, reasons and order
+            assert got == expected, f"{backend} differs from linear for {q!r}"
+
+
+def test_backends_match_linear_on_shipped_catalog():
+    _assert_same_as_linear(make_quizzes(300, seed=7))
+
+
+@pytest.mark.parametrize("size", [1, 10, 500])
+def test_backends_match_linear_on_synthetic_catalog(monkeypatch, size):
+    monkeypatch.setattr(products_catalog, "PRODUCT_CATALOG", make_catalog(size, seed=size))
+    _assert_same_as_linear(make_quizzes(100, seed=size))
@@ -0,0 +1,43 @@
+# backend/tests/test_static_payloads.py
+
+from typing import List
+
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app.catalog_index import get_catalog_index
+from app.main import app
+from app.quiz_schema import Question, get_quiz_questions
+
+
+def test_questions_match_the_response_model():
+    response = TestClient(app).get("/quiz/questions", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    expected = TypeAdapter(List[Question]).dump_python(get_quiz_questions(), mode="json")
+    assert response.json() == expected
+
+
+def test_questions_revalidate_with_etag():
+    client = TestClient(app)
+    first = client.get("/quiz/questions")
+    etag = first.headers["etag"]
+
+    again = client.get("/quiz/questions", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_catalog_products_are_cached_by_catalog_version():
+    client = TestClient(app)
+    first = client.get("/catalog/products")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "public, max-age=300"
+    index = get_catalog_index()
+    body = first.json()
+    assert body["version"] == index.version
+    assert [p["id"] for p in body["products"]] == [p["id"] for p in index.products]
+
+    again = client.get("/catalog/products", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
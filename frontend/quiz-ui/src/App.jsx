@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 
 const API_BASE =
   import.meta.env.VITE_API_BASE ||
@@ -28,6 +28,9 @@ function App() {
   const [segments, setSegments] = useState(null);
   const [adminFilterProfile, setAdminFilterProfile] = useState("all");
 
+  // Open SSE stream for the LLM explanation (if any)
+  const explanationStreamRef = useRef(null);
+
   // Engagement email content assistant
   const [emailCopy, setEmailCopy] = useState(null);
   const [emailLoading, setEmailLoading] = useState(false);
@@ -81,10 +84,41 @@ function App() {
     }
   };
 
+  // Live admin updates: /admin/stream sends a "snapshot" on connect (and
+  // again if this tab fell behind), then "update" events with the new
+  // records and only the summary fields that changed.
   useEffect(() => {
-    if (mode === "admin") {
-      loadAdminData();
-    }
+    if (mode !== "admin") return;
+
+    setAdminLoading(true);
+    setAdminError(null);
+    const source = new EventSource(`${API_BASE}/admin/stream`);
+
+    source.addEventListener("snapshot", (e) => {
+      const data = JSON.parse(e.data);
+      setAdminRecent(data.items || []);
+      setSegments(data.summary);
+      setAdminLoading(false);
+      setAdminError(null);
+    });
+
+    source.addEventListener("update", (e) => {
+      const data = JSON.parse(e.data);
+      if (data.items && data.items.length > 0) {
+        setAdminRecent((prev) => [...data.items, ...prev].slice(0, 100));
+      }
+      setSegments((prev) => ({ ...(prev || {}), ...data.summary }));
+    });
+
+    source.onerror = () => {
+      // EventSource reconnects by itself; fall back to one plain fetch
+      // so the view isn't empty while it does
+      if (source.readyState === EventSource.CLOSED) {
+        loadAdminData();
+      }
+    };
+
+    return () => source.close();
   }, [mode]);
 
   // ------------- QUIZ LOGIC -------------
@@ -110,12 +144,47 @@ function App() {
     }
   };
 
+  const closeExplanationStream = () => {
+    if (explanationStreamRef.current) {
+      explanationStreamRef.current.close();
+      explanationStreamRef.current = null;
+    }
+  };
+
+  // Stream the LLM explanation token by token; the fallback text from
+  // /quiz/recommend stays visible until the first token arrives.
+  const streamExplanation = (explanationId) => {
+    closeExplanationStream();
+    const source = new EventSource(
+      `${API_BASE}/quiz/recommend/${explanationId}/explanation/stream`
+    );
+    explanationStreamRef.current = source;
+    let streamed = "";
+
+    const setExplanation = (text) =>
+      setRecommendation((prev) =>
+        prev ? { ...prev, llm_explanation: text } : prev
+      );
+
+    source.addEventListener("token", (e) => {
+      streamed += JSON.parse(e.data).text;
+      setExplanation(streamed);
+    });
+    source.addEventListener("fallback", (e) => {
+      setExplanation(JSON.parse(e.data).text);
+    });
+    source.addEventListener("done", closeExplanationStream);
+    source.onerror = closeExplanationStream;
+  };
+
+  useEffect(() => closeExplanationStream, []);
+
   const handleSubmit = async () => {
     try {
       setSubmitting(true);
       setError(null);
 
-      const res = await fetch(`${API_BASE}/quiz/recommend`, {
+      const res = await fetch(`${API_BASE}/quiz/recommend?stream_explanation=true`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(answers),
@@ -129,6 +198,10 @@ function App() {
       setRecommendation(data);
       setView("result");
 
+      if (data.llm_explanation_status === "streaming" && data.llm_explanation_id) {
+        streamExplanation(data.llm_explanation_id);
+      }
+
       // Clear any previous email state when a new bundle is generated
       setEmailCopy(null);
       setEmailError(null);
@@ -141,6 +214,7 @@ function App() {
   };
 
   const handleRestart = () => {
+    closeExplanationStream();
     setAnswers({});
     setCurrentIndex(0);
     setRecommendation(null);